@@ -1,13 +1,15 @@
 import os
 import hashlib
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Union
 import toml
 
-from kv_storage import SimpleSQLiteDB
+from block_store import BlockStore
+from kv_storage import KVSQLiteStore
+from kv_log_engine import LogStructuredKVStore
+from mempool import DEFAULT_MEMPOOL_SIZE, Mempool
 
-from structures.transaction import Transaction
-from structures.threads_metadata_handlers import (
+from structures.metadata_handlers import (
     EpochHandler,
     ApprovementThreadMetadataHandler,
     GenerationThreadMetadataHandler
@@ -19,11 +21,25 @@ def hash_sha256(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
-def get_db_instance(db_label: str) -> SimpleSQLiteDB:
-    """Resolve SQLite DB instance for the given label."""
+# Storage engine per DB label: "sqlite" (KVSQLiteStore) or "log" (append-only
+# LogStructuredKVStore). Labels without an entry use "sqlite". Override with
+# PROTOCHAIN_DB_ENGINES="BLOCKS=log,STATE=sqlite".
+DB_ENGINES: Dict[str, str] = {
+    label.strip(): engine.strip().lower()
+    for label, engine in (entry.split("=", 1) for entry in os.environ.get("PROTOCHAIN_DB_ENGINES", "").split(",")
+                          if "=" in entry)
+}
+
+
+def get_db_instance(db_label: str) -> Union[KVSQLiteStore, LogStructuredKVStore]:
+    """Resolve the DB instance for the given label with its configured engine."""
     base_dir = os.environ.get("PROTOCHAIN_DATA", "")
-    db_path = os.path.join(base_dir, f"{db_label}.db")
-    return SimpleSQLiteDB(db_path)
+    engine = DB_ENGINES.get(db_label, "sqlite")
+    if engine == "log":
+        return LogStructuredKVStore(os.path.join(base_dir, f"{db_label}.log"))
+    if engine == "sqlite":
+        return KVSQLiteStore(os.path.join(base_dir, f"{db_label}.db"))
+    raise ValueError(f"Unknown storage engine {engine!r} for DB {db_label}")
 
 
 # Base storage path
@@ -40,12 +56,23 @@ with open(genesis_file, "r") as f:
     GENESIS_CONFIG = toml.load(f)
 
 # Core version
-with open("version.txt", "r") as vf:
+with open(Path(__file__).with_name("version.txt"), "r") as vf:
     CORE_VERSION_MAJOR: int = int(vf.read().strip())
 
 # Runtime caches and config
-TRANSACTION_POOL: Dict[str, Transaction] = {}
-RUNTIME_CONFIG: Dict[str, Any] = {}
+configs_file = os.path.join(PROTOCHAIN_DATA, "configs.toml")
+RUNTIME_CONFIG: Dict[str, Any] = toml.load(configs_file) if os.path.isfile(configs_file) else {}
+
+def genesis_account_nonce(creator: str) -> int:
+    """Next nonce of an account per the genesis STATE; the pool tracks it from there as blocks are applied."""
+    return int(GENESIS_CONFIG.get("STATE", {}).get(creator, {}).get("NONCE", 0))
+
+
+TRANSACTION_POOL = Mempool(max_size=RUNTIME_CONFIG.get("TXS_MEMPOOL_SIZE", DEFAULT_MEMPOOL_SIZE),
+                           account_nonce=genesis_account_nonce)
+
+# Encoded blocks, indexed by (epoch index, creator, block index) and hash
+BLOCK_STORE = BlockStore(os.path.join(PROTOCHAIN_DATA, "BLOCKS"))
 
 CACHE_STORE: Dict[str, Any] = {
     "APPROVEMENT_CACHE": {},           # type: Dict[str, Any]
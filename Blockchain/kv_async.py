@@ -0,0 +1,170 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import AsyncIterator, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from kv_storage import SCAN_BATCH_SIZE, KVSQLiteStore, prefix_upper_bound
+
+
+class AsyncKVStore:
+    """
+    Non-blocking KV access for coroutines on the node's event loop.
+
+    All writes go through one dedicated writer thread that owns the only
+    read-write connection, so they are serialized exactly as before. Reads run
+    on a pool of read-only connections; with the WAL journal they see the last
+    committed state and never wait for the writer. With the default
+    group_commit=1 a write has committed by the time its coroutine returns, so a
+    later read observes it; with group_commit > 1 readers only see it once its
+    group commits or flush() has been awaited.
+    """
+
+    def __init__(self, path: str, readers: int = 4, **store_options):
+        self.path = path
+        self._writer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kv-writer")
+        self._writer: KVSQLiteStore = self._writer_pool.submit(lambda: KVSQLiteStore(path, **store_options)).result()
+        self._reader_pool = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="kv-reader")
+        self._local = threading.local()
+        self._readers: List[KVSQLiteStore] = []
+        self._readers_lock = threading.Lock()
+        self._read_pragmas = store_options.get("pragmas")
+
+    def _reader(self) -> KVSQLiteStore:
+        """The calling reader thread's own read-only connection."""
+        store = getattr(self._local, "store", None)
+        if store is None:
+            store = self._local.store = KVSQLiteStore(self.path, pragmas=self._read_pragmas, read_only=True)
+            with self._readers_lock:
+                self._readers.append(store)
+        return store
+
+    async def _read(self, method: str, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._reader_pool, lambda: getattr(self._reader(), method)(*args))
+
+    async def _read_call(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._reader_pool, function, *args)
+
+    async def _write(self, method: str, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer_pool, lambda: getattr(self._writer, method)(*args))
+
+    # ----------------- Reads -----------------
+    async def get(self, key: str) -> Optional[str]:
+        return await self._read("get", key)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        return await self._read("get_many", list(keys))
+
+    async def has_key(self, key: str) -> bool:
+        return await self._read("has_key", key)
+
+    async def scan_range(self, start: str = "", end: Optional[str] = None, batch_size: int = SCAN_BATCH_SIZE,
+                         values: bool = True) -> AsyncIterator[Union[str, Tuple[str, str]]]:
+        """Async scan; each batch is fetched on a reader thread."""
+        def batch(after: str) -> list:
+            return list(islice(self._reader().scan_range(after, end, batch_size, values), batch_size))
+
+        position = start
+        while True:
+            rows = await self._read_call(batch, position)
+            for row in rows:
+                yield row
+            if len(rows) < batch_size:
+                return
+            last_key = rows[-1][0] if values else rows[-1]
+            position = last_key + "\x00"  # Smallest key after the last one seen
+
+    def scan_prefix(self, prefix: str, batch_size: int = SCAN_BATCH_SIZE,
+                    values: bool = True) -> AsyncIterator[Union[str, Tuple[str, str]]]:
+        return self.scan_range(prefix, prefix_upper_bound(prefix), batch_size, values)
+
+    # ----------------- Writes -----------------
+    async def set(self, key: str, value: str) -> None:
+        await self._write("set", key, value)
+
+    async def set_many(self, items: Union[Mapping[str, str], Iterable[Tuple[str, str]]]) -> None:
+        await self._write("set_many", list(items.items() if isinstance(items, Mapping) else items))
+
+    async def remove(self, key: str) -> None:
+        await self._write("remove", key)
+
+    async def remove_many(self, keys: Iterable[str]) -> None:
+        await self._write("remove_many", list(keys))
+
+    async def flush(self) -> None:
+        await self._write("flush")
+
+    async def commit_atomic_batch(self, items: Union[Mapping[str, str], Iterable[Tuple[str, str]]],
+                                  removals: Iterable[str] = ()) -> bool:
+        """
+        Apply upserts and removals in one atomic transaction. The whole
+        begin_atomic/commit_atomic sequence runs on the writer thread, so other
+        coroutines' writes cannot interleave with it.
+        """
+        rows = list(items.items() if isinstance(items, Mapping) else items)
+        removals = list(removals)
+
+        def apply() -> bool:
+            self._writer.begin_atomic()
+            try:
+                self._writer.atomic_set_many(rows)
+                self._writer.remove_many(removals)
+            except Exception:
+                self._writer.rollback_atomic()  # Leave the writer usable for the next write
+                raise
+            return self._writer.commit_atomic()
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer_pool, apply)
+
+    async def close(self) -> None:
+        await self._write("close")
+        self._writer_pool.shutdown(wait=True)
+        self._reader_pool.shutdown(wait=True)
+        with self._readers_lock:
+            for store in self._readers:
+                store.close()
+            self._readers.clear()
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+
+    async def demo() -> None:
+        store = AsyncKVStore(os.path.join(tempfile.mkdtemp(), "async_demo.db"))
+        await store.set_many((f"BLOCK:{i:06d}", "x" * 200) for i in range(20_000))
+
+        async def heartbeat() -> int:
+            ticks = 0
+            deadline = time.perf_counter() + 1.0
+            while time.perf_counter() < deadline:
+                await asyncio.sleep(0.001)
+                ticks += 1
+            return ticks
+
+        async def writer() -> int:
+            writes = 0
+            for i in range(200):
+                await store.commit_atomic_batch({f"TX:{i}:{j}": "y" for j in range(100)})
+                writes += 100
+            return writes
+
+        async def reader() -> int:
+            count = 0
+            async for _ in store.scan_prefix("BLOCK:"):
+                count += 1
+            return count
+
+        start = time.perf_counter()
+        ticks, writes, *scans = await asyncio.gather(heartbeat(), writer(), *(reader() for _ in range(4)))
+        print(f"{writes} writes and {len(scans)} concurrent scans of {scans[0]} keys in "
+              f"{time.perf_counter() - start:.2f}s; event loop ticked {ticks} times meanwhile")
+        print(f"Read after write: {await store.get('TX:199:99')}")
+        await store.close()
+
+    asyncio.run(demo())
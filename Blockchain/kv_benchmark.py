@@ -0,0 +1,171 @@
+"""
+KV store benchmark
+
+Measures write and read throughput of KVSQLiteStore configurations so the
+effect of journal mode, group commit and batched calls can be compared on the
+machine that will run the node, then runs chain-shaped workloads against
+every storage engine selectable in global_vars.get_db_instance.
+
+Usage:
+    python kv_benchmark.py [keys]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from kv_log_engine import LogStructuredKVStore
+from kv_storage import KVSQLiteStore
+
+BATCH = 1000
+
+
+def _rate(count: int, action: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    action()
+    return count / (time.perf_counter() - start)
+
+
+def bench_store(store, keys: List[str], value: str, batched: bool) -> Dict[str, float]:
+    """
+    Run the write, read and delete workloads against one open store and return ops/sec.
+    'batched' uses set_many/get_many/remove_many in blocks of BATCH keys.
+    """
+    def write() -> None:
+        if batched:
+            for i in range(0, len(keys), BATCH):
+                store.set_many((key, value) for key in keys[i:i + BATCH])
+        else:
+            for key in keys:
+                store.set(key, value)
+        if hasattr(store, "flush"):
+            store.flush()
+
+    def read() -> None:
+        if batched:
+            for i in range(0, len(keys), BATCH):
+                store.get_many(keys[i:i + BATCH])
+        else:
+            for key in keys:
+                store.get(key)
+
+    def remove() -> None:
+        if batched:
+            for i in range(0, len(keys), BATCH):
+                store.remove_many(keys[i:i + BATCH])
+        else:
+            for key in keys:
+                store.remove(key)
+        if hasattr(store, "flush"):
+            store.flush()
+
+    return {
+        "write_ops": _rate(len(keys), write),
+        "read_ops": _rate(len(keys), read),
+        "remove_ops": _rate(len(keys), remove)
+    }
+
+
+def run(count: int = 5000, value_size: int = 256) -> List[Dict[str, object]]:
+    configurations: Dict[str, Callable[[str], object]] = {
+        "rollback journal, commit per key": lambda path: KVSQLiteStore(path, pragmas={}),
+        "WAL + synchronous=NORMAL": lambda path: KVSQLiteStore(path),
+        "WAL + group commit of 1000": lambda path: KVSQLiteStore(path, group_commit=BATCH),
+    }
+    keys = [f"key:{i:08d}" for i in range(count)]
+    value = "v" * value_size
+    directory = tempfile.mkdtemp()
+    results: List[Dict[str, object]] = []
+    try:
+        for name, factory in configurations.items():
+            for batched in (False, True):
+                path = os.path.join(directory, f"bench-{len(results)}.db")
+                store = factory(path)
+                row = bench_store(store, keys, value, batched)
+                store.close()
+                results.append(dict(row, backend=name + (" (batched calls)" if batched else "")))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+# ----------------- Engine comparison -----------------
+ENGINES: Dict[str, Callable[[str], object]] = {
+    "sqlite": lambda path: KVSQLiteStore(path + ".db"),
+    "log": lambda path: LogStructuredKVStore(path + ".log"),
+}
+
+
+def chain_workloads(store, count: int) -> Dict[str, float]:
+    """
+    Workloads shaped like chain data, returning ops/sec for each:
+    blocks appended one by one, quorum proofs committed atomically in groups of
+    127, a hot finalization cache overwritten in place, random block reads and
+    a prefix scan over one epoch.
+    """
+    block = "b" * 4096
+    proof = "p" * 300
+    epochs = 4
+    block_keys = [f"BLOCK:{i % epochs}:{i:08d}" for i in range(count)]
+
+    def append_blocks() -> None:
+        for key in block_keys:
+            store.set(key, block)
+
+    def commit_proofs() -> None:
+        for start in range(0, count, 127):
+            store.begin_atomic()
+            for i in range(start, min(start + 127, count)):
+                store.atomic_set(f"AFP:{i:08d}", proof)
+            store.commit_atomic()
+
+    def overwrite_cache() -> None:
+        for i in range(count):
+            store.set(f"FINALIZATION_CACHE:{i % 100}", str(i))
+
+    reads = random.Random(7).sample(block_keys, min(count, 10_000))
+
+    def read_blocks() -> None:
+        for key in reads:
+            store.get(key)
+
+    results = {
+        "append_blocks": _rate(count, append_blocks),
+        "commit_proofs": _rate(count, commit_proofs),
+        "overwrite_cache": _rate(count, overwrite_cache),
+        "random_reads": _rate(len(reads), read_blocks),
+    }
+    start = time.perf_counter()
+    scanned = sum(1 for _ in store.scan_prefix("BLOCK:1:"))
+    results["scan_epoch"] = scanned / (time.perf_counter() - start)
+    return results
+
+
+def run_engines(count: int = 5000) -> List[Dict[str, object]]:
+    directory = tempfile.mkdtemp()
+    results: List[Dict[str, object]] = []
+    try:
+        for name, factory in ENGINES.items():
+            store = factory(os.path.join(directory, name))
+            results.append(dict(chain_workloads(store, count), engine=name))
+            store.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    keys_per_run = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print(f"{'Configuration':<52}{'write/s':>11}{'read/s':>11}{'remove/s':>11}")
+    for result in run(keys_per_run):
+        print(f"{result['backend']:<52}{result['write_ops']:>11.0f}{result['read_ops']:>11.0f}{result['remove_ops']:>11.0f}")
+
+    columns = ["append_blocks", "commit_proofs", "overwrite_cache", "random_reads", "scan_epoch"]
+    print()
+    print(f"{'Engine (ops/s)':<16}" + "".join(f"{column:>17}" for column in columns))
+    for result in run_engines(keys_per_run):
+        print(f"{result['engine']:<16}" + "".join(f"{result[column]:>17.0f}" for column in columns))
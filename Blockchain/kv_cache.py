@@ -0,0 +1,260 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from kv_storage import KVSQLiteStore
+
+
+_ABSENT = object()  # Negative cache entry: the key is known not to exist
+_CLEAN = object()  # The key had no buffered write when an atomic write replaced it
+
+
+class CachedKVStore:
+    """
+    Write-back LRU cache in front of a KVSQLiteStore.
+
+    Reads are answered from a bounded LRU, including "key does not exist"
+    answers, so hot keys such as the "{pk}(POOL)_STORAGE_POOL" entries read by
+    collect_quorum_info stop costing a SQLite query each. Writes are buffered
+    as dirty entries and flushed together in one begin_atomic/commit_atomic
+    transaction once 'max_dirty' accumulate or flush() is called. While a
+    caller's atomic transaction is open, flushes wait for it to finish, so
+    buffered writes never commit the caller's transaction early.
+    """
+
+    def __init__(self, store: KVSQLiteStore, max_entries: int = 100_000, max_dirty: int = 10_000):
+        self.store = store
+        self.max_entries = max_entries
+        self.max_dirty = max_dirty
+        self._cache: "OrderedDict[str, object]" = OrderedDict()
+        self._dirty: Dict[str, Optional[str]] = {}  # None marks a pending delete
+        self._atomic_keys: Dict[str, object] = {}  # Key -> buffered write it replaced, restored on rollback
+        self._in_atomic = False
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.flushes = 0
+        self.flushed_keys = 0
+        self.flush_seconds_total = 0.0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    # ----------------- Cache internals -----------------
+    def _remember(self, key: str, value: object) -> None:
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _lookup(self, key: str) -> object:
+        """Value, _ABSENT, counting hits and misses and filling the cache on a miss."""
+        if key in self._dirty:
+            self.hits += 1
+            value = self._dirty[key]
+            return _ABSENT if value is None else value
+        if key in self._cache:
+            cached = self._cache[key]
+            self._cache.move_to_end(key)
+            if cached is _ABSENT:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return cached
+
+        self.misses += 1
+        value = self.store.get(key)
+        result = _ABSENT if value is None else value
+        self._remember(key, result)
+        return result
+
+    # ----------------- KV interface -----------------
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._lookup(key)
+            return None if value is _ABSENT else value  # type: ignore[return-value]
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Serve what the cache knows and fetch the rest with one batched store lookup."""
+        with self._lock:
+            found: Dict[str, str] = {}
+            missing: List[str] = []
+            for key in keys:
+                if key in self._dirty or key in self._cache:
+                    value = self._lookup(key)
+                    if value is not _ABSENT:
+                        found[key] = value  # type: ignore[assignment]
+                else:
+                    missing.append(key)
+            if missing:
+                self.misses += len(missing)
+                fetched = self.store.get_many(missing)
+                for key in missing:
+                    self._remember(key, fetched.get(key, _ABSENT))
+                found.update(fetched)
+            return found
+
+    def has_key(self, key: str) -> bool:
+        with self._lock:
+            return self._lookup(key) is not _ABSENT
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._dirty[key] = value
+            self._remember(key, value)
+            if len(self._dirty) >= self.max_dirty and not self._in_atomic:
+                self.flush()
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._dirty[key] = None
+            self._remember(key, _ABSENT)
+            if len(self._dirty) >= self.max_dirty and not self._in_atomic:
+                self.flush()
+
+    def all_keys(self) -> List[str]:
+        with self._lock:
+            self.flush()
+            return self.store.all_keys()
+
+    def scan_range(self, start: str = "", end: Optional[str] = None, **options) -> Iterator[Union[str, Tuple[str, str]]]:
+        """Scans go to the store after buffered writes are flushed; they do not fill the cache."""
+        with self._lock:
+            self.flush()
+        return self.store.scan_range(start, end, **options)
+
+    def scan_prefix(self, prefix: str, **options) -> Iterator[Union[str, Tuple[str, str]]]:
+        with self._lock:
+            self.flush()
+        return self.store.scan_prefix(prefix, **options)
+
+    # ----------------- Write-back -----------------
+    def flush(self) -> bool:
+        """
+        Write all dirty entries in one transaction. On failure the entries stay
+        dirty so the next flush retries them. While an atomic transaction is
+        open nothing is written; commit_atomic() flushes afterwards.
+
+        Returns:
+            bool: True if the store committed (or nothing was dirty)
+        """
+        with self._lock:
+            if not self._dirty:
+                return True
+            if self._in_atomic:
+                return False
+            start = time.perf_counter()
+            upserts = [(key, value) for key, value in self._dirty.items() if value is not None]
+            deletes = [key for key, value in self._dirty.items() if value is None]
+
+            self.store.begin_atomic()
+            try:
+                if upserts:
+                    self.store.atomic_set_many(upserts)
+                if deletes:
+                    self.store.remove_many(deletes)
+            except Exception:
+                self.store.rollback_atomic()
+                raise
+            if not self.store.commit_atomic():
+                return False
+
+            elapsed = time.perf_counter() - start
+            self.flushes += 1
+            self.flushed_keys += len(self._dirty)
+            self.flush_seconds_total += elapsed
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            self._dirty.clear()
+            return True
+
+    # ----------------- Atomic writes (pass-through) -----------------
+    def begin_atomic(self) -> None:
+        """Flush buffered writes, then open an atomic transaction on the store."""
+        with self._lock:
+            self.flush()
+            self.store.begin_atomic()
+            self._in_atomic = True
+
+    def atomic_set(self, key: str, value: str) -> None:
+        """Write through the open transaction; an older buffered write of the key is superseded."""
+        with self._lock:
+            self.store.atomic_set(key, value)
+            self._in_atomic = True
+            replaced = self._dirty.pop(key, _CLEAN)
+            self._atomic_keys.setdefault(key, replaced)
+            self._remember(key, value)
+
+    def commit_atomic(self) -> bool:
+        """Commit the store transaction, then run any flush that was deferred while it was open."""
+        with self._lock:
+            committed = self.store.commit_atomic()
+            if not committed:
+                self._forget_atomic_keys()
+            self._atomic_keys.clear()
+            self._in_atomic = False
+            if len(self._dirty) >= self.max_dirty:
+                self.flush()
+            return committed
+
+    def rollback_atomic(self) -> None:
+        with self._lock:
+            self.store.rollback_atomic()
+            self._forget_atomic_keys()
+            self._atomic_keys.clear()
+            self._in_atomic = False
+
+    def _forget_atomic_keys(self) -> None:
+        """Rolled back: cached values are no longer true, and superseded buffered writes are pending again."""
+        for key, replaced in self._atomic_keys.items():
+            self._cache.pop(key, None)
+            if replaced is not _CLEAN and key not in self._dirty:
+                self._dirty[key] = replaced  # type: ignore[assignment]
+                self._remember(key, _ABSENT if replaced is None else replaced)
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self.store.close()
+
+    # ----------------- Metrics -----------------
+    def metrics(self) -> Dict[str, Union[int, float]]:
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "dirty": len(self._dirty),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+                "flushes": self.flushes,
+                "flushed_keys": self.flushed_keys,
+                "last_flush_ms": self.last_flush_seconds * 1000,
+                "avg_flush_ms": self.flush_seconds_total / self.flushes * 1000 if self.flushes else 0.0,
+                "max_flush_ms": self.max_flush_seconds * 1000
+            }
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    path = os.path.join(tempfile.mkdtemp(), "cache_demo.db")
+    cached = CachedKVStore(KVSQLiteStore(path), max_entries=10_000, max_dirty=1_000)
+    quorum = [f"validator{i}" for i in range(127)]
+    for pk in quorum:
+        cached.set(f"{pk}(POOL)_STORAGE_POOL", '{"pool_url": "http://%s"}' % pk)
+    cached.flush()
+
+    start = time.perf_counter()
+    for _ in range(1000):  # One collect_quorum_info pass per block
+        for pk in quorum:
+            cached.get(f"{pk}(POOL)_STORAGE_POOL")
+        cached.has_key("unknown(POOL)_STORAGE_POOL")
+    elapsed = time.perf_counter() - start
+    print(f"{128_000 / elapsed:.0f} cached reads/s")
+    print(cached.metrics())
+    cached.close()
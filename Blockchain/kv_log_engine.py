@@ -0,0 +1,496 @@
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from kv_storage import prefix_upper_bound
+
+
+# Record: crc32 | sequence | type | key length | value length | key | value
+# The CRC covers everything after itself; a torn or corrupt record ends recovery.
+_HEADER = struct.Struct('>IQBII')
+# Entry inside a batch record: type | key length | value length | key | value
+_ENTRY = struct.Struct('>BII')
+
+_PUT = 0
+_DELETE = 1
+_BATCH = 2
+
+SEGMENT_SUFFIX = '.seg'
+
+Location = Tuple[int, int, int]  # (segment id, value offset, value length)
+
+O_BINARY = getattr(os, 'O_BINARY', 0)  # Windows opens descriptors in text mode without it
+
+
+def _seek_read(fd: int, length: int, offset: int) -> bytes:
+    """os.pread stand-in; moves the shared file position, so callers must hold their store lock."""
+    os.lseek(fd, offset, os.SEEK_SET)
+    parts = []
+    while length:
+        part = os.read(fd, length)
+        if not part:
+            break
+        parts.append(part)
+        length -= len(part)
+    return b''.join(parts)
+
+
+pread = getattr(os, 'pread', _seek_read)  # os.pread does not exist on Windows
+
+
+class LogStructuredKVStore:
+    """
+    Append-only key-value engine with the KVSQLiteStore interface.
+
+    Writes are appended to the active segment file and an in-memory hash index
+    maps every key to the segment offset of its latest value. Sealed segments
+    are read through mmap. Atomic transactions are written as one batch record
+    under a single checksum, so after a crash a transaction is either fully
+    present or discarded. On open, the index is rebuilt by scanning the
+    segments; records carry a sequence number, so the newest write wins no
+    matter which segment it ended up in. As with KVSQLiteStore, reads and
+    scans see the open transaction's own writes before it commits.
+
+    Overwritten and deleted values leave dead bytes behind. compact() rewrites
+    the live records of every sealed segment into fresh segments and deletes
+    the old files; start_background_compaction() runs it whenever the dead
+    share of sealed bytes passes a threshold.
+    """
+
+    def __init__(self, directory: str, segment_size: int = 64 * 1024 * 1024, fsync: bool = False):
+        """
+        segment_size: Size at which the active segment is sealed.
+        fsync: fsync after every write; otherwise only commit_atomic, flush and
+            close fsync (writes still reach the OS immediately and survive a
+            process crash).
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._index: Dict[str, Location] = {}
+        self._index_seq: Dict[str, int] = {}
+        self._segment_bytes: Dict[int, int] = {}  # Total record bytes per segment
+        self._dead_bytes: Dict[int, int] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._files: Dict[int, int] = {}  # Segment id -> read file descriptor
+        self._sequence = 0
+        self._active_txn: Optional[List[Tuple[int, str, Optional[str]]]] = None
+        self._txn_view: Dict[str, Optional[str]] = {}  # Latest value per key written by the open transaction
+        self._compactor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self._recover()
+
+    # ----------------- Segments -----------------
+    def _segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.directory, f'{segment_id:08d}{SEGMENT_SUFFIX}')
+
+    def _segment_ids(self) -> List[int]:
+        return sorted(int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.directory)
+                      if name.endswith(SEGMENT_SUFFIX))
+
+    def _open_active(self, segment_id: int) -> None:
+        self._active_id = segment_id
+        self._active_fd = os.open(self._segment_path(segment_id), os.O_RDWR | os.O_CREAT | os.O_APPEND | O_BINARY, 0o644)
+        self._active_size = os.fstat(self._active_fd).st_size
+        self._files[segment_id] = self._active_fd
+        self._segment_bytes.setdefault(segment_id, self._active_size)
+        self._dead_bytes.setdefault(segment_id, 0)
+
+    def _seal_active(self) -> None:
+        os.fsync(self._active_fd)
+        sealed = self._active_id
+        self._map_segment(sealed)
+        self._open_active(self._next_segment_id())
+
+    def _map_segment(self, segment_id: int) -> None:
+        """Reopen a sealed segment read-only and mmap it."""
+        old = self._files.pop(segment_id, None)
+        if old is not None:
+            os.close(old)
+        fd = os.open(self._segment_path(segment_id), os.O_RDONLY | O_BINARY)
+        self._files[segment_id] = fd
+        if os.fstat(fd).st_size:
+            self._maps[segment_id] = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+
+    def _next_segment_id(self) -> int:
+        return max(self._segment_bytes, default=-1) + 1
+
+    def _drop_segment(self, segment_id: int) -> None:
+        segment_map = self._maps.pop(segment_id, None)
+        if segment_map is not None:
+            segment_map.close()
+        fd = self._files.pop(segment_id, None)
+        if fd is not None:
+            os.close(fd)
+        self._segment_bytes.pop(segment_id, None)
+        self._dead_bytes.pop(segment_id, None)
+        os.remove(self._segment_path(segment_id))
+
+    # ----------------- Records -----------------
+    @staticmethod
+    def _encode(sequence: int, kind: int, key: bytes, value: bytes) -> bytes:
+        body = _HEADER.pack(0, sequence, kind, len(key), len(value))[4:] + key + value
+        return struct.pack('>I', zlib.crc32(body)) + body
+
+    @staticmethod
+    def _encode_batch(operations: List[Tuple[int, str, Optional[str]]]) -> bytes:
+        parts = []
+        for kind, key, value in operations:
+            key_bytes = key.encode()
+            value_bytes = b'' if value is None else value.encode()
+            parts.append(_ENTRY.pack(kind, len(key_bytes), len(value_bytes)) + key_bytes + value_bytes)
+        return b''.join(parts)
+
+    def _append(self, record: bytes) -> int:
+        """Append a record to the active segment and return its offset."""
+        if self._active_size and self._active_size + len(record) > self.segment_size:
+            self._seal_active()
+        offset = self._active_size
+        os.write(self._active_fd, record)
+        if self.fsync:
+            os.fsync(self._active_fd)
+        self._active_size += len(record)
+        self._segment_bytes[self._active_id] += len(record)
+        return offset
+
+    def _apply(self, key: str, sequence: int, segment_id: int, location: Optional[Location], record_bytes: int) -> None:
+        """
+        Point the index at a newer value, or remove the key for a tombstone (location None).
+        Records that lose against a newer sequence number, and tombstones, count as dead bytes.
+        """
+        if sequence < self._index_seq.get(key, -1) or location is None:
+            self._dead_bytes[segment_id] += record_bytes
+        if sequence < self._index_seq.get(key, -1):
+            return
+        previous = self._index.pop(key, None)
+        if previous is not None:
+            # Approximate record size of the replaced value
+            self._dead_bytes[previous[0]] = self._dead_bytes.get(previous[0], 0) + previous[2] + len(key) + _ENTRY.size
+        self._index_seq[key] = sequence
+        if location is not None:
+            self._index[key] = location
+
+    def _write_single(self, kind: int, key: str, value: Optional[str]) -> None:
+        key_bytes = key.encode()
+        value_bytes = b'' if value is None else value.encode()
+        self._sequence += 1
+        record = self._encode(self._sequence, kind, key_bytes, value_bytes)
+        offset = self._append(record)
+        location = None if kind == _DELETE else (self._active_id, offset + _HEADER.size + len(key_bytes), len(value_bytes))
+        self._apply(key, self._sequence, self._active_id, location, len(record))
+
+    def _write_batch(self, operations: List[Tuple[int, str, Optional[str]]]) -> None:
+        if not operations:
+            return
+        self._sequence += 1
+        payload = self._encode_batch(operations)
+        record = self._encode(self._sequence, _BATCH, b'', payload)
+        offset = self._append(record)
+        position = offset + _HEADER.size
+        for kind, key, value in operations:
+            key_size, value_size = len(key.encode()), 0 if value is None else len(value.encode())
+            value_offset = position + _ENTRY.size + key_size
+            location = None if kind == _DELETE else (self._active_id, value_offset, value_size)
+            self._apply(key, self._sequence, self._active_id, location, _ENTRY.size + key_size + value_size)
+            position = value_offset + value_size
+
+    def _read_value(self, location: Location) -> str:
+        segment_id, offset, length = location
+        segment_map = self._maps.get(segment_id)
+        if segment_map is not None:
+            return segment_map[offset:offset + length].decode()
+        return pread(self._files[segment_id], length, offset).decode()
+
+    # ----------------- Recovery -----------------
+    def _recover(self) -> None:
+        segment_ids = self._segment_ids()
+        for segment_id in segment_ids:
+            self._segment_bytes[segment_id] = 0
+            self._dead_bytes[segment_id] = 0
+            self._scan_segment(segment_id, truncate=segment_id == segment_ids[-1])
+        for segment_id in segment_ids[:-1]:
+            self._map_segment(segment_id)
+        self._open_active(segment_ids[-1] if segment_ids else 0)
+
+    def _scan_segment(self, segment_id: int, truncate: bool) -> None:
+        with open(self._segment_path(segment_id), 'rb') as segment:
+            data = segment.read()
+        position = 0
+        while position + _HEADER.size <= len(data):
+            crc, sequence, kind, key_size, value_size = _HEADER.unpack_from(data, position)
+            end = position + _HEADER.size + key_size + value_size
+            if end > len(data) or zlib.crc32(data[position + 4:end]) != crc:
+                break
+            self._sequence = max(self._sequence, sequence)
+            key_start = position + _HEADER.size
+            if kind == _BATCH:
+                self._replay_batch(segment_id, sequence, data, key_start + key_size, end)
+            else:
+                key = data[key_start:key_start + key_size].decode()
+                location = None if kind == _DELETE else (segment_id, key_start + key_size, value_size)
+                self._apply(key, sequence, segment_id, location, end - position)
+            position = end
+        self._segment_bytes[segment_id] = position
+
+        if position < len(data):
+            if not truncate:
+                raise ValueError(f"Sealed segment {segment_id} is corrupt at offset {position}.")
+            with open(self._segment_path(segment_id), 'r+b') as segment:
+                segment.truncate(position)  # Drop the torn tail left by a crash
+
+    def _replay_batch(self, segment_id: int, sequence: int, data: bytes, position: int, end: int) -> None:
+        while position < end:
+            kind, key_size, value_size = _ENTRY.unpack_from(data, position)
+            key_start = position + _ENTRY.size
+            key = data[key_start:key_start + key_size].decode()
+            value_offset = key_start + key_size
+            location = None if kind == _DELETE else (segment_id, value_offset, value_size)
+            self._apply(key, sequence, segment_id, location, _ENTRY.size + key_size + value_size)
+            position = value_offset + value_size
+
+    # ----------------- KV interface -----------------
+    def set(self, key: str, value: str) -> None:
+        """Insert or update a value for the given key."""
+        with self._lock:
+            if self._active_txn is not None:
+                self._buffer([(_PUT, key, value)])
+            else:
+                self._write_single(_PUT, key, value)
+
+    def set_many(self, items: Union[Mapping[str, str], Iterable[Tuple[str, str]]]) -> None:
+        """Insert or update many keys as one batch record."""
+        rows = items.items() if isinstance(items, Mapping) else items
+        with self._lock:
+            operations = [(_PUT, key, value) for key, value in rows]
+            if self._active_txn is not None:
+                self._buffer(operations)
+            else:
+                self._write_batch(operations)
+
+    def get(self, key: str) -> Optional[str]:
+        """Retrieve a value by key."""
+        with self._lock:
+            return self._live_value(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        with self._lock:
+            found = {}
+            for key in keys:
+                value = self._live_value(key)
+                if value is not None:
+                    found[key] = value
+            return found
+
+    def remove(self, key: str) -> None:
+        """Delete an entry by key."""
+        with self._lock:
+            if self._active_txn is not None:
+                self._buffer([(_DELETE, key, None)])
+            elif key in self._index:
+                self._write_single(_DELETE, key, None)
+
+    def remove_many(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            operations = [(_DELETE, key, None) for key in keys]
+            if self._active_txn is not None:
+                self._buffer(operations)
+            else:
+                self._write_batch([op for op in operations if op[1] in self._index])
+
+    def has_key(self, key: str) -> bool:
+        with self._lock:
+            if key in self._txn_view:
+                return self._txn_view[key] is not None
+            return key in self._index
+
+    def all_keys(self) -> List[str]:
+        with self._lock:
+            return list(self._live_keys())
+
+    def scan_range(self, start: str = "", end: Optional[str] = None, batch_size: int = 1000,
+                   values: bool = True) -> Iterator[Union[str, Tuple[str, str]]]:
+        """Keys in [start, end) in key order. The hash index is unordered, so matching keys are sorted first."""
+        with self._lock:
+            keys = sorted(key for key in self._live_keys() if key >= start and (end is None or key < end))
+        for position in range(0, len(keys), batch_size):
+            batch = keys[position:position + batch_size]
+            if not values:
+                yield from batch
+                continue
+            found = self.get_many(batch)
+            yield from ((key, found[key]) for key in batch if key in found)
+
+    def scan_prefix(self, prefix: str, batch_size: int = 1000,
+                    values: bool = True) -> Iterator[Union[str, Tuple[str, str]]]:
+        return self.scan_range(prefix, prefix_upper_bound(prefix), batch_size, values)
+
+    def _live_value(self, key: str) -> Optional[str]:
+        if key in self._txn_view:
+            return self._txn_view[key]
+        location = self._index.get(key)
+        return None if location is None else self._read_value(location)
+
+    def _live_keys(self) -> Iterable[str]:
+        if not self._txn_view:
+            return self._index.keys()
+        keys = set(self._index)
+        for key, value in self._txn_view.items():
+            if value is None:
+                keys.discard(key)
+            else:
+                keys.add(key)
+        return keys
+
+    # ----------------- Atomic writes -----------------
+    def _buffer(self, operations: List[Tuple[int, str, Optional[str]]]) -> None:
+        """Add writes to the open transaction and to the view its reads go through."""
+        self._active_txn.extend(operations)  # type: ignore[union-attr]
+        for _, key, value in operations:
+            self._txn_view[key] = value
+
+    def begin_atomic(self) -> None:
+        """Start buffering writes; they are appended as one batch record on commit."""
+        with self._lock:
+            if self._active_txn is None:
+                self._active_txn = []
+
+    def atomic_set(self, key: str, value: str) -> None:
+        with self._lock:
+            if self._active_txn is None:
+                self.begin_atomic()
+            self._buffer([(_PUT, key, value)])
+
+    def atomic_set_many(self, items: Union[Mapping[str, str], Iterable[Tuple[str, str]]]) -> None:
+        with self._lock:
+            if self._active_txn is None:
+                self.begin_atomic()
+            rows = items.items() if isinstance(items, Mapping) else items
+            self._buffer([(_PUT, key, value) for key, value in rows])
+
+    def commit_atomic(self) -> bool:
+        with self._lock:
+            operations, self._active_txn = self._active_txn, None
+            self._txn_view = {}
+            if not operations:
+                return True
+            try:
+                self._write_batch(operations)
+                os.fsync(self._active_fd)
+                return True
+            except OSError:
+                return False
+
+    def rollback_atomic(self) -> None:
+        """Discard the open transaction's buffered writes."""
+        with self._lock:
+            self._active_txn = None
+            self._txn_view = {}
+
+    def flush(self) -> None:
+        with self._lock:
+            os.fsync(self._active_fd)
+
+    # ----------------- Compaction -----------------
+    def dead_ratio(self) -> float:
+        """Share of sealed segment bytes that no longer back a live value."""
+        with self._lock:
+            sealed = [s for s in self._segment_bytes if s != self._active_id]
+            total = sum(self._segment_bytes[s] for s in sealed)
+            return min(1.0, sum(self._dead_bytes[s] for s in sealed) / total) if total else 0.0
+
+    def compact(self, batch_size: int = 1000) -> int:
+        """
+        Rewrite the live records of all sealed segments and delete the old files.
+        The lock is taken per batch of keys, so writers and readers keep going
+        while a compaction runs.
+
+        Returns:
+            int: Bytes reclaimed
+        """
+        with self._lock:
+            if self._active_size:
+                self._seal_active()
+            sealed = set(s for s in self._segment_bytes if s != self._active_id)
+            if not sealed:
+                return 0
+            before = sum(self._segment_bytes[s] for s in sealed)
+            live = [(key, location) for key, location in self._index.items() if location[0] in sealed]
+
+        # Live values move to the active segment with their original sequence numbers,
+        # so recovery still ranks them correctly against newer writes
+        for position in range(0, len(live), batch_size):
+            with self._lock:
+                for key, location in live[position:position + batch_size]:
+                    if self._index.get(key) != location:
+                        continue  # Overwritten or deleted since the snapshot
+                    value = self._read_value(location).encode()
+                    key_bytes = key.encode()
+                    offset = self._append(self._encode(self._index_seq[key], _PUT, key_bytes, value))
+                    self._index[key] = (self._active_id, offset + _HEADER.size + len(key_bytes), len(value))
+
+        with self._lock:
+            os.fsync(self._active_fd)
+            for segment_id in sealed:
+                self._drop_segment(segment_id)
+            # With the old values gone, sequence numbers of deleted keys no longer matter
+            self._index_seq = {key: self._index_seq[key] for key in self._index}
+            after = sum(size for s, size in self._segment_bytes.items() if s not in sealed)
+            return max(0, before - after)
+
+    def start_background_compaction(self, interval: float = 30.0, threshold: float = 0.5) -> None:
+        """Compact whenever the dead share of sealed bytes reaches 'threshold'. Only one compactor runs at a time."""
+        def run() -> None:
+            while not self._stop.wait(interval):
+                if self.dead_ratio() >= threshold:
+                    self.compact()
+
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(target=run, name="kv-log-compaction", daemon=True)
+            self._compactor.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            self._active_txn = None
+            self._txn_view = {}
+            os.fsync(self._active_fd)
+            for segment_map in self._maps.values():
+                segment_map.close()
+            for fd in self._files.values():
+                os.close(fd)
+            self._maps.clear()
+            self._files.clear()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    directory = tempfile.mkdtemp()
+    store = LogStructuredKVStore(directory, segment_size=4 * 1024 * 1024)
+    start = time.perf_counter()
+    for epoch in range(3):
+        for index in range(20_000):
+            store.set(f"BLOCK:{epoch}:{index}", "b" * 300)
+        for index in range(20_000):
+            store.set("FINALIZATION_CACHE", str(index))  # Hot key, overwritten constantly
+    print(f"{120_000 / (time.perf_counter() - start):.0f} writes/s, dead ratio {store.dead_ratio():.2f}")
+    print(f"Compaction reclaimed {store.compact() / 1024 ** 2:.1f} MiB")
+    store.close()
+
+    start = time.perf_counter()
+    reopened = LogStructuredKVStore(directory)
+    print(f"Recovered {len(reopened.all_keys())} keys in {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"FINALIZATION_CACHE = {reopened.get('FINALIZATION_CACHE')}")
+    reopened.close()
@@ -1,13 +1,83 @@
+import pathlib
 import sqlite3
-from typing import Optional, List
+import time
+from typing import Dict, Iterable, Iterator, Mapping, Optional, List, Tuple, Union
+
+
+# WAL lets readers run next to the writer and turns commits into appends;
+# synchronous=NORMAL fsyncs at checkpoints instead of on every commit.
+DEFAULT_PRAGMAS: Dict[str, Union[str, int]] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # Negative values are KiB: 64 MiB of page cache
+    "temp_store": "MEMORY"
+}
+
+# Pragmas that only tune reads; journal and sync settings belong to the writer
+READ_PRAGMAS = ("mmap_size", "cache_size", "temp_store")
+
+# SQLite caps bound parameters per statement (999 on older builds)
+MAX_IN_PARAMS = 900
+
+_UPSERT_SQL = '''
+    INSERT INTO kv_data (key, value)
+    VALUES (?, ?)
+    ON CONFLICT(key) DO UPDATE SET value = excluded.value
+'''
+_DELETE_SQL = 'DELETE FROM kv_data WHERE key = ?'
+
+SCAN_BATCH_SIZE = 1000
+
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    """Smallest string greater than every string starting with 'prefix' (None: no bound)."""
+    while prefix:
+        last = ord(prefix[-1])
+        if last < 0x10FFFF:
+            following = last + 1
+            if 0xD800 <= following <= 0xDFFF:  # Surrogates cannot be stored as UTF-8
+                following = 0xE000
+            return prefix[:-1] + chr(following)
+        prefix = prefix[:-1]
+    return None
 
 
 class KVSQLiteStore:
     """A lightweight SQLite-backed key-value store with optional atomic writes."""
 
-    def __init__(self, path: str):
-        self._conn = sqlite3.connect(path, check_same_thread=False)
+    def __init__(self, path: str, pragmas: Optional[Mapping[str, Union[str, int]]] = None,
+                 group_commit: int = 1, group_commit_interval: float = 0.0, read_only: bool = False):
+        """
+        pragmas: PRAGMA settings applied on open (DEFAULT_PRAGMAS when None, pass {}
+            for SQLite's own defaults).
+        group_commit: Number of set/remove calls folded into one commit. With more
+            than 1, a crash can lose the writes of the open group; call flush() at
+            points that must be durable.
+        group_commit_interval: Also commit an open group once it is this many
+            seconds old (checked on the next write, 0 disables the check).
+        read_only: Open an existing database for reading only; any write raises
+            sqlite3.OperationalError.
+        """
+        self.read_only = read_only
+        if read_only:
+            uri = f'{pathlib.Path(path).resolve().as_uri()}?mode=ro'  # Percent-encodes '?', '#' and spaces in the path
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=256)
+        else:
+            self._conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
         self._active_txn = False
+        self.group_commit = max(1, group_commit)
+        self.group_commit_interval = group_commit_interval
+        self._pending_writes = 0
+        self._group_started = 0.0
+
+        for name, value in (DEFAULT_PRAGMAS if pragmas is None else pragmas).items():
+            if not read_only or name in READ_PRAGMAS:
+                self._conn.execute(f'PRAGMA {name}={value}')
+        if read_only:
+            self._conn.execute('PRAGMA query_only=ON')
+            return
+
         self._conn.execute(
             '''
             CREATE TABLE IF NOT EXISTS kv_data (
@@ -18,17 +88,38 @@ class KVSQLiteStore:
         )
         self._conn.commit()
 
+    def _write(self, sql: str, params: Union[Tuple, Iterable[Tuple]], many: bool = False, count: int = 1) -> None:
+        if self._active_txn:
+            (self._conn.executemany if many else self._conn.execute)(sql, params)
+            return
+        if self.group_commit == 1:
+            with self._conn:
+                (self._conn.executemany if many else self._conn.execute)(sql, params)
+            return
+
+        if not self._pending_writes:
+            self._group_started = time.monotonic()
+        (self._conn.executemany if many else self._conn.execute)(sql, params)
+        self._pending_writes += count
+        if self._pending_writes >= self.group_commit or (
+                self.group_commit_interval and time.monotonic() - self._group_started >= self.group_commit_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit writes that are waiting for their group commit."""
+        if self._pending_writes and not self._active_txn:
+            self._conn.commit()
+            self._pending_writes = 0
+
     def set(self, key: str, value: str) -> None:
         """Insert or update a value for the given key."""
-        with self._conn:
-            self._conn.execute(
-                '''
-                INSERT INTO kv_data (key, value)
-                VALUES (?, ?)
-                ON CONFLICT(key) DO UPDATE SET value = excluded.value
-                ''',
-                (key, value)
-            )
+        self._write(_UPSERT_SQL, (key, value))
+
+    def set_many(self, items: Union[Mapping[str, str], Iterable[Tuple[str, str]]]) -> None:
+        """Insert or update many keys with one executemany and (at most) one commit."""
+        rows = list(items.items() if isinstance(items, Mapping) else items)
+        if rows:
+            self._write(_UPSERT_SQL, rows, many=True, count=len(rows))
 
     def get(self, key: str) -> Optional[str]:
         """Retrieve a value by key."""
@@ -39,10 +130,28 @@ class KVSQLiteStore:
         row = cur.fetchone()
         return row[0] if row else None
 
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Retrieve many keys with batched IN lookups. Missing keys are left out of the result."""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, str] = {}
+        for start in range(0, len(keys), MAX_IN_PARAMS):
+            batch = keys[start:start + MAX_IN_PARAMS]
+            cur = self._conn.execute(
+                f'SELECT key, value FROM kv_data WHERE key IN ({",".join("?" * len(batch))})',
+                batch
+            )
+            found.update(cur.fetchall())
+        return found
+
     def remove(self, key: str) -> None:
         """Delete an entry by key."""
-        with self._conn:
-            self._conn.execute('DELETE FROM kv_data WHERE key = ?', (key,))
+        self._write(_DELETE_SQL, (key,))
+
+    def remove_many(self, keys: Iterable[str]) -> None:
+        """Delete many keys with one executemany and (at most) one commit."""
+        rows = [(key,) for key in keys]
+        if rows:
+            self._write(_DELETE_SQL, rows, many=True, count=len(rows))
 
     def has_key(self, key: str) -> bool:
         """Check if a key exists."""
@@ -54,9 +163,41 @@ class KVSQLiteStore:
         cur = self._conn.execute('SELECT key FROM kv_data')
         return [row[0] for row in cur.fetchall()]
 
+    def scan_range(self, start: str = "", end: Optional[str] = None, batch_size: int = SCAN_BATCH_SIZE,
+                   values: bool = True) -> Iterator[Union[str, Tuple[str, str]]]:
+        """
+        Yield keys in [start, end) in key order, as (key, value) pairs or, with
+        values=False, bare keys (answered from the primary key index alone).
+
+        Rows are fetched 'batch_size' at a time, and every batch is a fresh
+        indexed query that resumes after the last key seen. Memory stays
+        constant, and no read transaction is held open between batches.
+        """
+        columns = 'key, value' if values else 'key'
+        bound = '' if end is None else ' AND key < ?'
+        first_sql = f'SELECT {columns} FROM kv_data WHERE key >= ?{bound} ORDER BY key LIMIT ?'
+        next_sql = f'SELECT {columns} FROM kv_data WHERE key > ?{bound} ORDER BY key LIMIT ?'
+        tail = () if end is None else (end,)
+
+        rows = self._conn.execute(first_sql, (start, *tail, batch_size)).fetchall()
+        while rows:
+            if values:
+                yield from rows
+            else:
+                yield from (row[0] for row in rows)
+            if len(rows) < batch_size:
+                return
+            rows = self._conn.execute(next_sql, (rows[-1][0], *tail, batch_size)).fetchall()
+
+    def scan_prefix(self, prefix: str, batch_size: int = SCAN_BATCH_SIZE,
+                    values: bool = True) -> Iterator[Union[str, Tuple[str, str]]]:
+        """Yield every key starting with 'prefix' (see scan_range for batching and values)."""
+        return self.scan_range(prefix, prefix_upper_bound(prefix), batch_size, values)
+
     def begin_atomic(self) -> None:
         """Start an atomic write transaction."""
         if not self._active_txn:
+            self.flush()
             self._conn.execute('BEGIN')
             self._active_txn = True
 
@@ -64,14 +205,13 @@ class KVSQLiteStore:
         """Set a value within an active atomic transaction."""
         if not self._active_txn:
             self.begin_atomic()
-        self._conn.execute(
-            '''
-            INSERT INTO kv_data (key, value)
-            VALUES (?, ?)
-            ON CONFLICT(key) DO UPDATE SET value = excluded.value
-            ''',
-            (key, value)
-        )
+        self._conn.execute(_UPSERT_SQL, (key, value))
+
+    def atomic_set_many(self, items: Union[Mapping[str, str], Iterable[Tuple[str, str]]]) -> None:
+        """Set many values within an active atomic transaction."""
+        if not self._active_txn:
+            self.begin_atomic()
+        self._conn.executemany(_UPSERT_SQL, list(items.items() if isinstance(items, Mapping) else items))
 
     def commit_atomic(self) -> bool:
         """Commit the current atomic transaction."""
@@ -86,8 +226,18 @@ class KVSQLiteStore:
         finally:
             self._active_txn = False
 
+    def rollback_atomic(self) -> None:
+        """Discard the current atomic transaction."""
+        if self._active_txn:
+            try:
+                self._conn.rollback()
+            finally:
+                self._active_txn = False
+
     def close(self) -> None:
         """Close the database connection."""
         if self._active_txn:
             self._conn.rollback()
+        else:
+            self.flush()
         self._conn.close()
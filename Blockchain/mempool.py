@@ -0,0 +1,304 @@
+import heapq
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from structures.transactions import Transaction
+
+
+DEFAULT_MEMPOOL_SIZE = 300_000  # TXS_MEMPOOL_SIZE in configs.toml
+MAX_TXS_PER_SENDER = 64         # Pending nonces accepted ahead of the account nonce
+REPLACE_BUMP_PERCENT = 10       # Fee-per-byte increase needed to replace a same-nonce tx
+FEE_RATE_SCALE = 1000           # Fee-per-byte is kept as an integer in 1/1000 units
+
+
+class _PoolEntry:
+    __slots__ = ("tx", "hash", "size", "fee_rate")
+
+    def __init__(self, tx: Transaction):
+        self.tx = tx
+        self.hash = tx.hash
+        self.size = tx.size
+        self.fee_rate = int(tx.fee) * FEE_RATE_SCALE // max(1, self.size)
+
+
+class _SenderQueue:
+    """One creator's pending transactions keyed by nonce, plus the account's next nonce."""
+    __slots__ = ("next_nonce", "txs", "tail")
+
+    def __init__(self, next_nonce: int):
+        self.next_nonce = next_nonce
+        self.txs: Dict[int, _PoolEntry] = {}
+        self.tail: Optional[int] = None  # Highest pending nonce
+
+    def refresh_tail(self) -> None:
+        self.tail = max(self.txs) if self.txs else None
+
+
+class Mempool:
+    """
+    Bounded transaction pool ordered by fee per byte.
+
+    Each creator has a queue of transactions keyed by nonce. Only a contiguous
+    run starting at the account's next nonce is executable, and pending()
+    offers those runs merged by fee per byte, best first.
+
+    When the pool is full, a new transaction evicts the cheapest eviction
+    candidate if it pays more per byte, and is rejected otherwise. Candidates
+    are the highest-nonce transaction of each creator, so evicting one never
+    opens a nonce gap, and the incoming transaction's own creator is never a
+    candidate. They live in a min-heap, so an eviction is O(log n).
+
+    A creator's account nonce outlives its queue: when the last pending
+    transaction leaves, the nonce is kept in a bounded LRU and reused when
+    the creator's next transaction arrives.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MEMPOOL_SIZE, account_nonce: Callable[[str], int] = lambda creator: 0,
+                 max_per_sender: int = MAX_TXS_PER_SENDER):
+        """
+        account_nonce: Returns the next nonce a creator's account expects; it is
+            asked when a creator's transaction arrives and the pool knows no
+            nonce for it. Keep it in sync afterwards with set_account_nonce().
+        """
+        self.max_size = max_size
+        self.max_per_sender = max_per_sender
+        self._account_nonce = account_nonce
+        self._by_hash: Dict[str, _PoolEntry] = {}
+        self._senders: Dict[str, _SenderQueue] = {}
+        # Account nonces of creators without pending transactions, least recently used first
+        self._idle_nonces: "OrderedDict[str, int]" = OrderedDict()
+        # Lazy min-heap of (fee_rate, order, hash) over every creator's tail;
+        # entries whose hash is no longer a tail are skipped when popped
+        self._tails: List[Tuple[int, int, str]] = []
+        self._order = itertools.count()
+        self._lock = threading.RLock()
+
+        self.evicted = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._by_hash)
+
+    def __contains__(self, hash: str) -> bool:
+        return hash in self._by_hash
+
+    def get(self, hash: str) -> Optional[Transaction]:
+        entry = self._by_hash.get(hash)
+        return entry.tx if entry else None
+
+    # ----------------- Eviction heap -----------------
+    def _push_tail(self, queue: _SenderQueue) -> None:
+        if queue.tail is None:
+            return
+        entry = queue.txs[queue.tail]
+        heapq.heappush(self._tails, (entry.fee_rate, next(self._order), entry.hash))
+        if len(self._tails) > 2 * len(self._senders) + 64:
+            self._rebuild_tails()
+
+    def _rebuild_tails(self) -> None:
+        """Drop stale heap entries once they outnumber the live ones."""
+        self._tails = []
+        for queue in self._senders.values():
+            entry = queue.txs[queue.tail]
+            self._tails.append((entry.fee_rate, next(self._order), entry.hash))
+        heapq.heapify(self._tails)
+
+    def _is_tail(self, hash: str) -> bool:
+        entry = self._by_hash.get(hash)
+        return entry is not None and self._senders[entry.tx.creator].tail == entry.tx.nonce
+
+    def _cheapest_tail(self, exclude: str) -> Optional[_PoolEntry]:
+        """Cheapest tail of any creator but 'exclude', whose lower nonces the new transaction builds on."""
+        own = None
+        cheapest = None
+        while self._tails:
+            _, _, hash = self._tails[0]
+            if not self._is_tail(hash):
+                heapq.heappop(self._tails)
+            elif self._by_hash[hash].tx.creator == exclude:
+                own = heapq.heappop(self._tails)  # A creator has one live tail, so this happens at most once
+            else:
+                cheapest = self._by_hash[hash]
+                break
+        if own is not None:
+            heapq.heappush(self._tails, own)
+        return cheapest
+
+    # ----------------- Account nonces -----------------
+    def _next_nonce(self, creator: str) -> int:
+        queue = self._senders.get(creator)
+        if queue is not None:
+            return queue.next_nonce
+        if creator in self._idle_nonces:
+            self._idle_nonces.move_to_end(creator)
+            return self._idle_nonces[creator]
+        return self._account_nonce(creator)
+
+    def _remember_nonce(self, creator: str, next_nonce: int) -> None:
+        self._idle_nonces[creator] = next_nonce
+        self._idle_nonces.move_to_end(creator)
+        while len(self._idle_nonces) > self.max_size:
+            self._idle_nonces.popitem(last=False)
+
+    # ----------------- Adding and removing -----------------
+    def _drop(self, entry: _PoolEntry) -> None:
+        """Remove one entry, refreshing its creator's tail."""
+        queue = self._senders[entry.tx.creator]
+        del queue.txs[entry.tx.nonce]
+        del self._by_hash[entry.hash]
+        if not queue.txs:
+            del self._senders[entry.tx.creator]
+            self._remember_nonce(entry.tx.creator, queue.next_nonce)
+        elif queue.tail == entry.tx.nonce:
+            queue.refresh_tail()
+            self._push_tail(queue)
+
+    def add(self, tx: Transaction) -> bool:
+        """
+        Admit a transaction.
+
+        Returns:
+            bool: False when the transaction is a duplicate, stale, too far ahead
+            of the account nonce, underpays a same-nonce replacement or does not
+            outbid the cheapest transaction of a full pool
+        """
+        entry = _PoolEntry(tx)
+        with self._lock:
+            if entry.hash in self._by_hash:
+                return False
+            queue = self._senders.get(tx.creator)
+            next_nonce = self._next_nonce(tx.creator)
+            if not next_nonce <= tx.nonce < next_nonce + self.max_per_sender:
+                self.rejected += 1
+                return False
+
+            replaced = queue.txs.get(tx.nonce) if queue else None
+            if replaced:
+                if entry.fee_rate * 100 < replaced.fee_rate * (100 + REPLACE_BUMP_PERCENT):
+                    self.rejected += 1
+                    return False
+                self._drop(replaced)
+            elif len(self._by_hash) >= self.max_size:
+                cheapest = self._cheapest_tail(exclude=tx.creator)
+                if cheapest is None or cheapest.fee_rate >= entry.fee_rate:
+                    self.rejected += 1
+                    return False
+                self._drop(cheapest)
+                self.evicted += 1
+
+            queue = self._senders.get(tx.creator)
+            if queue is None:
+                queue = self._senders[tx.creator] = _SenderQueue(next_nonce)
+                self._idle_nonces.pop(tx.creator, None)
+            queue.txs[tx.nonce] = entry
+            self._by_hash[entry.hash] = entry
+            if queue.tail is None or tx.nonce > queue.tail:
+                queue.tail = tx.nonce
+                self._push_tail(queue)
+            return True
+
+    def remove(self, hash: str) -> bool:
+        """Remove a transaction by hash. Later nonces of its creator stay, but wait for the gap to refill."""
+        with self._lock:
+            entry = self._by_hash.get(hash)
+            if entry is None:
+                return False
+            self._drop(entry)
+            return True
+
+    def set_account_nonce(self, creator: str, next_nonce: int) -> None:
+        """Record a creator's new account nonce (after a block is applied) and drop its stale transactions."""
+        with self._lock:
+            queue = self._senders.get(creator)
+            if queue is None:
+                self._remember_nonce(creator, next_nonce)
+                return
+            queue.next_nonce = next_nonce
+            for nonce in [nonce for nonce in queue.txs if nonce < next_nonce]:
+                self._drop(queue.txs[nonce])
+
+    def remove_included(self, txs: List[Transaction]) -> None:
+        """Drop transactions included in a block, advancing each creator's account nonce past them."""
+        with self._lock:
+            next_nonces: Dict[str, int] = {}
+            for tx in txs:
+                next_nonces[tx.creator] = max(next_nonces.get(tx.creator, 0), tx.nonce + 1)
+            for creator, next_nonce in next_nonces.items():
+                self.set_account_nonce(creator, next_nonce)
+
+    # ----------------- Block building -----------------
+    def pending(self) -> Iterator[Transaction]:
+        """
+        Yield executable transactions by fee per byte, best first,
+        each creator's transactions in nonce order.
+
+        Only one transaction per creator is in the merge heap at a time, so the
+        k best cost O(senders + k log senders). The iterator works on a
+        snapshot of the queue heads taken under the lock.
+        """
+        with self._lock:
+            heads = []
+            for creator, queue in self._senders.items():
+                entry = queue.txs.get(queue.next_nonce)
+                if entry:
+                    heads.append((-entry.fee_rate, next(self._order), creator, entry, queue))
+        heapq.heapify(heads)
+
+        while heads:
+            _, _, creator, entry, queue = heapq.heappop(heads)
+            yield entry.tx
+            following = queue.txs.get(entry.tx.nonce + 1)
+            if following:
+                heapq.heappush(heads, (-following.fee_rate, next(self._order), creator, following, queue))
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._by_hash),
+                "senders": len(self._senders),
+                "evicted": self.evicted,
+                "rejected": self.rejected
+            }
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    pool = Mempool(max_size=100_000)
+    rng = random.Random(1)
+    senders = [f"sender{i}" for i in range(20_000)]
+    next_nonce = dict.fromkeys(senders, 0)
+    spam = []
+    for _ in range(300_000):
+        sender = rng.choice(senders)
+        spam.append(Transaction(v=0, fee=str(rng.randint(1, 10_000)), creator=sender, sig="", tx_type="transfer",
+                                sig_type="D", nonce=next_nonce[sender], payload={"to": "x", "amount": 1}))
+        next_nonce[sender] += 1
+    for tx in spam:
+        tx.hash  # Hash outside the timed loop, as on arrival from the network
+
+    start = time.perf_counter()
+    for tx in spam:
+        pool.add(tx)
+    elapsed = time.perf_counter() - start
+    print(f"{len(spam) / elapsed:.0f} adds/s into a pool capped at {pool.max_size}: {pool.metrics()}")
+
+    start = time.perf_counter()
+    best = list(itertools.islice(pool.pending(), 30_000))
+    print(f"Best {len(best)} executable txs in {(time.perf_counter() - start) * 1000:.1f} ms")
+    pool.remove_included(best)
+    print(f"After the block: {pool.metrics()}")
+
+    def transfer(creator: str, nonce: int, fee: int) -> Transaction:
+        return Transaction(v=0, fee=str(fee), creator=creator, sig="", tx_type="transfer", sig_type="D", nonce=nonce)
+
+    small = Mempool(max_size=2)
+    small.add(transfer("a", 0, 10))
+    small.add(transfer("b", 0, 10))
+    small.add(transfer("a", 1, 1000))  # Must evict b#0, not the a#0 it builds on
+    print(f"Executable after a full-pool add: {[(tx.creator, tx.nonce) for tx in small.pending()]}")
+    small.remove_included([transfer("a", 0, 10), transfer("a", 1, 1000)])
+    print(f"Replayed a#1 after its block rejected: {not small.add(transfer('a', 1, 2000))}")
@@ -2,7 +2,7 @@ import os
 import json
 
 import global_vars
-from structures.threads_metadata_handlers import (
+from structures.metadata_handlers import (
     GenerationThreadMetadataHandler,
     ApprovementThreadMetadataHandler
 )
@@ -0,0 +1,214 @@
+import base64
+import binascii
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import AbstractSet, Dict, FrozenSet, List, Optional, Tuple
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+
+# Public keys are base58 (Bitcoin alphabet) of the raw 32 bytes, as PUBLIC_KEY in configs.toml;
+# signatures are base64 of the raw 64 bytes
+_BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_BASE58_DIGITS = {char: digit for digit, char in enumerate(_BASE58_ALPHABET)}
+
+
+def base58_encode(data: bytes) -> str:
+    number = int.from_bytes(data, "big")
+    chars = []
+    while number:
+        number, digit = divmod(number, 58)
+        chars.append(_BASE58_ALPHABET[digit])
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + "".join(reversed(chars))
+
+
+def base58_decode(text: str) -> bytes:
+    """
+    Raises:
+        ValueError: on a character outside the base58 alphabet
+    """
+    number = 0
+    for char in text:
+        digit = _BASE58_DIGITS.get(char)
+        if digit is None:
+            raise ValueError(f"Invalid base58 character {char!r}")
+        number = number * 58 + digit
+    return b"\0" * (len(text) - len(text.lstrip("1"))) + number.to_bytes((number.bit_length() + 7) // 8, "big")
+
+
+@lru_cache(maxsize=4096)
+def _public_key(public_key: str) -> Ed25519PublicKey:
+    """Parsed quorum member key; the same members sign every proof of an epoch."""
+    return Ed25519PublicKey.from_public_bytes(base58_decode(public_key))
+
+
+def verify_signature(public_key: str, message: bytes, signature: str) -> bool:
+    """Verify a base64 Ed25519 signature by a base58 public key. Malformed input counts as invalid."""
+    try:
+        _public_key(public_key).verify(base64.b64decode(signature, validate=True), message)
+        return True
+    except (InvalidSignature, ValueError, binascii.Error):
+        return False
+
+
+def proof_hash(message: str, signatures: Dict[str, str]) -> str:
+    """Identity of a signed proof: its signed data and its sorted signer/signature pairs."""
+    digest = hashlib.sha256(message.encode("utf-8"))
+    for signer in sorted(signatures):
+        digest.update(f"|{signer}:{signatures[signer]}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _verify_chunk(message: bytes, chunk: List[Tuple[str, str]], stop: threading.Event) -> Tuple[int, int]:
+    """(valid, checked) for a chunk, giving up early once 'stop' is set."""
+    valid = checked = 0
+    for signer, signature in chunk:
+        if stop.is_set():
+            break
+        valid += verify_signature(signer, message, signature)
+        checked += 1
+    return valid, checked
+
+
+class QuorumSignatureVerifier:
+    """
+    Checks that an aggregated proof carries a majority of valid quorum signatures.
+
+    Signers outside the quorum are dropped with a set lookup before any
+    signature is checked. The remaining signatures are verified in chunks on a
+    thread pool, and verification stops as soon as 'majority' valid signatures
+    are confirmed, or as soon as the unchecked ones can no longer make up the
+    difference. Proofs that passed are remembered by proof_hash, together
+    with the quorum and majority they passed against, in a bounded LRU, so
+    the same AFP/AEFP arriving again costs one hash.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = 16, cache_size: int = 10_000):
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1,
+                                        thread_name_prefix="proof-verifier")
+        self._verified: "OrderedDict[Tuple[str, int, FrozenSet[str]], None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.cache_hits = 0
+        self.signatures_checked = 0
+
+    def _remember(self, key: Tuple[str, int, FrozenSet[str]]) -> None:
+        with self._lock:
+            self._verified[key] = None
+            self._verified.move_to_end(key)
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+
+    def verify(self, message: str, signatures: Dict[str, str], quorum: AbstractSet[str], majority: int) -> bool:
+        """
+        Args:
+            message: The data every signer signed.
+            signatures: Signer public key (base58) -> signature (base64).
+            quorum: The epoch's quorum members in lower case (see work_with_proofs.quorum_set);
+                signers are matched case-insensitively and counted once each.
+            majority: Valid quorum signatures required (utils.calc_quorum_majority).
+
+        An empty quorum or a non-positive majority never verifies anything.
+        """
+        if majority <= 0 or not quorum:
+            return False
+        # A frozenset caches its hash, so the per-epoch quorum set adds nothing to a cache hit
+        members = quorum if isinstance(quorum, frozenset) else frozenset(quorum)
+        key = (proof_hash(message, signatures), majority, members)
+        with self._lock:
+            if key in self._verified:
+                self._verified.move_to_end(key)
+                self.cache_hits += 1
+                return True
+
+        candidates = []
+        counted = set()
+        for signer, signature in signatures.items():
+            member = signer.lower()
+            if member in quorum and member not in counted:
+                counted.add(member)
+                candidates.append((signer, signature))
+        if len(candidates) < majority:
+            return False
+        data = message.encode("utf-8")
+
+        stop = threading.Event()
+        if len(candidates) <= self.chunk_size:
+            valid, unchecked = 0, len(candidates)
+            for signer, signature in candidates:
+                valid += verify_signature(signer, data, signature)
+                unchecked -= 1
+                if valid >= majority or valid + unchecked < majority:
+                    break
+            self.signatures_checked += len(candidates) - unchecked
+        else:
+            chunks = [candidates[i:i + self.chunk_size] for i in range(0, len(candidates), self.chunk_size)]
+            pending = {self._pool.submit(_verify_chunk, data, chunk, stop): len(chunk) for chunk in chunks}
+            valid, unchecked = 0, len(candidates)
+            while pending and majority > valid >= majority - unchecked:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk_size = pending.pop(future)
+                    chunk_valid, checked = future.result()
+                    valid += chunk_valid
+                    unchecked -= chunk_size  # Unchecked leftovers of a stopped chunk cannot be counted on
+                    self.signatures_checked += checked
+            stop.set()
+            for future in pending:
+                future.cancel()
+
+        if valid >= majority:
+            self._remember(key)
+            return True
+        return False
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    import time
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    members = [Ed25519PrivateKey.generate() for _ in range(127)]
+    public_keys = [base58_encode(key.public_key().public_bytes(serialization.Encoding.Raw,
+                                                               serialization.PublicFormat.Raw)) for key in members]
+    quorum = {public_key.lower() for public_key in public_keys}
+    message = "prev" + "0:validator:42" + "ab" * 32 + "epoch#7"
+    signatures = {public_key: base64.b64encode(key.sign(message.encode())).decode()
+                  for public_key, key in zip(public_keys, members)}
+    signatures[base58_encode(b"\1" * 32)] = base64.b64encode(b"\2" * 64).decode()  # Not a quorum member: never checked
+    majority = 2 * 127 // 3 + 1
+
+    verifier = QuorumSignatureVerifier()
+    start = time.perf_counter()
+    for signer, signature in signatures.items():
+        verify_signature(signer, message.encode(), signature)
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first = verifier.verify(message, signatures, quorum, majority)
+    fresh = time.perf_counter() - start
+    start = time.perf_counter()
+    verifier.verify(message, signatures, quorum, majority)
+    cached = time.perf_counter() - start
+    print(f"Checking all {len(signatures)} signatures: {serial * 1000:.1f} ms; majority of {majority}: "
+          f"{fresh * 1000:.1f} ms ({verifier.signatures_checked} checked, valid={first}), cached: {cached * 1000:.3f} ms")
+
+    forged = dict(signatures)
+    for signer in list(forged)[:50]:
+        forged[signer] = base64.b64encode(b"\3" * 64).decode()
+    start = time.perf_counter()
+    rejected = not verifier.verify(message, forged, quorum, majority)
+    print(f"50 forged signatures rejected: {rejected} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"Empty quorum or zero majority rejected: {not verifier.verify(message, signatures, set(), majority)}, "
+          f"{not verifier.verify(message, signatures, quorum, 0)}")
+    verifier.close()
@@ -1,11 +1,12 @@
 import json
 import hashlib
+import struct
 import time
-from dataclasses import dataclass
-from typing import Dict, List
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
-from proofs import AggregatedLeaderRotationProof, AggregatedEpochFinalizationProof
-from transaction import Transaction
+from structures.proofs import EpochFinalizationProof, LeaderRotationProof
+from structures.transactions import Transaction
 
 
 def utc_millis() -> int:
@@ -35,4 +36,325 @@ class DeferredTransactions:
 class BlockExtra:
     """Holds auxiliary data attached to a block."""
     metadata: Dict[str, str]
-    prev_epoch_finalization: A
+    prev_epoch_finalization: Optional[EpochFinalizationProof] = None
+    leader_rotation_proofs: Dict[str, LeaderRotationProof] = field(default_factory=dict)
+
+    def encode(self) -> bytes:
+        """Compact JSON with sorted keys; the block header commits to its hash."""
+        return json.dumps(asdict(self), sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    @classmethod
+    def decode(cls, data: Union[bytes, memoryview]) -> "BlockExtra":
+        raw = json.loads(bytes(data))
+        finalization = raw.get("prev_epoch_finalization")
+        return cls(
+            metadata=raw.get("metadata", {}),
+            prev_epoch_finalization=EpochFinalizationProof(**finalization) if finalization else None,
+            leader_rotation_proofs={pool: LeaderRotationProof(**proof)
+                                    for pool, proof in raw.get("leader_rotation_proofs", {}).items()}
+        )
+
+
+# ----------------- Merkle tree -----------------
+# Leaves are transaction hashes; inner nodes are SHA-256(0x01 | left | right).
+# An odd node at the end of a level is carried up unchanged, so no two
+# different transaction lists share a root.
+_NODE_PREFIX = b"\x01"
+EMPTY_TXS_ROOT = hashlib.sha256(b"").digest()
+
+
+def merkle_root(leaves: List[bytes]) -> bytes:
+    """Root over 32-byte leaf digests."""
+    if not leaves:
+        return EMPTY_TXS_ROOT
+    level = leaves
+    sha256 = hashlib.sha256
+    while len(level) > 1:
+        following = [sha256(_NODE_PREFIX + level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            following.append(level[-1])
+        level = following
+    return level[0]
+
+
+def merkle_proof(leaves: List[bytes], index: int) -> List[Tuple[bool, bytes]]:
+    """
+    Sibling path for leaves[index], bottom-up. Each step is (sibling_is_left,
+    sibling); levels where the node is carried up have no step.
+    """
+    if not 0 <= index < len(leaves):
+        raise IndexError(f"Leaf {index} out of range for {len(leaves)} leaves")
+    path: List[Tuple[bool, bytes]] = []
+    level = leaves
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append((sibling < index, level[sibling]))
+        level = [hashlib.sha256(_NODE_PREFIX + level[i] + level[i + 1]).digest() if i + 1 < len(level) else level[i]
+                 for i in range(0, len(level), 2)]
+        index //= 2
+    return path
+
+
+def verify_merkle_proof(leaf: bytes, path: List[Tuple[bool, bytes]], root: bytes) -> bool:
+    """Check that 'leaf' is committed to by 'root' through 'path'."""
+    node = leaf
+    for sibling_is_left, sibling in path:
+        node = hashlib.sha256(_NODE_PREFIX + (sibling + node if sibling_is_left else node + sibling)).digest()
+    return node == root
+
+
+# ----------------- Header -----------------
+BLOCK_FORMAT_VERSION = 1
+
+# version u8 | time u64 | index u64 | tx_count u32 | txs_root 32 | extra_hash 32,
+# then creator, epoch and prev_hash as u16 length + UTF-8
+_HEADER_FIXED = struct.Struct(">BQQI32s32s")
+_U16 = struct.Struct(">H")
+_U32 = struct.Struct(">I")
+
+
+@dataclass(frozen=True)
+class BlockHeader:
+    """Everything the block hash covers; transactions enter only through txs_root."""
+    creator: str
+    time: int
+    epoch: str
+    index: int
+    prev_hash: str
+    tx_count: int
+    txs_root: bytes
+    extra_hash: bytes
+
+    def encode(self) -> bytes:
+        parts = [_HEADER_FIXED.pack(BLOCK_FORMAT_VERSION, self.time, self.index, self.tx_count,
+                                    self.txs_root, self.extra_hash)]
+        for text in (self.creator, self.epoch, self.prev_hash):
+            raw = text.encode("utf-8")
+            parts += (_U16.pack(len(raw)), raw)
+        return b"".join(parts)
+
+    @classmethod
+    def decode(cls, data: Union[bytes, memoryview]) -> "BlockHeader":
+        """
+        Raises:
+            ValueError: on an unknown format version or malformed header
+        """
+        view = memoryview(data)
+        try:
+            version, created, index, tx_count, txs_root, extra_hash = _HEADER_FIXED.unpack_from(view, 0)
+            if version != BLOCK_FORMAT_VERSION:
+                raise ValueError(f"Unsupported block format version {version}")
+            offset = _HEADER_FIXED.size
+            texts = []
+            for _ in range(3):
+                (length,) = _U16.unpack_from(view, offset)
+                offset += _U16.size
+                if offset + length > len(view):
+                    raise ValueError("Header field runs past the end of the header")
+                texts.append(str(view[offset:offset + length], "utf-8"))
+                offset += length
+        except (struct.error, UnicodeDecodeError) as e:
+            raise ValueError(f"Malformed block header: {e}") from e
+        creator, epoch, prev_hash = texts
+        return cls(creator, created, epoch, index, prev_hash, tx_count, txs_root, extra_hash)
+
+    def hash(self) -> str:
+        return hashlib.sha256(self.encode()).hexdigest()
+
+
+# ----------------- Block -----------------
+@dataclass
+class Block:
+    """
+    A block and its binary codec.
+
+    The block hash is the SHA-256 of the encoded header alone, and the header
+    commits to the transactions through their Merkle root. Hashing a block
+    therefore never re-serializes its transactions: they contribute their
+    cached hashes. Treat 'transactions' as fixed once the block is built,
+    because the root is computed once and kept.
+    """
+    creator: str
+    time: int
+    epoch: str
+    transactions: List[Transaction]
+    extra_data: BlockExtra
+    index: int
+    prev_hash: str
+    sig: str = ""
+    _txs_root: Optional[bytes] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def txs_root(self) -> bytes:
+        if self._txs_root is None:
+            self._txs_root = merkle_root([bytes.fromhex(tx.hash) for tx in self.transactions])
+        return self._txs_root
+
+    def header(self) -> BlockHeader:
+        return BlockHeader(self.creator, self.time, self.epoch, self.index, self.prev_hash, len(self.transactions),
+                           self.txs_root, hashlib.sha256(self.extra_data.encode()).digest())
+
+    def hash(self) -> str:
+        return self.header().hash()
+
+    def sign(self, priv_key: str) -> None:
+        self.sig = sign_message(priv_key, self.hash())
+
+    def verify_signature(self) -> bool:
+        return check_signature(self.hash(), self.creator, self.sig)
+
+    def transaction_proof(self, position: int) -> List[Tuple[bool, bytes]]:
+        """Merkle path proving transactions[position] against the header's txs_root."""
+        return merkle_proof([bytes.fromhex(tx.hash) for tx in self.transactions], position)
+
+
+# ----------------- Block codec -----------------
+# header_len u32 | header | extra_len u32 | extra | sig_len u16 | sig |
+# tx_count x (tx_len u32 | tx), with tx_count taken from the header
+def iter_block_chunks(block: Block) -> Iterator[bytes]:
+    """Yield the encoded block piece by piece, one transaction at a time."""
+    header = block.header().encode()
+    extra = block.extra_data.encode()
+    sig = block.sig.encode("utf-8")
+    yield b"".join((_U32.pack(len(header)), header, _U32.pack(len(extra)), extra, _U16.pack(len(sig)), sig))
+    for tx in block.transactions:
+        encoded = tx.encode()
+        yield _U32.pack(len(encoded)) + encoded
+
+
+def write_block(block: Block, write: Callable[[bytes], Any]) -> int:
+    """Stream an encoded block to 'write' (e.g. a file's or socket's write) and return the bytes written."""
+    written = 0
+    for chunk in iter_block_chunks(block):
+        write(chunk)
+        written += len(chunk)
+    return written
+
+
+def encode_block(block: Block) -> bytes:
+    return b"".join(iter_block_chunks(block))
+
+
+def _block_from_parts(header: BlockHeader, extra_raw: Union[bytes, memoryview], sig: str,
+                      txs: List[Transaction]) -> Block:
+    if hashlib.sha256(extra_raw).digest() != header.extra_hash:
+        raise ValueError("Block extra data does not match the header")
+    block = Block(header.creator, header.time, header.epoch, txs, BlockExtra.decode(extra_raw),
+                  header.index, header.prev_hash, sig)
+    if block.txs_root != header.txs_root:
+        raise ValueError("Block transactions do not match the header's Merkle root")
+    return block
+
+
+def decode_block_header(data: Union[bytes, bytearray, memoryview]) -> BlockHeader:
+    """Decode only the header at the start of an encoded block."""
+    view = memoryview(data)
+    (length,) = _U32.unpack_from(view, 0)
+    return BlockHeader.decode(view[_U32.size:_U32.size + length])
+
+
+def decode_block(data: Union[bytes, bytearray, memoryview]) -> Block:
+    """
+    Decode a full block from one buffer. Transactions are decoded in place from
+    a memoryview, and the result is checked against the header's commitments.
+
+    Raises:
+        ValueError: if the encoding is malformed or does not match its header
+    """
+    view = memoryview(data)
+    try:
+        offset = 0
+        (length,) = _U32.unpack_from(view, offset)
+        header = BlockHeader.decode(view[offset + 4:offset + 4 + length])
+        offset += 4 + length
+        (length,) = _U32.unpack_from(view, offset)
+        extra_raw = view[offset + 4:offset + 4 + length]
+        offset += 4 + length
+        (length,) = _U16.unpack_from(view, offset)
+        sig = str(view[offset + 2:offset + 2 + length], "utf-8")
+        offset += 2 + length
+
+        txs: List[Transaction] = []
+        for _ in range(header.tx_count):
+            (length,) = _U32.unpack_from(view, offset)
+            tx, end = Transaction.decode(view[:offset + 4 + length], offset + 4)
+            if end != offset + 4 + length:
+                raise ValueError(f"Transaction length mismatch at offset {offset}")
+            txs.append(tx)
+            offset = end
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed block: {e}") from e
+    if offset != len(view):
+        raise ValueError(f"{len(view) - offset} trailing bytes after block")
+    return _block_from_parts(header, extra_raw, sig, txs)
+
+
+def _read_exact(read: Callable[[int], bytes], size: int) -> bytes:
+    data = read(size)
+    while len(data) < size:
+        chunk = read(size - len(data))
+        if not chunk:
+            raise ValueError(f"Block stream ended {size - len(data)} bytes early")
+        data += chunk
+    return data
+
+
+def read_block(read: Callable[[int], bytes]) -> Block:
+    """
+    Decode a block from a stream ('read' as on a file or a buffered socket),
+    pulling one transaction at a time instead of the whole block.
+
+    Raises:
+        ValueError: if the stream ends early or does not match its header
+    """
+    (length,) = _U32.unpack(_read_exact(read, 4))
+    header = BlockHeader.decode(_read_exact(read, length))
+    (length,) = _U32.unpack(_read_exact(read, 4))
+    extra_raw = _read_exact(read, length)
+    (length,) = _U16.unpack(_read_exact(read, 2))
+    sig = _read_exact(read, length).decode("utf-8")
+
+    txs: List[Transaction] = []
+    for _ in range(header.tx_count):
+        (length,) = _U32.unpack(_read_exact(read, 4))
+        txs.append(Transaction.from_bytes(_read_exact(read, length)))
+    return _block_from_parts(header, extra_raw, sig, txs)
+
+
+if __name__ == "__main__":
+    import io
+
+    txs = [Transaction(0, str(10 ** 15 + i), f"creator{i % 5000}", "ab" * 32, "transfer", "D", i,
+                       {"to": f"recipient{i}", "amount": str(i * 1000)}) for i in range(30_000)]
+    block = Block("9GQ46rqY238rk2neSwgidap9ww5zbAN4dyqyC7j5ZnBK", utc_millis(), "epoch#0", txs,
+                  BlockExtra({"hello": "world"}), 0, "0" * 64)
+
+    start = time.perf_counter()
+    block_hash = block.hash()
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    block.hash()
+    again = time.perf_counter() - start
+    as_json = time.perf_counter()
+    hashlib.sha256(json.dumps([{"creator": tx.creator, "fee": tx.fee, "nonce": tx.nonce, "payload": tx.payload,
+                                "sig": tx.sig, "tx_type": tx.tx_type, "sig_type": tx.sig_type, "v": tx.v}
+                               for tx in txs]).encode()).hexdigest()
+    as_json = time.perf_counter() - as_json
+    print(f"Block hash: {first * 1000:.1f} ms with the Merkle root, {again * 1000:.2f} ms after; "
+          f"hashing the txs as JSON: {as_json * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    encoded = encode_block(block)
+    encoded_in = time.perf_counter() - start
+    start = time.perf_counter()
+    decoded = decode_block(encoded)
+    decoded_in = time.perf_counter() - start
+    streamed = read_block(io.BytesIO(encoded).read)
+    print(f"{len(encoded)} bytes: encode {encoded_in * 1000:.0f} ms, decode {decoded_in * 1000:.0f} ms, "
+          f"round trip ok: {decoded.hash() == streamed.hash() == block_hash}")
+
+    header = decode_block_header(encoded)
+    proof = block.transaction_proof(12_345)
+    print(f"Header only: {header.hash() == block_hash}, tx 12345 proven with {len(proof)} siblings: "
+          f"{verify_merkle_proof(bytes.fromhex(txs[12_345].hash), proof, header.txs_root)}")
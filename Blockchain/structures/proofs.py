@@ -9,6 +9,10 @@ class FinalizationProof:
     block_hash: str
     signatures: Dict[str, str]
 
+    def signed_data(self, epoch_full_id: str) -> str:
+        """The string every quorum member signs."""
+        return self.prev_hash + self.block_id + self.block_hash + epoch_full_id
+
 
 @dataclass
 class EpochFinalizationProof:
@@ -19,6 +23,11 @@ class EpochFinalizationProof:
     first_block_hash_by_last_leader: str
     signatures: Dict[str, str]
 
+    def signed_data(self, epoch_full_id: str) -> str:
+        """The string every quorum member signs."""
+        return (f"EPOCH_DONE:{self.last_leader_index}:{self.last_block_index}:{self.last_block_hash}:"
+                f"{self.first_block_hash_by_last_leader}:{epoch_full_id}")
+
 
 @dataclass
 class LeaderRotationProof:
@@ -28,6 +37,11 @@ class LeaderRotationProof:
     skip_hash: str
     signatures: Dict[str, str]
 
+    def signed_data(self, leader_pub_key: str, epoch_full_id: str) -> str:
+        """The string every quorum member signs; it names the skipped leader, so a proof cannot be reused for another."""
+        return (f"LEADER_ROTATION_PROOF:{leader_pub_key}:{self.first_block_hash}:{self.skip_index}:"
+                f"{self.skip_hash}:{epoch_full_id}")
+
 
 @dataclass
 class VotingStat:
@@ -51,4 +65,4 @@ class AlrpTemplate:
     """Skeleton structure for ALRP data."""
     afp_for_first_block: FinalizationProof = field(default_factory=lambda: FinalizationProof("", "", "", {}))
     skip_data: VotingStat = field(default_factory=new_voting_stat)
-    signatures: Dict[str, str] = field
+    signatures: Dict[str, str] = field(default_factory=dict)
@@ -1,14 +1,248 @@
-from dataclasses import dataclass, field
-from typing import Any, Dict
+import hashlib
+import json
+import struct
+from typing import Any, Dict, Optional, Tuple, Union
+
+# Canonical encoding, all integers big-endian:
+#   v u32 | nonce u64 | fee: u8 length + unsigned magnitude
+#   creator, sig: u16 length + UTF-8 | tx_type, sig_type: u8 length + UTF-8
+#   payload: u32 length + compact JSON with sorted keys
+_FIXED = struct.Struct(">IQ")
+_U8 = struct.Struct(">B")
+_U16 = struct.Struct(">H")
+_U32 = struct.Struct(">I")
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def canonical_payload(payload: Dict[str, Any]) -> bytes:
+    """The one byte form of a payload: compact JSON with sorted keys."""
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
 
-@dataclass
 class Transaction:
-    """Represents a single transaction in the blockchain."""
-    v: int
-    fee: str
-    creator: str
-    sig: str
-    tx_type: str
-    sig_type: str
-    nonce: int
-    payload: Dict[str, Any] = field(default_factory=dict)
+    """
+    Represents a single transaction in the blockchain.
+
+    Instances are immutable and slotted. The payload is kept as its canonical
+    JSON bytes and parsed on access, so a pooled transaction costs a few
+    strings and one bytes object instead of a dict tree. The encoding's
+    length and SHA-256 hash are computed on first use and cached.
+    """
+    __slots__ = ("v", "fee", "creator", "sig", "tx_type", "sig_type", "nonce", "_payload", "_hash", "_size")
+
+    def __init__(self, v: int, fee: str, creator: str, sig: str, tx_type: str, sig_type: str, nonce: int,
+                 payload: Optional[Dict[str, Any]] = None):
+        fee_value = int(fee)
+        if fee_value < 0:
+            raise ValueError(f"Transaction fee must be non-negative, got {fee}")
+        _set = object.__setattr__
+        _set(self, "v", v)
+        _set(self, "fee", str(fee_value))
+        _set(self, "creator", creator)
+        _set(self, "sig", sig)
+        _set(self, "tx_type", tx_type)
+        _set(self, "sig_type", sig_type)
+        _set(self, "nonce", nonce)
+        _set(self, "_payload", canonical_payload(payload or {}))
+        _set(self, "_hash", None)
+        _set(self, "_size", None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"Transaction is immutable, cannot set {name!r}")
+
+    __delattr__ = __setattr__
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        """A fresh dict parsed from the stored payload bytes."""
+        return json.loads(self._payload)
+
+    # ----------------- Encoding -----------------
+    def encode(self) -> bytes:
+        """Canonical binary encoding; equal transactions always encode to the same bytes."""
+        fee = int(self.fee)
+        fee_bytes = fee.to_bytes((fee.bit_length() + 7) // 8, "big")
+        creator = self.creator.encode("utf-8")
+        sig = self.sig.encode("utf-8")
+        tx_type = self.tx_type.encode("utf-8")
+        sig_type = self.sig_type.encode("utf-8")
+        return b"".join((
+            _FIXED.pack(self.v, self.nonce),
+            _U8.pack(len(fee_bytes)), fee_bytes,
+            _U16.pack(len(creator)), creator,
+            _U16.pack(len(sig)), sig,
+            _U8.pack(len(tx_type)), tx_type,
+            _U8.pack(len(sig_type)), sig_type,
+            _U32.pack(len(self._payload)), self._payload
+        ))
+
+    @classmethod
+    def decode(cls, buffer: Buffer, offset: int = 0) -> Tuple["Transaction", int]:
+        """
+        Decode one transaction starting at 'offset' and return it with the
+        offset just past it. Fields are read straight out of the buffer
+        through a memoryview, and the hash is taken from the same span instead
+        of re-encoding. Only the canonical encoding is accepted: a fee with
+        leading zero bytes or a payload that is not compact sorted JSON would
+        give the same transaction a second hash.
+
+        Raises:
+            ValueError: if the buffer is truncated, a field is malformed or the encoding is not canonical
+        """
+        view = memoryview(buffer)
+        try:
+            start = offset
+            v, nonce = _FIXED.unpack_from(view, offset)
+            offset += _FIXED.size
+            fee_length = view[offset]
+            if fee_length and view[offset + 1] == 0:
+                raise ValueError(f"Non-minimal fee encoding at offset {start}")
+            fee = int.from_bytes(view[offset + 1:offset + 1 + fee_length], "big")
+            offset += 1 + fee_length
+            creator, offset = _read_str(view, offset, _U16)
+            sig, offset = _read_str(view, offset, _U16)
+            tx_type, offset = _read_str(view, offset, _U8)
+            sig_type, offset = _read_str(view, offset, _U8)
+            (payload_length,) = _U32.unpack_from(view, offset)
+            offset += _U32.size
+            payload = view[offset:offset + payload_length].tobytes()
+            offset += payload_length
+        except (struct.error, IndexError, UnicodeDecodeError) as e:
+            raise ValueError(f"Malformed transaction at offset {start}: {e}") from e
+        if offset > len(view) or len(payload) != payload_length:
+            raise ValueError(f"Truncated transaction at offset {start}")
+        try:
+            parsed = json.loads(payload)
+        except ValueError as e:  # Includes UnicodeDecodeError
+            raise ValueError(f"Malformed payload at offset {start}: {e}") from e
+        if not isinstance(parsed, dict) or canonical_payload(parsed) != payload:
+            raise ValueError(f"Non-canonical payload at offset {start}")
+
+        tx = cls.__new__(cls)
+        _set = object.__setattr__
+        _set(tx, "v", v)
+        _set(tx, "fee", str(fee))
+        _set(tx, "creator", creator)
+        _set(tx, "sig", sig)
+        _set(tx, "tx_type", tx_type)
+        _set(tx, "sig_type", sig_type)
+        _set(tx, "nonce", nonce)
+        _set(tx, "_payload", payload)
+        _set(tx, "_hash", hashlib.sha256(view[start:offset]).hexdigest())
+        _set(tx, "_size", offset - start)
+        return tx, offset
+
+    @classmethod
+    def from_bytes(cls, data: Buffer) -> "Transaction":
+        tx, end = cls.decode(data)
+        if end != len(data):
+            raise ValueError(f"{len(data) - end} trailing bytes after transaction")
+        return tx
+
+    # ----------------- Cached identity -----------------
+    def _fill_cache(self) -> None:
+        encoded = self.encode()
+        object.__setattr__(self, "_hash", hashlib.sha256(encoded).hexdigest())
+        object.__setattr__(self, "_size", len(encoded))
+
+    @property
+    def hash(self) -> str:
+        """SHA-256 hex digest of the canonical encoding, computed once."""
+        if self._hash is None:
+            self._fill_cache()
+        return self._hash
+
+    @property
+    def size(self) -> int:
+        """Length of the canonical encoding in bytes, computed once."""
+        if self._size is None:
+            self._fill_cache()
+        return self._size
+
+    # ----------------- Object protocol -----------------
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Transaction):
+            return NotImplemented
+        return self.hash == other.hash
+
+    def __hash__(self) -> int:
+        return hash(self.hash)
+
+    def __repr__(self) -> str:
+        return (f"Transaction(v={self.v!r}, fee={self.fee!r}, creator={self.creator!r}, sig={self.sig!r}, "
+                f"tx_type={self.tx_type!r}, sig_type={self.sig_type!r}, nonce={self.nonce!r}, payload={self.payload!r})")
+
+    def __reduce__(self):
+        return Transaction.from_bytes, (self.encode(),)
+
+
+def _read_str(view: memoryview, offset: int, length_format: struct.Struct) -> Tuple[str, int]:
+    (length,) = length_format.unpack_from(view, offset)
+    offset += length_format.size
+    end = offset + length
+    if end > len(view):
+        raise IndexError("string runs past the end of the buffer")
+    return str(view[offset:end], "utf-8"), end
+
+
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+    from dataclasses import dataclass, field
+
+    @dataclass
+    class DictTransaction:
+        """The previous plain dataclass, for comparison."""
+        v: int
+        fee: str
+        creator: str
+        sig: str
+        tx_type: str
+        sig_type: str
+        nonce: int
+        payload: Dict[str, Any] = field(default_factory=dict)
+
+    def build(cls, count: int) -> list:
+        return [cls(0, str(10 ** 15 + i), f"creator{i % 5000}", "ab" * 32, "transfer", "D", i,
+                    {"to": f"recipient{i}", "amount": str(i * 1000), "memo": ""}) for i in range(count)]
+
+    count = 300_000
+    for cls in (DictTransaction, Transaction):
+        tracemalloc.start()
+        txs = build(cls, count)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{cls.__name__:<16} {used / count:.0f} bytes per tx, {used / 2 ** 20:.0f} MiB for {count}")
+        del txs
+
+    txs = build(Transaction, count)
+    start = time.perf_counter()
+    hashes = [tx.hash for tx in txs]
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    hashes = [tx.hash for tx in txs]
+    cached = time.perf_counter() - start
+    print(f"Hashing {count}: {first * 1000:.0f} ms first time, {cached * 1000:.1f} ms cached")
+
+    block = b"".join(tx.encode() for tx in txs[:30_000])
+    start = time.perf_counter()
+    offset, decoded = 0, []
+    while offset < len(block):
+        tx, offset = Transaction.decode(block, offset)
+        decoded.append(tx)
+    print(f"Decoded 30000 txs ({len(block)} bytes) in {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"hashes match: {[tx.hash for tx in decoded] == hashes[:30_000]}")
+
+    # Re-encodings of the same transaction must not decode to a second hash
+    encoded = txs[0].encode()
+    fee_at = _FIXED.size
+    padded_fee = encoded[:fee_at] + bytes([encoded[fee_at] + 1, 0]) + encoded[fee_at + 1:]
+    spaced = json.dumps(txs[0].payload).encode("utf-8")
+    spaced_payload = encoded[:-len(txs[0]._payload) - _U32.size] + _U32.pack(len(spaced)) + spaced
+    for name, variant in (("zero-padded fee", padded_fee), ("non-canonical payload", spaced_payload)):
+        try:
+            Transaction.decode(variant)
+            print(f"{name}: accepted (BUG)")
+        except ValueError as e:
+            print(f"{name}: rejected ({e})")
@@ -0,0 +1,98 @@
+"""
+Assertion tests for the block codec and the transaction Merkle tree.
+
+    python -m pytest Blockchain/tests/block_codec_test.py
+"""
+
+import hashlib
+import io
+import os
+import struct
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from structures.block import (Block, BlockExtra, decode_block, decode_block_header, encode_block, merkle_root,
+                              read_block, verify_merkle_proof)
+from structures.transactions import Transaction
+
+
+def make_block(tx_count: int = 5, metadata=None) -> Block:
+    txs = [Transaction(0, str(1000 + i), f"creator{i}", "ab" * 32, "transfer", "D", i, {"to": f"r{i}"})
+           for i in range(tx_count)]
+    return Block("pool", 1_700_000_000_000, "ee" * 32 + "#3", txs, BlockExtra(metadata or {"k": "v"}), 4, "00" * 32)
+
+
+def test_round_trip_from_buffer_and_stream():
+    block = make_block()
+    encoded = encode_block(block)
+    for decoded in (decode_block(encoded), read_block(io.BytesIO(encoded).read)):
+        assert decoded.hash() == block.hash()
+        assert [tx.hash for tx in decoded.transactions] == [tx.hash for tx in block.transactions]
+        assert decoded.extra_data == block.extra_data
+    assert decode_block_header(encoded).hash() == block.hash()
+
+
+def test_empty_block_round_trips():
+    block = make_block(0)
+    assert decode_block(encode_block(block)).hash() == block.hash()
+
+
+def test_hash_commits_to_transactions_and_extra_data():
+    block = make_block()
+    assert make_block(metadata={"k": "other"}).hash() != block.hash()
+    reordered = make_block()
+    reordered.transactions = reordered.transactions[::-1]
+    assert reordered.hash() != block.hash()
+
+
+def test_merkle_proofs_verify_every_transaction():
+    block = make_block(7)
+    for position, tx in enumerate(block.transactions):
+        assert verify_merkle_proof(bytes.fromhex(tx.hash), block.transaction_proof(position), block.txs_root)
+    assert not verify_merkle_proof(bytes.fromhex(block.transactions[0].hash), block.transaction_proof(1),
+                                   block.txs_root)
+
+
+def test_odd_leaf_is_not_duplicated():
+    leaves = [hashlib.sha256(bytes([i])).digest() for i in range(3)]
+    assert merkle_root(leaves) != merkle_root(leaves + leaves[-1:])
+
+
+def test_decode_rejects_tampered_extra_data():
+    encoded = bytearray(encode_block(make_block()))
+    (header_length,) = struct.unpack_from(">I", encoded, 0)
+    extra_start = 4 + header_length + 4
+    encoded[extra_start + 2] ^= 0x01
+    with pytest.raises(ValueError):
+        decode_block(bytes(encoded))
+
+
+def test_decode_rejects_swapped_transactions():
+    block = make_block()
+    encoded = encode_block(block)
+    swapped = make_block()
+    swapped.transactions[0], swapped.transactions[1] = swapped.transactions[1], swapped.transactions[0]
+    body = encode_block(swapped)
+    header_part = len(encoded) - sum(tx.size + 4 for tx in block.transactions)
+    with pytest.raises(ValueError, match="Merkle root"):
+        decode_block(encoded[:header_part] + body[header_part:])
+
+
+def test_decode_rejects_truncation_and_trailing_bytes():
+    encoded = encode_block(make_block())
+    with pytest.raises(ValueError):
+        decode_block(encoded[:-1])
+    with pytest.raises(ValueError, match="trailing"):
+        decode_block(encoded + b"\0")
+    with pytest.raises(ValueError):
+        read_block(io.BytesIO(encoded[:-1]).read)
+
+
+def test_decode_rejects_unknown_format_version():
+    encoded = bytearray(encode_block(make_block()))
+    encoded[4] ^= 0xFF  # First header byte is the format version
+    with pytest.raises(ValueError, match="version"):
+        decode_block(bytes(encoded))
@@ -0,0 +1,127 @@
+"""
+Assertion tests for BlockStore: lookups, recovery and damaged records.
+
+    python -m pytest Blockchain/tests/block_store_test.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import block_store
+from block_store import BlockStore, INDEX_SUFFIX, SEGMENT_SUFFIX
+from structures.block import Block, BlockExtra
+from structures.transactions import Transaction
+
+
+def make_block(index: int, creator: str = "pool") -> Block:
+    txs = [Transaction(0, "100", f"sender{index}", "ab" * 32, "transfer", "D", i, {"to": "bob"}) for i in range(20)]
+    return Block(creator, index, "ee" * 32 + "#2", txs, BlockExtra({}), index, f"{index - 1:064d}")
+
+
+def segment_files(directory: str, suffix: str = SEGMENT_SUFFIX):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(suffix))
+
+
+def test_lookups_by_id_hash_and_range(tmp_path):
+    store = BlockStore(str(tmp_path))
+    hashes = [store.put(make_block(i)) for i in range(5)]
+    assert store.get(2, "pool", 3).index == 3
+    assert store.get_by_hash(hashes[4]).index == 4
+    assert [block.index for block in store.get_range(2, "pool", 1, 4)] == [1, 2, 3]
+    assert store.last_index(2, "pool") == 4 and store.get(2, "pool", 5) is None
+    store.close()
+
+
+def test_same_block_is_idempotent_and_a_different_one_is_rejected(tmp_path):
+    store = BlockStore(str(tmp_path))
+    block = make_block(0)
+    assert store.put(block) == store.put(block)
+    assert len(store) == 1
+    other = Block("pool", 99, block.epoch, [], BlockExtra({}), 0, block.prev_hash)  # Same (epoch, creator, index)
+    with pytest.raises(ValueError):
+        store.put(other)
+    store.close()
+
+
+def test_reopen_uses_sealed_indexes_and_drops_a_torn_tail(tmp_path):
+    directory = str(tmp_path)
+    store = BlockStore(directory, segment_size=32 * 1024)
+    hashes = [store.put(make_block(i)) for i in range(40)]
+    store.close()
+    assert len(segment_files(directory)) > 1 and segment_files(directory, INDEX_SUFFIX)
+
+    active = segment_files(directory)[-1]
+    size = os.path.getsize(active)
+    with open(active, "ab") as segment:
+        segment.write(b"\x00\x00\x00\x01torn")
+
+    store = BlockStore(directory, segment_size=32 * 1024)
+    assert os.path.getsize(active) == size
+    assert len(store) == 40
+    assert [block.hash() for block in store.get_range(2, "pool", 0)] == hashes
+    store.put(make_block(40))
+    assert store.last_index(2, "pool") == 40
+    store.close()
+
+
+def test_corrupt_records_are_not_served(tmp_path):
+    store = BlockStore(str(tmp_path))
+    store.put(make_block(0))
+    segment_id, offset, _ = store._by_id[(2, "pool", 0)]
+    with open(store._path(segment_id), "r+b") as segment:
+        segment.seek(offset + 50)
+        byte = segment.read(1)[0]
+        segment.seek(offset + 50)
+        segment.write(bytes([byte ^ 0xFF]))
+    with pytest.raises(ValueError, match="corrupt"):
+        store.get_raw(2, "pool", 0)
+    store.close()
+
+
+def test_failed_write_leaves_no_partial_record(tmp_path, monkeypatch):
+    store = BlockStore(str(tmp_path))
+    store.put(make_block(0))
+    size = os.path.getsize(store._path(store._active_id))
+    real_write = os.write
+    calls = []
+
+    def short_then_fail(fd, data):
+        calls.append(1)
+        if len(calls) == 1:
+            return real_write(fd, bytes(data[:10]))
+        raise OSError("disk full")
+
+    monkeypatch.setattr(block_store.os, "write", short_then_fail)
+    with pytest.raises(OSError):
+        store.put(make_block(1))
+    monkeypatch.undo()
+
+    assert os.path.getsize(store._path(store._active_id)) == size
+    assert (2, "pool", 1) not in store
+    store.put(make_block(1))
+    assert store.get(2, "pool", 1).index == 1
+    store.close()
+
+
+def test_short_writes_are_completed(tmp_path, monkeypatch):
+    store = BlockStore(str(tmp_path))
+    real_write = os.write
+    monkeypatch.setattr(block_store.os, "write", lambda fd, data: real_write(fd, bytes(data[:100])))
+    block_hash = store.put(make_block(0))
+    monkeypatch.undo()
+    assert store.get(2, "pool", 0).hash() == block_hash
+    store.close()
+
+
+def test_reads_without_pread(tmp_path, monkeypatch):
+    from kv_log_engine import _seek_read
+    monkeypatch.setattr(block_store, "pread", _seek_read)  # As on Windows
+    store = BlockStore(str(tmp_path))
+    for i in range(3):
+        store.put(make_block(i))
+    assert [block.index for block in store.get_range(2, "pool", 0)] == [0, 1, 2]
+    store.close()
@@ -0,0 +1,63 @@
+"""
+Assertion tests for CachedKVStore over both KV engines.
+
+    python -m pytest Blockchain/tests/kv_cache_test.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_cache import CachedKVStore
+from kv_storage import KVSQLiteStore
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cached = CachedKVStore(KVSQLiteStore(str(tmp_path / "state.db")))
+    yield cached
+    cached.close()
+
+
+def test_buffered_writes_flush_together(cache):
+    cache.set("A", "1")
+    cache.set("B", "2")
+    cache.remove("B")
+    assert cache.store.get("A") is None
+    assert cache.flush()
+    assert cache.store.get("A") == "1" and cache.store.get("B") is None
+    assert cache.get("A") == "1" and cache.get("B") is None
+
+
+def test_atomic_set_supersedes_a_buffered_write(cache):
+    cache.begin_atomic()
+    cache.set("K", "v1")
+    cache.atomic_set("K", "v2")
+    assert cache.commit_atomic()
+
+    assert cache.get("K") == "v2"
+    assert cache.flush()
+    assert cache.store.get("K") == "v2"
+
+
+def test_rollback_restores_the_superseded_buffered_write(cache):
+    cache.begin_atomic()
+    cache.set("K", "v1")
+    cache.atomic_set("K", "v2")
+    cache.rollback_atomic()
+
+    assert cache.get("K") == "v1"
+    assert cache.flush()
+    assert cache.store.get("K") == "v1"
+
+
+def test_rollback_forgets_atomic_writes(cache):
+    cache.set("K", "old")
+    cache.flush()
+    cache.begin_atomic()
+    cache.atomic_set("K", "new")
+    cache.rollback_atomic()
+    assert cache.get("K") == "old"
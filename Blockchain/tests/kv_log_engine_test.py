@@ -0,0 +1,90 @@
+"""
+Assertion tests for LogStructuredKVStore: the KVSQLiteStore interface,
+atomic transactions and recovery.
+
+    python -m pytest Blockchain/tests/kv_log_engine_test.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kv_cache import CachedKVStore
+from kv_log_engine import LogStructuredKVStore, SEGMENT_SUFFIX
+from kv_storage import KVSQLiteStore
+
+
+@pytest.fixture(params=["log", "sqlite"])
+def store(request, tmp_path):
+    """Every interface test runs on both engines, so they stay interchangeable."""
+    if request.param == "log":
+        kv = LogStructuredKVStore(str(tmp_path / "log"))
+    else:
+        kv = KVSQLiteStore(str(tmp_path / "state.db"))
+    yield kv
+    kv.close()
+
+
+def test_set_get_remove(store):
+    store.set("a", "1")
+    store.set_many({"b": "2", "c": "3"})
+    store.remove("b")
+    assert store.get("a") == "1" and store.get("b") is None
+    assert store.get_many(["a", "b", "c"]) == {"a": "1", "c": "3"}
+    assert sorted(store.all_keys()) == ["a", "c"]
+
+
+def test_transaction_reads_its_own_writes(store):
+    store.set("a", "1")
+    store.begin_atomic()
+    store.atomic_set("b", "2")
+    store.remove("a")
+    assert store.get("b") == "2" and store.has_key("b")
+    assert store.get("a") is None and not store.has_key("a")
+    assert list(store.scan_prefix("")) == [("b", "2")]
+    assert store.commit_atomic()
+    assert store.get_many(["a", "b"]) == {"b": "2"}
+
+
+def test_rollback_discards_the_transaction(store):
+    store.set("a", "1")
+    store.begin_atomic()
+    store.atomic_set_many({"a": "changed", "b": "2"})
+    store.rollback_atomic()
+    assert store.get("a") == "1" and store.get("b") is None
+    assert store.commit_atomic()  # Nothing left to commit
+    assert store.get("b") is None
+
+
+def test_cached_store_rolls_back_on_the_log_engine(tmp_path):
+    cache = CachedKVStore(LogStructuredKVStore(str(tmp_path)))
+    cache.begin_atomic()
+    cache.atomic_set("k", "v")
+    cache.rollback_atomic()
+    assert cache.get("k") is None
+    cache.close()
+
+
+def test_reopen_recovers_values_and_drops_a_torn_tail(tmp_path):
+    directory = str(tmp_path)
+    kv = LogStructuredKVStore(directory)
+    kv.set("a", "1")
+    kv.begin_atomic()
+    kv.atomic_set_many({"b": "2", "c": "3"})
+    assert kv.commit_atomic()
+    kv.close()
+
+    segment = sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))[-1]
+    with open(os.path.join(directory, segment), "ab") as file:
+        file.write(b"\x00\x01torn")
+
+    kv = LogStructuredKVStore(directory)
+    assert kv.get_many(["a", "b", "c"]) == {"a": "1", "b": "2", "c": "3"}
+    kv.set("d", "4")
+    kv.close()
+    kv = LogStructuredKVStore(directory)
+    assert kv.get("d") == "4"
+    kv.close()
@@ -0,0 +1,80 @@
+"""
+Assertion tests for the fee-prioritized Mempool.
+
+    python -m pytest Blockchain/tests/mempool_test.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mempool import Mempool
+from structures.transactions import Transaction
+
+
+def transfer(creator: str, nonce: int, fee: int) -> Transaction:
+    return Transaction(0, str(fee), creator, "ab" * 32, "transfer", "D", nonce, {"to": "bob", "amount": "1"})
+
+
+def test_pending_is_best_fee_first_and_in_nonce_order():
+    pool = Mempool()
+    for tx in (transfer("a", 0, 100), transfer("a", 1, 10_000), transfer("b", 0, 5_000), transfer("c", 1, 9_000)):
+        assert pool.add(tx)
+    order = [(tx.creator, tx.nonce) for tx in pool.pending()]
+    assert order == [("b", 0), ("a", 0), ("a", 1)]  # c is waiting for nonce 0
+
+
+def test_nonce_window_and_duplicates():
+    pool = Mempool(account_nonce=lambda creator: 5, max_per_sender=4)
+    assert not pool.add(transfer("a", 4, 100))   # Already used
+    assert not pool.add(transfer("a", 9, 100))   # Too far ahead
+    assert pool.add(transfer("a", 5, 100))
+    assert not pool.add(transfer("a", 5, 100))   # Same hash
+    assert pool.rejected == 2
+
+
+def test_replacement_needs_a_fee_bump():
+    pool = Mempool()
+    original = transfer("a", 0, 1000)
+    assert pool.add(original)
+    assert not pool.add(transfer("a", 0, 1050))
+    replacement = transfer("a", 0, 1200)
+    assert pool.add(replacement)
+    assert original.hash not in pool and replacement.hash in pool and len(pool) == 1
+
+
+def test_full_pool_evicts_the_cheapest_tail_or_rejects():
+    pool = Mempool(max_size=3)
+    cheap_base, cheap_tail = transfer("a", 0, 500), transfer("a", 1, 100)
+    for tx in (cheap_base, cheap_tail, transfer("b", 0, 1000)):
+        assert pool.add(tx)
+
+    assert not pool.add(transfer("c", 0, 50))    # Does not outbid anything
+    assert pool.add(transfer("c", 0, 2000))
+    assert cheap_tail.hash not in pool and cheap_base.hash in pool  # The tail goes, never a nonce in the middle
+    assert pool.evicted == 1 and len(pool) == 3
+
+
+def test_eviction_never_removes_the_incoming_creators_own_base():
+    pool = Mempool(max_size=2)
+    base = transfer("a", 0, 10)
+    assert pool.add(base)
+    assert pool.add(transfer("b", 0, 20))
+    assert pool.add(transfer("a", 1, 1000))      # Evicts b, not a's own nonce 0
+    assert base.hash in pool
+    assert [(tx.creator, tx.nonce) for tx in pool.pending()] == [("a", 0), ("a", 1)]
+
+
+def test_account_nonce_outlives_the_senders_queue():
+    asked = []
+    pool = Mempool(account_nonce=lambda creator: asked.append(creator) or 0)
+    included = [transfer("a", 0, 100), transfer("a", 1, 100)]
+    for tx in included:
+        pool.add(tx)
+    pool.remove_included(included)
+    assert len(pool) == 0
+
+    assert not pool.add(transfer("a", 1, 500))   # Replay of an included nonce
+    assert pool.add(transfer("a", 2, 500))
+    assert asked == ["a"]                        # Asked once, then remembered
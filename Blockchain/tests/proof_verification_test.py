@@ -0,0 +1,107 @@
+"""
+Assertion tests for QuorumSignatureVerifier and the proofs' signed data.
+
+    python -m pytest Blockchain/tests/proof_verification_test.py
+"""
+
+import base64
+import os
+import sys
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from proof_verification import QuorumSignatureVerifier, base58_decode, base58_encode, verify_signature
+from structures.proofs import EpochFinalizationProof, LeaderRotationProof
+
+MESSAGE = "prev" + "0:pool:1" + "ab" * 32 + "ee" * 32 + "#0"
+KEYS = [Ed25519PrivateKey.generate() for _ in range(10)]
+MEMBERS = [base58_encode(key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw))
+           for key in KEYS]
+QUORUM = frozenset(member.lower() for member in MEMBERS)
+MAJORITY = 7
+
+
+def sign(key: Ed25519PrivateKey, message: str = MESSAGE) -> str:
+    return base64.b64encode(key.sign(message.encode("utf-8"))).decode()
+
+
+def signatures(count: int, message: str = MESSAGE):
+    return {member: sign(key, message) for member, key in zip(MEMBERS[:count], KEYS[:count])}
+
+
+@pytest.fixture(params=[16, 2], ids=["inline", "thread-pool"])
+def verifier(request):
+    checker = QuorumSignatureVerifier(chunk_size=request.param)
+    yield checker
+    checker.close()
+
+
+def test_base58_round_trip_and_config_key():
+    assert base58_decode(base58_encode(b"\0\0\x01\x02")) == b"\0\0\x01\x02"
+    assert len(base58_decode("9GQ46rqY238rk2neSwgidap9ww5zbAN4dyqyC7j5ZnBK")) == 32
+    with pytest.raises(ValueError):
+        base58_decode("0OIl")
+
+
+def test_signatures_use_base58_keys_and_base64_signatures():
+    data = MESSAGE.encode("utf-8")
+    assert verify_signature(MEMBERS[0], data, sign(KEYS[0]))
+    assert not verify_signature(MEMBERS[0], data, sign(KEYS[1]))
+    assert not verify_signature(MEMBERS[0], data, KEYS[0].sign(data).hex())   # Hex is not the wire encoding
+    assert not verify_signature("not a key", data, sign(KEYS[0]))
+
+
+def test_majority_passes_and_minority_fails(verifier):
+    assert verifier.verify(MESSAGE, signatures(MAJORITY), QUORUM, MAJORITY)
+    assert not verifier.verify(MESSAGE, signatures(MAJORITY - 1), QUORUM, MAJORITY)
+
+
+def test_forged_and_outside_signatures_do_not_count(verifier):
+    forged = signatures(MAJORITY)
+    forged[MEMBERS[0]] = sign(KEYS[0], "something else")
+    outsider = Ed25519PrivateKey.generate()
+    forged[base58_encode(outsider.public_key().public_bytes(serialization.Encoding.Raw,
+                                                            serialization.PublicFormat.Raw))] = sign(outsider)
+    assert not verifier.verify(MESSAGE, forged, QUORUM, MAJORITY)
+
+
+def test_empty_quorum_or_no_majority_fails_closed(verifier):
+    assert not verifier.verify(MESSAGE, signatures(10), frozenset(), MAJORITY)
+    assert not verifier.verify(MESSAGE, {}, QUORUM, 0)
+    assert not verifier.verify(MESSAGE, signatures(10), QUORUM, -1)
+    assert not verifier._verified
+
+
+def test_signers_match_case_insensitively_and_count_once(verifier):
+    assert all(member not in QUORUM for member in MEMBERS)  # Signers keep their base58 spelling
+    assert verifier.verify(MESSAGE, signatures(MAJORITY), QUORUM, MAJORITY)
+    doubled = signatures(MAJORITY - 1)
+    doubled[MEMBERS[0].swapcase()] = doubled[MEMBERS[0]]  # Same member under another spelling
+    assert not verifier.verify(MESSAGE, doubled, QUORUM, MAJORITY)
+
+
+def test_cached_result_is_bound_to_its_quorum_and_majority(verifier):
+    proof = signatures(MAJORITY)
+    assert verifier.verify(MESSAGE, proof, QUORUM, MAJORITY)
+    assert verifier.verify(MESSAGE, proof, QUORUM, MAJORITY) and verifier.cache_hits == 1
+    other_quorum = frozenset(member.lower() for member in MEMBERS[MAJORITY:])
+    assert not verifier.verify(MESSAGE, proof, other_quorum, 1)
+    assert not verifier.verify(MESSAGE, proof, QUORUM, MAJORITY + 1)
+
+
+def test_epoch_finalization_fields_are_separated():
+    def proof(leader: int, index: int) -> EpochFinalizationProof:
+        return EpochFinalizationProof(leader, index, "aa" * 32, "bb" * 32, {})
+
+    assert proof(1, 23).signed_data("e#0") != proof(12, 3).signed_data("e#0")
+    assert proof(1, 23).signed_data("e#0") == f"EPOCH_DONE:1:23:{'aa' * 32}:{'bb' * 32}:e#0"
+
+
+def test_leader_rotation_names_the_skipped_leader():
+    proof = LeaderRotationProof("aa" * 32, 4, "bb" * 32, {})
+    assert proof.signed_data(MEMBERS[0], "e#0") != proof.signed_data(MEMBERS[1], "e#0")
+    assert proof.signed_data(MEMBERS[0], "e#0") == f"LEADER_ROTATION_PROOF:{MEMBERS[0]}:{'aa' * 32}:4:{'bb' * 32}:e#0"
@@ -0,0 +1,136 @@
+"""
+Import-and-call smoke check for the entry points wired into the node:
+get_db_instance/DB_ENGINES, TRANSACTION_POOL, the block generation loop,
+BLOCK_STORE/fetch_block and the validate_*_bundle proof checks.
+
+Runs against a throwaway PROTOCHAIN_DATA built from templates/:
+    python Blockchain/tests/smoke_test.py
+"""
+
+import asyncio
+import base64
+import os
+import shutil
+import sys
+import tempfile
+
+BLOCKCHAIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BLOCKCHAIN_DIR)
+
+DATA_DIR = tempfile.mkdtemp(prefix="protochain-smoke-")
+for name in ("genesis.toml", "configs.toml"):
+    shutil.copy(os.path.join(BLOCKCHAIN_DIR, "templates", name), DATA_DIR)
+os.environ["PROTOCHAIN_DATA"] = DATA_DIR
+os.environ["PROTOCHAIN_DB_ENGINES"] = " BLOCKS_INDEX = log , STATE=SQLite "
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+import global_vars
+from kv_log_engine import LogStructuredKVStore
+from kv_storage import KVSQLiteStore
+from proof_verification import base58_encode
+from structures.block import Block, BlockExtra
+from structures.metadata_handlers import ApprovementThreadMetadataHandler, EpochHandler
+from structures.proofs import EpochFinalizationProof, FinalizationProof, LeaderRotationProof
+from structures.transactions import Transaction
+import work_with_proofs
+from working_threads import block_generation
+
+
+def check_db_instances() -> None:
+    assert global_vars.DB_ENGINES == {"BLOCKS_INDEX": "log", "STATE": "sqlite"}, global_vars.DB_ENGINES
+    for label, engine in (("BLOCKS_INDEX", LogStructuredKVStore), ("STATE", KVSQLiteStore), ("OTHER", KVSQLiteStore)):
+        store = global_vars.get_db_instance(label)
+        assert isinstance(store, engine), (label, type(store))
+        store.set("smoke", label)
+        assert store.get("smoke") == label
+        store.close()
+
+
+def make_tx(creator: str, nonce: int, fee: int = 10) -> Transaction:
+    return Transaction(v=0, fee=str(fee), creator=creator, sig="ab" * 32, tx_type="transfer", sig_type="D",
+                       nonce=nonce, payload={"to": "recipient", "amount": "1"})
+
+
+def check_transaction_pool() -> None:
+    pool = global_vars.TRANSACTION_POOL
+    assert pool.add(make_tx("alice", 0)) and pool.add(make_tx("alice", 1)) and pool.add(make_tx("bob", 0))
+    assert not pool.add(make_tx("alice", 0)), "duplicate admitted"
+    assert [tx.nonce for tx in pool.pending() if tx.creator == "alice"] == [0, 1]
+
+
+def check_generation_loop() -> None:
+    pool = global_vars.TRANSACTION_POOL
+    assert len(pool) == 3
+    block_time = global_vars.GENESIS_CONFIG["NETWORK_PARAMETERS"]["BLOCK_TIME"] / 1000
+
+    async def one_round() -> None:
+        try:
+            await asyncio.wait_for(block_generation.block_generation(), timeout=block_time / 2)
+        except asyncio.TimeoutError:
+            pass
+
+    generation = global_vars.GEN_THREAD_HANDLER
+    asyncio.run(one_round())
+    assert len(pool) == 0, f"{len(pool)} txs left in the pool after a block"
+    creator = global_vars.RUNTIME_CONFIG.get("PUBLIC_KEY", "")
+    stored = work_with_proofs.fetch_block(-1, creator, 0)
+    assert stored is not None and len(stored.transactions) == 3, "the block was not stored before pruning"
+    assert generation.next_index == 1 and generation.prev_hash == stored.hash()
+
+
+def check_block_store() -> None:
+    block = Block(creator="smoke-pool", time=1, epoch=global_vars.GEN_THREAD_HANDLER.epoch_full_id,
+                  transactions=[make_tx("carol", 0)], extra_data=BlockExtra(metadata={}), index=0,
+                  prev_hash="00" * 32)
+    epoch_idx = -1  # The generation thread's epoch id ends in "#-1" until the first epoch is found
+    global_vars.BLOCK_STORE.put(block)
+    fetched = work_with_proofs.fetch_block(epoch_idx, "smoke-pool", 0)
+    assert fetched is not None and fetched.hash() == block.hash()
+    assert work_with_proofs.fetch_block(epoch_idx, "smoke-pool", 1) is None
+
+
+def check_proof_bundles() -> None:
+    keys = [Ed25519PrivateKey.generate() for _ in range(4)]
+    members = [base58_encode(key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw))
+               for key in keys]
+    epoch = EpochHandler(id=0, hash="ee" * 32, pools_registry={}, quorum=members, leaders_sequence=members,
+                         start_timestamp=0, current_leader_index=0)
+    thread = ApprovementThreadMetadataHandler(core_major_version=0, network_parameters={}, epoch=epoch)
+    full_id = work_with_proofs.epoch_full_id(epoch)
+
+    def signed(proof, *context):
+        data = proof.signed_data(*context, full_id).encode("utf-8")
+        proof.signatures = {member: base64.b64encode(key.sign(data)).decode() for member, key in zip(members, keys)}
+        return proof
+
+    leader = members[0]
+    rotation = signed(LeaderRotationProof(first_block_hash="11" * 32, skip_index=0, skip_hash="11" * 32,
+                                          signatures={}), leader)
+    bundles = (
+        (work_with_proofs.validate_block_finalization_bundle, (),
+         signed(FinalizationProof(prev_hash="00" * 32, block_id="0:smoke-pool:0", block_hash="11" * 32, signatures={}))),
+        (work_with_proofs.validate_epoch_finalization_bundle, (),
+         signed(EpochFinalizationProof(last_leader_index=0, last_block_index=0, last_block_hash="11" * 32,
+                                       first_block_hash_by_last_leader="11" * 32, signatures={}))),
+        (work_with_proofs.validate_leader_rotation_bundle, (leader,), rotation)
+    )
+    assert not work_with_proofs.validate_leader_rotation_bundle(members[1], rotation, thread), \
+        "a rotation proof was accepted for another leader"
+    for validate, context, proof in bundles:
+        assert validate(*context, proof, thread), validate.__name__
+        proof.signatures = dict(list(proof.signatures.items())[:2])  # 2 of 4 is below the majority of 3
+        assert not validate(*context, proof, thread), f"{validate.__name__} accepted a minority"
+
+
+if __name__ == "__main__":
+    try:
+        for check in (check_db_instances, check_transaction_pool, check_generation_loop, check_block_store,
+                      check_proof_bundles):
+            check()
+            print(f"[+] {check.__name__}")
+    finally:
+        global_vars.BLOCK_STORE.close()
+        work_with_proofs.PROOF_VERIFIER.close()
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
@@ -0,0 +1,91 @@
+"""
+Assertion tests for the Transaction canonical encoding.
+
+    python -m pytest Blockchain/tests/transactions_test.py
+"""
+
+import json
+import os
+import struct
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from structures.transactions import Transaction
+
+FEE_OFFSET = 12  # After v u32 and nonce u64
+
+
+def make_tx(fee: str = "1000000", payload=None) -> Transaction:
+    return Transaction(0, fee, "creator", "ab" * 32, "transfer", "D", 7,
+                       {"to": "bob", "amount": "5", "memo": "é"} if payload is None else payload)
+
+
+def with_payload(encoded: bytes, tx: Transaction, payload: bytes) -> bytes:
+    """Swap the trailing u32-length payload of an encoded transaction."""
+    return encoded[:-len(tx._payload) - 4] + struct.pack(">I", len(payload)) + payload
+
+
+def test_round_trip_keeps_fields_and_hash():
+    tx = make_tx()
+    encoded = tx.encode()
+    decoded, end = Transaction.decode(b"xx" + encoded, 2)
+    assert end == len(encoded) + 2
+    assert (decoded.fee, decoded.creator, decoded.nonce, decoded.payload) == (tx.fee, tx.creator, tx.nonce, tx.payload)
+    assert decoded.hash == tx.hash and decoded.size == tx.size == len(encoded)
+    assert decoded.encode() == encoded
+
+
+def test_equal_transactions_encode_identically():
+    assert make_tx(payload={"b": 1, "a": 2}).encode() == make_tx(payload={"a": 2, "b": 1}).encode()
+    assert make_tx(fee="0").encode()[FEE_OFFSET] == 0  # Zero fee has no magnitude bytes
+
+
+def test_transactions_are_immutable_and_fees_non_negative():
+    tx = make_tx()
+    with pytest.raises(AttributeError):
+        tx.fee = "1"
+    with pytest.raises(ValueError):
+        make_tx(fee="-1")
+
+
+def test_decode_rejects_a_zero_padded_fee():
+    encoded = make_tx().encode()
+    padded = encoded[:FEE_OFFSET] + bytes([encoded[FEE_OFFSET] + 1, 0]) + encoded[FEE_OFFSET + 1:]
+    with pytest.raises(ValueError, match="Non-minimal fee"):
+        Transaction.decode(padded)
+
+
+@pytest.mark.parametrize("payload", [
+    b'{"to": "bob"}',                      # Not compact
+    b'{"b":1,"a":2}',                      # Keys not sorted
+    b'{"memo":"\\u00e9"}',                 # Escaped instead of UTF-8
+    b'{"a":1,"a":2}',                      # Duplicate key
+    b'[1,2]',                              # Not an object
+])
+def test_decode_rejects_non_canonical_payloads(payload):
+    tx = make_tx()
+    with pytest.raises(ValueError, match="Non-canonical payload"):
+        Transaction.decode(with_payload(tx.encode(), tx, payload))
+
+
+@pytest.mark.parametrize("payload", [b'{"a":', b'\xff\xfe'])
+def test_decode_rejects_malformed_payloads(payload):
+    tx = make_tx()
+    with pytest.raises(ValueError, match="Malformed payload"):
+        Transaction.decode(with_payload(tx.encode(), tx, payload))
+
+
+def test_decode_rejects_truncated_input():
+    encoded = make_tx().encode()
+    for cut in (5, FEE_OFFSET + 2, len(encoded) - 1):
+        with pytest.raises(ValueError):
+            Transaction.decode(encoded[:cut])
+
+
+def test_canonical_payload_is_accepted():
+    tx = make_tx()
+    payload = json.dumps(tx.payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    assert Transaction.decode(with_payload(tx.encode(), tx, payload))[0].hash == tx.hash
@@ -2,9 +2,9 @@ import hashlib
 import time
 from typing import List
 
-from structures.threads_metadata_handlers import EpochHandler, ApprovementThreadMetadataHandler
+from structures.metadata_handlers import EpochHandler, ApprovementThreadMetadataHandler
 from global_vars import CORE_VERSION_MAJOR
-from structures.misc import QuorumMemberData
+from structures.misc import QuorumNode
 
 
 def hash_sha256(text: str) -> str:
@@ -38,12 +38,12 @@ def calc_quorum_majority(approval_thread: ApprovementThreadMetadataHandler) -> i
     return size if required > size else required
 
 
-def collect_quorum_info(approval_thread: ApprovementThreadMetadataHandler) -> List[QuorumMemberData]:
+def collect_quorum_info(approval_thread: ApprovementThreadMetadataHandler) -> List[QuorumNode]:
     """Get quorum member public keys and URLs."""
-    members: List[QuorumMemberData] = []
+    members: List[QuorumNode] = []
     for pk in approval_thread.epoch.quorum:
         pool_data = read_from_approvement_state(f"{pk}(POOL)_STORAGE_POOL")
-        members.append(QuorumMemberData(PubKey=pk, Url=pool_data.pool_url))
+        members.append(QuorumNode(pub_key=pk, endpoint=pool_data.pool_url))
     return members
 
 
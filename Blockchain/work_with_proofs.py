@@ -1,25 +1,64 @@
+from typing import Dict, FrozenSet, Optional
+
+from global_vars import BLOCK_STORE
+from proof_verification import QuorumSignatureVerifier
 from structures.block import Block
-from structures.threads_metadata_handlers import EpochHandler
+from structures.proofs import EpochFinalizationProof, FinalizationProof, LeaderRotationProof
+from structures.metadata_handlers import ApprovementThreadMetadataHandler, EpochHandler
+from utils import calc_quorum_majority
 
 
-def fetch_block(epoch_idx: int, creator_id: str, block_idx: int) -> Block:
-    """Retrieve a block for a given epoch, creator, and index."""
-    pass
+PROOF_VERIFIER = QuorumSignatureVerifier()
+
+# Quorum of each recent epoch as a set, keyed by epoch full id
+_QUORUM_SETS: Dict[str, FrozenSet[str]] = {}
+
+
+def fetch_block(epoch_idx: int, creator_id: str, block_idx: int) -> Optional[Block]:
+    """Retrieve a block for a given epoch, creator, and index (None if it is not stored)."""
+    return BLOCK_STORE.get(epoch_idx, creator_id, block_idx)
+
+
+def epoch_full_id(epoch: EpochHandler) -> str:
+    return f"{epoch.hash}#{epoch.id}"
 
 
-def validate_epoch_finalization_bundle() -> bool:
+def quorum_set(epoch: EpochHandler) -> FrozenSet[str]:
+    """The epoch's quorum as a lower-case set (signers are matched case-insensitively), built once per epoch."""
+    full_id = epoch_full_id(epoch)
+    members = _QUORUM_SETS.get(full_id)
+    if members is None:
+        if len(_QUORUM_SETS) >= 8:
+            _QUORUM_SETS.pop(next(iter(_QUORUM_SETS)))
+        members = _QUORUM_SETS[full_id] = frozenset(member.lower() for member in epoch.quorum)
+    return members
+
+
+def _has_quorum_majority(signed_data: str, signatures: Dict[str, str],
+                         approval_thread: ApprovementThreadMetadataHandler) -> bool:
+    return PROOF_VERIFIER.verify(signed_data, signatures, quorum_set(approval_thread.epoch),
+                                 calc_quorum_majority(approval_thread))
+
+
+def validate_epoch_finalization_bundle(proof: EpochFinalizationProof,
+                                       approval_thread: ApprovementThreadMetadataHandler) -> bool:
     """Verify the aggregated finalization proof for an epoch."""
-    pass
+    return _has_quorum_majority(proof.signed_data(epoch_full_id(approval_thread.epoch)), proof.signatures,
+                                approval_thread)
 
 
-def validate_block_finalization_bundle() -> bool:
+def validate_block_finalization_bundle(proof: FinalizationProof,
+                                       approval_thread: ApprovementThreadMetadataHandler) -> bool:
     """Verify the aggregated finalization proof for a block."""
-    pass
+    return _has_quorum_majority(proof.signed_data(epoch_full_id(approval_thread.epoch)), proof.signatures,
+                                approval_thread)
 
 
-def validate_leader_rotation_bundle() -> bool:
-    """Verify the aggregated leader rotation proof."""
-    pass
+def validate_leader_rotation_bundle(leader_pub_key: str, proof: LeaderRotationProof,
+                                    approval_thread: ApprovementThreadMetadataHandler) -> bool:
+    """Verify the aggregated leader rotation proof for the leader identified by 'leader_pub_key'."""
+    return _has_quorum_majority(proof.signed_data(leader_pub_key, epoch_full_id(approval_thread.epoch)),
+                                proof.signatures, approval_thread)
 
 
 def is_leader_rotation_chain_valid() -> bool:
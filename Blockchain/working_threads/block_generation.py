@@ -1,10 +1,136 @@
 import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Set
+
+from block_store import BlockStore
+from global_vars import BLOCK_STORE, GEN_THREAD_HANDLER, GENESIS_CONFIG, RUNTIME_CONFIG, TRANSACTION_POOL
+from mempool import Mempool
+from structures.block import Block, BlockExtra, iter_block_chunks, utc_millis
+from structures.metadata_handlers import GenerationThreadMetadataHandler
+from structures.transactions import Transaction
+
+
+TX_FRAMING_BYTES = 4  # Length prefix in front of every encoded transaction
+
+
+@dataclass
+class BlockTemplate:
+    """Transactions picked for the next block, with their total encoded size."""
+    txs: List[Transaction]
+    tx_hashes: List[str]
+    size: int
+    timings: Dict[str, float] = field(default_factory=dict)  # Milliseconds per stage
+
+
+def assemble_block(pool: Mempool, txs_limit: int, max_block_size: int, envelope_size: int) -> BlockTemplate:
+    """
+    Fill a block from the mempool's best executable transactions in one pass.
+
+    'envelope_size' is the encoded size of the block without transactions
+    (see block_envelope_size). The running size is updated per transaction,
+    so the size limit costs nothing extra. A transaction that does not fit is
+    skipped together with its creator's later nonces, and smaller
+    transactions can still fill the remaining space. Assembly stops at
+    'txs_limit' transactions or when no transaction could fit any more.
+
+    Raises:
+        ValueError: if the envelope alone exceeds max_block_size
+    """
+    if envelope_size > max_block_size:
+        raise ValueError(f"Block header, extra data and signature take {envelope_size} bytes, "
+                         f"more than the {max_block_size} byte block limit")
+    start = time.perf_counter()
+    txs: List[Transaction] = []
+    hashes: List[str] = []
+    size = envelope_size
+    smallest = None
+    skipped: Set[str] = set()
+
+    for tx in pool.pending():
+        if tx.creator in skipped:
+            continue
+        needed = tx.size + TX_FRAMING_BYTES
+        if size + needed > max_block_size:
+            skipped.add(tx.creator)
+            if smallest is not None and size + smallest > max_block_size:
+                break  # Not even the smallest transaction seen so far fits
+            continue
+        txs.append(tx)
+        hashes.append(tx.hash)
+        size += needed
+        smallest = needed if smallest is None else min(smallest, needed)
+        if len(txs) >= txs_limit:
+            break
+
+    return BlockTemplate(txs, hashes, size, {"select": (time.perf_counter() - start) * 1000})
+
+
+def build_block(template: BlockTemplate, generation: GenerationThreadMetadataHandler, creator: str,
+                private_key: str, metadata: Mapping[str, str]) -> Block:
+    """Turn a template into the generation thread's next block, signed over its header hash."""
+    block = Block(creator=creator, time=utc_millis(), epoch=generation.epoch_full_id, transactions=template.txs,
+                  extra_data=BlockExtra(metadata=dict(metadata)), index=generation.next_index,
+                  prev_hash=generation.prev_hash)
+    block.sign(private_key)  # The header commits to the transactions through their Merkle root
+    return block
+
+
+def block_envelope_size(generation: GenerationThreadMetadataHandler, creator: str, private_key: str,
+                        metadata: Mapping[str, str]) -> int:
+    """
+    Encoded size of the generation thread's next block before any transaction:
+    header, extra data and signature, measured on an empty block built the
+    same way. The header and signature do not grow with the transactions.
+    """
+    empty = build_block(BlockTemplate([], [], 0), generation, creator, private_key, metadata)
+    return len(next(iter_block_chunks(empty)))
+
+
+def produce_block(pool: Mempool, store: BlockStore, generation: GenerationThreadMetadataHandler, txs_limit: int,
+                  max_block_size: int, creator: str, private_key: str, metadata: Mapping[str, str]) -> BlockTemplate:
+    """
+    One generation round: assemble, build and store a block, then advance the
+    generation thread and prune the included transactions. If storing fails,
+    nothing is pruned and the thread stays on the same index.
+    """
+    envelope_size = block_envelope_size(generation, creator, private_key, metadata)
+    template = assemble_block(pool, txs_limit, max_block_size, envelope_size)
+    start = time.perf_counter()
+    block = build_block(template, generation, creator, private_key, metadata)
+    built = time.perf_counter()
+    block_hash = store.put(block)
+    stored = time.perf_counter()
+
+    generation.prev_hash = block_hash
+    generation.next_index = block.index + 1
+    pool.remove_included(template.txs)
+    template.timings.update({
+        "build": (built - start) * 1000,
+        "store": (stored - built) * 1000,
+        "total": template.timings["select"] + (stored - start) * 1000
+    })
+    return template
+
 
 async def block_generation():
-    """Simulate a block generation thread that prints a message periodically."""
+    """Produce and store a block from the mempool once per BLOCK_TIME and report how long each stage took."""
+    params = GENESIS_CONFIG["NETWORK_PARAMETERS"]
+    block_time = params["BLOCK_TIME"] / 1000
+    creator = RUNTIME_CONFIG.get("PUBLIC_KEY", "")
+    private_key = RUNTIME_CONFIG.get("PRIVATE_KEY", "")
+    metadata = RUNTIME_CONFIG.get("EXTRA_DATA_TO_BLOCK", {})
+    loop = asyncio.get_running_loop()
     while True:
-        print("Message from thread 1")
-        await asyncio.sleep(3)
+        started = time.perf_counter()
+        template = await loop.run_in_executor(
+            None, produce_block, TRANSACTION_POOL, BLOCK_STORE, GEN_THREAD_HANDLER,
+            params["TXS_LIMIT_PER_BLOCK"], params["MAX_BLOCK_SIZE_IN_BYTES"], creator, private_key, metadata
+        )
+        timings = ", ".join(f"{stage} {ms:.1f} ms" for stage, ms in template.timings.items())
+        print(f"[*] Block {GEN_THREAD_HANDLER.next_index - 1} with {len(template.txs)} txs "
+              f"({template.size} bytes): {timings}")
+        await asyncio.sleep(max(0.0, block_time - (time.perf_counter() - started)))
 
 
 async def main():
@@ -12,4 +138,36 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    import random
+    import shutil
+    import tempfile
+
+    pool = Mempool()
+    rng = random.Random(1)
+    for i in range(300_000):
+        tx = Transaction(v=0, fee=str(rng.randint(1, 10_000)), creator=f"sender{i % 50_000}", sig="ab" * 32,
+                         tx_type="transfer", sig_type="D", nonce=i // 50_000,
+                         payload={"to": f"recipient{i}", "amount": rng.randint(1, 10 ** 9)})
+        pool.add(tx)
+
+    directory = tempfile.mkdtemp()
+    store = BlockStore(directory)
+    generation = GenerationThreadMetadataHandler(epoch_full_id="ab" * 32 + "#0", prev_hash="00" * 32, next_index=0)
+    pool_size = len(pool)
+    template = produce_block(pool, store, generation, txs_limit=30_000, max_block_size=12_288_000,
+                             creator="demo-pool", private_key="", metadata={})
+    print(f"{len(template.txs)} txs, {template.size} bytes from a pool of {pool_size}: "
+          + ", ".join(f"{stage} {ms:.1f} ms" for stage, ms in template.timings.items()))
+    stored = store.get(0, "demo-pool", 0)
+    print(f"Stored as block 0 ({generation.prev_hash[:16]}...), {len(stored.transactions)} txs, "
+          f"{len(pool)} left in the pool")
+
+    # Large extra data shrinks the room for transactions instead of overflowing the limit
+    metadata = {f"note{i}": "x" * 4096 for i in range(4)}
+    template = produce_block(pool, store, generation, txs_limit=30_000, max_block_size=64 * 1024,
+                             creator="demo-pool", private_key="", metadata=metadata)
+    encoded = len(store.get_raw(0, "demo-pool", 1))
+    print(f"Block 1 with {len(template.txs)} txs and 16 KiB of extra data: {encoded} bytes, "
+          f"within 64 KiB: {encoded <= 64 * 1024}, size estimate exact: {encoded == template.size}")
+    store.close()
+    shutil.rmtree(directory)
@@ -1,6 +1,6 @@
 import asyncio
 
-from structures.threads_metadata_handlers import ApprovementThreadMetadataHandler
+from structures.metadata_handlers import ApprovementThreadMetadataHandler
 from utils import get_utc_timestamp
 from global_vars import APPROVEMENT_THREAD
 
@@ -0,0 +1,114 @@
+"""
+AccountIndex
+
+SQLite index of the accounts stored by UserAccountHandler, with an LRU of
+recently loaded entries in front of it. Listing accounts becomes one indexed
+query instead of a directory scan, and loading an account no longer opens and
+parses its account_info.toml.
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+AccountRow = Tuple[str, str, str]  # (username, public key, folder path)
+
+
+class AccountIndex:
+    def __init__(self, db_path: str, cache_size: int = 100_000):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS accounts (
+                username TEXT PRIMARY KEY,
+                public_key TEXT NOT NULL,
+                path TEXT NOT NULL
+            )
+            '''
+        )
+        self._conn.commit()
+
+    def add(self, username: str, public_key: str, path: str) -> None:
+        self.add_many([(username, public_key, path)])
+
+    def add_many(self, rows: Iterable[AccountRow]) -> int:
+        """Insert or replace many accounts in one transaction. Returns the number of rows written."""
+        rows = list(rows)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                '''
+                INSERT INTO accounts (username, public_key, path)
+                VALUES (?, ?, ?)
+                ON CONFLICT(username) DO UPDATE SET public_key = excluded.public_key, path = excluded.path
+                ''',
+                rows
+            )
+            for username, _, _ in rows:
+                self._cache.pop(username, None)
+        return len(rows)
+
+    def get(self, username: str) -> Optional[Dict[str, str]]:
+        """
+        Account data as stored in account_info.toml (username and public key).
+
+        Returns:
+            Optional[Dict[str, str]]: None when the account is not indexed
+        """
+        with self._lock:
+            entry = self._cache.get(username)
+            if entry is not None:
+                self._cache.move_to_end(username)
+                return dict(entry)
+            row = self._conn.execute('SELECT public_key FROM accounts WHERE username = ?', (username,)).fetchone()
+            if row is None:
+                return None
+            entry = {"username": username, "public_key": row[0]}
+            self._cache[username] = entry
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return dict(entry)
+
+    def path(self, username: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT path FROM accounts WHERE username = ?', (username,)).fetchone()
+        return row[0] if row else None
+
+    def remove(self, username: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM accounts WHERE username = ?', (username,))
+            self._cache.pop(username, None)
+
+    def usernames(self) -> Tuple[str, ...]:
+        with self._lock:
+            return tuple(row[0] for row in self._conn.execute('SELECT username FROM accounts ORDER BY username'))
+
+    def existing(self, usernames: Iterable[str]) -> Tuple[str, ...]:
+        """Which of the given usernames are already indexed."""
+        names = list(usernames)
+        found = []
+        with self._lock:
+            for start in range(0, len(names), 500):
+                batch = names[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                found += [row[0] for row in self._conn.execute(
+                    f'SELECT username FROM accounts WHERE username IN ({placeholders})', batch)]
+        return tuple(found)
+
+    def __contains__(self, username: str) -> bool:
+        with self._lock:
+            if username in self._cache:
+                return True
+            return self._conn.execute('SELECT 1 FROM accounts WHERE username = ?', (username,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM accounts').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,8 +1,52 @@
 import os
+import getpass
+import shutil
 import tomllib
 import tomli_w
-from typing import Dict, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from account_index import AccountIndex, AccountRow
 from crypto_factory import CryptoFactory
+from crypto_handler import CryptoHandler
+from keyring_agent import KeyringAgent
+
+INDEX_FILE = "account_index.db"
+
+
+def _write_account(handler: CryptoHandler, storage_dir: str, username: str, passphrase: Optional[bytes]) -> Tuple[AccountRow, object]:
+    """Create one account folder with its keys and account_info.toml. Returns the index row and the private key."""
+    path: str = os.path.join(storage_dir, username)
+    if os.path.exists(path):
+        raise ValueError(f"ERROR: Account {username} already exists.")
+    os.makedirs(path)
+
+    private_key, public_key = handler.generate_keys()
+    handler.save_keys(private_key, public_key, file_name=username, directory=path, passphrase=passphrase)
+
+    account_data: Dict[str, str] = {
+        "username": username,
+        "public_key": handler.serialize_public_key(public_key)
+    }
+    with open(os.path.join(path, "account_info.toml"), "wb") as file:
+        tomli_w.dump(account_data, file)
+
+    return (username, account_data["public_key"], path), private_key
+
+
+def _create_account_batch(handler: CryptoHandler, storage_dir: str, usernames: Sequence[str],
+                          passphrase: bytes) -> Tuple[List[AccountRow], Optional[Exception]]:
+    """
+    Process pool worker for bulk_create_accounts; private keys never leave the worker.
+    Stops at the first failure and returns the rows written so far with the error.
+    """
+    rows: List[AccountRow] = []
+    try:
+        for username in usernames:
+            rows.append(_write_account(handler, storage_dir, username, passphrase)[0])
+    except Exception as e:
+        return rows, e
+    return rows, None
+
 
 class UserAccountHandler:
     """
@@ -10,12 +54,16 @@ class UserAccountHandler:
     of user accounts (public/private key pairs) for UndChain.
     """
 
-    def __init__(self, storage_dir: str = "accounts") -> None:
+    def __init__(self, storage_dir: str = "accounts", keyring: Optional[KeyringAgent] = None) -> None:
         self.storage_dir: str = storage_dir
+        self.keyring: KeyringAgent = keyring or KeyringAgent()
         if not os.path.exists(storage_dir):
             os.makedirs(storage_dir)
+        self.index: AccountIndex = AccountIndex(os.path.join(storage_dir, INDEX_FILE))
+        if not len(self.index):
+            self.rebuild_index()
 
-    def new_account(self, username: str) -> str:
+    def new_account(self, username: str, passphrase: Optional[bytes] = None) -> str:
         """
         Create a brand-new user account. A key pair is generated
         and stored in a dedicated folder for the username.
@@ -23,33 +71,99 @@ class UserAccountHandler:
         Returns:
             str: The filesystem path to the account folder
         """
-        path: str = os.path.join(self.storage_dir, username)
-        if os.path.exists(path):
-            raise ValueError(f"ERROR: Account {username} already exists.")
-
-        os.makedirs(path)
-
-        private_key, public_key = CryptoFactory.generate_keys()
-        self.store_keys(username, private_key, public_key, path)
-
-        account_data: Dict[str, str] = {
-            "username": username,
-            "public_key": CryptoFactory.view_public_key(public_key)
-        }
-
-        with open(os.path.join(path, "account_info.toml"), "wb") as file:
-            tomli_w.dump(account_data, file)
+        row, private_key = _write_account(CryptoFactory.get_crypto_handler(), self.storage_dir, username, passphrase)
+        self.index.add(*row)
+        self.keyring.add_key(username, private_key)
+        return row[2]
 
-        return path
+    def bulk_create_accounts(self, n: int, prefix: str = "user", start: int = 0, passphrase: Optional[bytes] = None,
+                             max_workers: Optional[int] = None, chunk_size: int = 256) -> List[str]:
+        """
+        Create 'n' accounts named f"{prefix}{i}" for i in [start, start + n), generating
+        and saving the keys across a process pool. All accounts share one passphrase,
+        which is prompted for once when not given. The new keys are not unlocked
+        in the keyring. If any account fails, every account that was written is
+        still indexed before the first error is re-raised.
 
-    def store_keys(self, username: str, private_key, public_key, directory: str) -> None:
+        Returns:
+            List[str]: The created usernames
+        """
+        usernames = [f"{prefix}{i}" for i in range(start, start + n)]
+        taken = self.index.existing(usernames)
+        if taken:
+            raise ValueError(f"ERROR: {len(taken)} accounts already exist, e.g. {taken[0]}.")
+        if passphrase is None:
+            passphrase = getpass.getpass(prompt="Enter passphrase for the new accounts: ").encode()
+
+        handler = CryptoFactory.get_crypto_handler()
+        chunks = [usernames[i:i + chunk_size] for i in range(0, n, chunk_size)]
+        rows: List[AccountRow] = []
+        errors: List[Exception] = []
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = [pool.submit(_create_account_batch, handler, self.storage_dir, chunk, passphrase) for chunk in chunks]
+                for future in futures:
+                    try:
+                        chunk_rows, error = future.result()
+                    except Exception as e:  # The worker itself died; nothing is known about its chunk
+                        chunk_rows, error = [], e
+                    rows += chunk_rows
+                    if error is not None:
+                        errors.append(error)
+        finally:
+            self.index.add_many(rows)
+        if errors:
+            raise errors[0]
+        return usernames
+
+    def rebuild_index(self) -> int:
+        """
+        Index every account folder on disk (used once for folders created before
+        the index existed). Returns the number of indexed accounts.
+        """
+        rows: List[AccountRow] = []
+        for entry in os.scandir(self.storage_dir):
+            info_path = os.path.join(entry.path, "account_info.toml")
+            if entry.is_dir() and os.path.exists(info_path):
+                with open(info_path, "rb") as file:
+                    account_data = tomllib.load(file)
+                rows.append((entry.name, account_data.get("public_key", ""), entry.path))
+        return self.index.add_many(rows)
+
+    def store_keys(self, username: str, private_key, public_key, directory: str, passphrase: Optional[bytes] = None) -> None:
         """
         Save the generated key pair in the user’s folder.
         """
         CryptoFactory.get_crypto_handler().save_keys(
-            private_key, public_key, file_name=username, directory=directory
+            private_key, public_key, file_name=username, directory=directory, passphrase=passphrase
         )
 
+    def unlock_account(self, username: str, passphrase: Optional[bytes] = None) -> None:
+        """
+        Decrypt the account's private key into the keyring. Only the first call
+        per process reads the key file and runs the passphrase KDF.
+        """
+        path: str = os.path.join(self.storage_dir, username)
+        if not os.path.exists(path):
+            raise ValueError(f"Account {username} does not exist.")
+        self.keyring.unlock(
+            username,
+            os.path.join(path, f"{username}_private_key.PEM"),
+            os.path.join(path, f"{username}_salt.bin"),
+            passphrase
+        )
+
+    def sign(self, username: str, message: bytes, passphrase: Optional[bytes] = None) -> bytes:
+        """
+        Sign a message with the account's key, unlocking it on first use.
+
+        Returns:
+            bytes: Signature
+        """
+        if not self.keyring.is_unlocked(username):
+            self.unlock_account(username, passphrase)
+        return self.keyring.sign(username, message)
+
     def load_account(self, username: str) -> Dict[str, str]:
         """
         Retrieve account information for the given username.
@@ -57,23 +171,27 @@ class UserAccountHandler:
         Returns:
             Dict[str, str]: Dictionary containing account details
         """
+        account_data = self.index.get(username)
+        if account_data is not None:
+            return account_data
+
         path: str = os.path.join(self.storage_dir, username)
         if not os.path.exists(path):
             raise ValueError(f"Account {username} does not exist.")
 
         with open(os.path.join(path, "account_info.toml"), "rb") as file:
-            account_data: Dict[str, str] = tomllib.load(file)
-
+            account_data = tomllib.load(file)
+        self.index.add(username, account_data.get("public_key", ""), path)
         return account_data
 
     def list_accounts(self) -> Tuple[str, ...]:
         """
-        Get a list of all stored account directories.
+        Get a list of all stored accounts from the index.
 
         Returns:
             Tuple[str]: Names of all existing accounts
         """
-        return tuple(os.listdir(self.storage_dir))
+        return self.index.usernames()
 
     def remove_account(self, username: str) -> str:
         """
@@ -86,4 +204,31 @@ class UserAccountHandler:
         """
         path: str = os.path.join(self.storage_dir, username)
         if not os.path.exists(path):
-            raise ValueError(f"Account {usern
+            raise ValueError(f"Account {username} does not exist.")
+
+        shutil.rmtree(path)
+        self.index.remove(username)
+        self.keyring.lock(username)
+        return f"Account {username} removed successfully."
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    handler = UserAccountHandler(tempfile.mkdtemp())
+    start = time.perf_counter()
+    handler.new_account("serial", passphrase=b"load test")
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    created = handler.bulk_create_accounts(2000, prefix="sim", passphrase=b"load test")
+    bulk = time.perf_counter() - start
+    print(f"Serial: {serial * 1000:.1f} ms per account, bulk: {bulk / len(created) * 1000:.2f} ms per account "
+          f"({len(created)} accounts on {os.cpu_count()} cores)")
+
+    start = time.perf_counter()
+    names = handler.list_accounts()
+    for name in names:
+        handler.load_account(name)
+    print(f"Listed and loaded {len(names)} accounts in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,171 @@
+"""
+Content-defined chunking and a reference counted chunk store.
+
+ContentDefinedChunker cuts a byte stream wherever a 32-byte Gear rolling hash
+matches a mask, so chunk boundaries follow the content instead of fixed
+offsets: an edit only changes the chunks it touches and identical data always
+yields identical chunks, no matter where it sits in a file. The rolling hash is
+evaluated with NumPy once per fed buffer, continuing from the previous tail, so
+every byte is hashed exactly once.
+
+ChunkStore keeps one physical copy per chunk digest together with a reference
+count; the owner (FileManager) decides where chunk bytes live on disk.
+"""
+
+import hashlib
+from bisect import bisect_left
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+Chunk = Union[bytes, bytearray, memoryview]
+
+_WINDOW = 32  # Bytes that influence each rolling hash value
+
+# Deterministic Gear table so every node cuts identical data identically
+GEAR = np.array(
+    [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:4], "little") for i in range(256)],
+    dtype=np.uint32
+)
+
+
+def gear_hashes(buffer: np.ndarray) -> np.ndarray:
+    """Rolling Gear hash (h = (h << 1) + GEAR[byte], 32-bit) for every position of a uint8 buffer."""
+    gear = GEAR[buffer]
+    hashes = gear.copy()
+    for shift in range(1, _WINDOW):
+        hashes[shift:] += gear[:-shift] << np.uint32(shift)
+    return hashes
+
+
+class ContentDefinedChunker:
+    def __init__(self, min_size: int = 2 * 1024, avg_size: int = 8 * 1024, max_size: int = 64 * 1024):
+        if not _WINDOW <= min_size <= avg_size <= max_size:
+            raise ValueError("Require 32 <= min_size <= avg_size <= max_size.")
+        self.min_size = min_size
+        self.max_size = max_size
+        bits = avg_size.bit_length() - 1
+        self.mask = np.uint32(((1 << bits) - 1) << (32 - bits))  # High bits see the whole window
+        self._pending = bytearray()
+        self._candidates: List[int] = []  # Positions in _pending whose hash matches the mask, ascending
+        self._scanned = 0  # Leading bytes of _pending already hashed into _candidates
+
+    def feed(self, data: Chunk) -> List[bytes]:
+        """Add data to the stream and return every chunk that is now final."""
+        self._pending += data
+        if len(self._pending) - self._scanned < self.min_size:
+            return []  # Hash in batches so small feeds do not pay NumPy call overhead per byte
+        self._scan()
+        return self._cut()
+
+    def flush(self) -> List[bytes]:
+        """Return the remaining chunks once the stream has ended."""
+        self._scan()
+        chunks = self._cut()
+        if self._pending:
+            chunks.append(bytes(self._pending))
+            self._pending.clear()
+        self._candidates = []
+        self._scanned = 0
+        return chunks
+
+    def _scan(self) -> None:
+        """Hash the bytes added since the last scan, continuing the rolling hash from the bytes before them."""
+        start = self._scanned
+        if start == len(self._pending):
+            return
+        context = min(start, _WINDOW - 1)  # Earlier bytes still inside the window of the new ones
+        hashes = gear_hashes(np.frombuffer(bytes(self._pending[start - context:]), dtype=np.uint8))[context:]
+        self._candidates.extend((np.flatnonzero((hashes & self.mask) == 0) + start).tolist())
+        self._scanned = len(self._pending)
+
+    def _cut(self) -> List[bytes]:
+        """
+        Emit every chunk whose boundary is already decided. A candidate before
+        max_size is final as soon as it is seen, so nothing waits for more
+        data than the chunk itself; only the undecided remainder is kept.
+        """
+        total = self._scanned
+        candidates = self._candidates
+        chunks: List[bytes] = []
+        last = 0
+        while True:
+            # A boundary after position p ends the chunk at p + 1
+            lo = last + self.min_size - 1
+            hi = min(last + self.max_size, total)
+            i = bisect_left(candidates, lo)
+            if i < len(candidates) and candidates[i] < hi:
+                end = candidates[i] + 1
+            elif total - last >= self.max_size:
+                end = last + self.max_size
+            else:
+                break  # Remainder waits for more data, or is emitted by flush()
+            chunks.append(bytes(self._pending[last:end]))
+            last = end
+
+        if last:
+            del self._pending[:last]
+            self._scanned -= last
+            self._candidates = [position - last for position in candidates[bisect_left(candidates, last):]]
+        return chunks
+
+
+class ChunkStore:
+    def __init__(self):
+        self.chunks: Dict[str, Dict] = {}  # digest -> location info plus "refs"
+
+    @staticmethod
+    def digest(chunk: Chunk) -> str:
+        return hashlib.sha256(chunk).hexdigest()
+
+    def retain(self, digest: str) -> bool:
+        """Add a reference to an existing chunk. Returns False if the chunk is not stored yet."""
+        entry = self.chunks.get(digest)
+        if entry is None:
+            return False
+        entry["refs"] += 1
+        return True
+
+    def add(self, digest: str, location: Dict) -> None:
+        """Register a newly written chunk with a single reference."""
+        self.chunks[digest] = dict(location, refs=1)
+
+    def release(self, digest: str) -> Optional[Dict]:
+        """Drop one reference. Returns the chunk's location once nothing refers to it anymore."""
+        entry = self.chunks[digest]
+        entry["refs"] -= 1
+        if entry["refs"] > 0:
+            return None
+        return self.chunks.pop(digest)
+
+    def stats(self) -> Dict[str, float]:
+        stored = sum(entry["length"] for entry in self.chunks.values())
+        logical = sum(entry["length"] * entry["refs"] for entry in self.chunks.values())
+        return {
+            "unique_chunks": len(self.chunks),
+            "stored_bytes": stored,
+            "logical_bytes": logical,
+            "dedup_ratio": logical / stored if stored else 1.0
+        }
+
+
+if __name__ == "__main__":
+    import os
+
+    original = os.urandom(4 * 1024 ** 2)
+    edited = original[:1_000_000] + b"small edit" + original[1_000_000:]
+
+    def chunk_all(data: bytes) -> List[bytes]:
+        chunker = ContentDefinedChunker()
+        out = []
+        for pos in range(0, len(data), 256 * 1024):
+            out += chunker.feed(data[pos:pos + 256 * 1024])
+        return out + chunker.flush()
+
+    first = chunk_all(original)
+    second = chunk_all(edited)
+    known = {ChunkStore.digest(c) for c in first}
+    new = [c for c in second if ChunkStore.digest(c) not in known]
+    print(f"Original: {len(first)} chunks, edited: {len(second)} chunks, "
+          f"new after edit: {len(new)} ({sum(map(len, new))} bytes)")
+    print(f"Reassembles: {b''.join(second) == edited}")
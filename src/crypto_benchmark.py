@@ -0,0 +1,77 @@
+"""
+Crypto backend benchmark
+
+Measures sign and verify throughput plus raw key and signature sizes in bytes
+(and the length of the text form keys take in configs) for every CryptoHandler backend, so the cost of switching
+CryptoFactory.use_handler(...) can be judged with real numbers.
+
+Usage:
+    python crypto_benchmark.py [seconds_per_measurement]
+"""
+
+import sys
+import time
+from typing import Callable, Dict, List
+
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives import hashes
+
+from crypto_handler import CryptoHandler
+from ecdsa_handler import ECDSAHandler
+from ed25519_handler import Ed25519Handler
+
+MESSAGE = b"ProtoLayer benchmark payload " * 8  # 232 bytes, about one transaction
+
+
+def ops_per_second(operation: Callable[[], object], duration: float) -> float:
+    """Run an operation repeatedly for roughly 'duration' seconds and return its rate."""
+    count = 0
+    start = time.perf_counter()
+    deadline = start + duration
+    while True:
+        for _ in range(50):
+            operation()
+        count += 50
+        now = time.perf_counter()
+        if now >= deadline:
+            return count / (now - start)
+
+
+def wire_public_key(handler: CryptoHandler, public_key) -> bytes:
+    """The public key as sent in packets: the configured point format for ECDSA, raw bytes for Ed25519."""
+    encode = getattr(handler, "encode_public_key", None) or handler.public_bytes
+    return encode(public_key)
+
+
+def benchmark_handler(name: str, handler: CryptoHandler, duration: float) -> Dict[str, object]:
+    private_key, public_key = handler.generate_keys()
+    signature = handler.sign_message(private_key, MESSAGE)
+
+    return {
+        "backend": name,
+        "sign_ops": ops_per_second(lambda: handler.sign_message(private_key, MESSAGE), duration),
+        "verify_ops": ops_per_second(lambda: handler.verify_signature(public_key, MESSAGE, signature), duration),
+        "key_bytes": len(wire_public_key(handler, public_key)),
+        "key_text_chars": len(handler.serialize_public_key(public_key)),
+        "signature_bytes": len(signature)
+    }
+
+
+def run(duration: float = 1.0) -> List[Dict[str, object]]:
+    backends = {
+        "ECDSA P-521/SHA-512 (default)": ECDSAHandler(),
+        "ECDSA P-521 compressed keys": ECDSAHandler(point_format="compressed"),
+        "ECDSA P-256/SHA-256": ECDSAHandler(ec.SECP256R1(), hashes.SHA256),
+        "Ed25519 (raw keys)": Ed25519Handler()
+    }
+    return [benchmark_handler(name, handler, duration) for name, handler in backends.items()]
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    results = run(seconds)
+
+    print(f"{'Backend':<32}{'sign/s':>10}{'verify/s':>10}{'key B':>8}{'key text':>10}{'sig B':>8}")
+    for row in results:
+        print(f"{row['backend']:<32}{row['sign_ops']:>10.0f}{row['verify_ops']:>10.0f}"
+              f"{row['key_bytes']:>8}{row['key_text_chars']:>10}{row['signature_bytes']:>8}")
@@ -1,6 +1,33 @@
-from typing import Any, Tuple
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
 from crypto_handler import CryptoHandler
 from ecdsa_handler import ECDSAHandler
+from verification_cache import VerificationCache
+
+# (public key, message, signature); the key may be an object or its serialized form
+VerificationItem = Tuple[Any, bytes, bytes]
+
+
+def _verify_chunk(handler: CryptoHandler, chunk: List[Tuple[Any, bytes, bytes]]) -> List[bool]:
+    """
+    Process pool worker: verify a chunk of (serialized key, message, signature) triples.
+    Each distinct key is parsed once per chunk, since quorum members sign many messages.
+    """
+    parsed: Dict[Any, Any] = {}
+    results: List[bool] = []
+    for serialized, message, signature in chunk:
+        key = parsed.get(serialized)
+        if key is None:
+            try:
+                key = parsed[serialized] = handler.deserialize_public_key(serialized)
+            except Exception:
+                results.append(False)
+                continue
+        results.append(handler.verify_signature(key, message, signature))
+    return results
 
 
 class CryptoFactory:
@@ -14,6 +41,13 @@ class CryptoFactory:
     # Default crypto handler instance
     _handler: CryptoHandler = ECDSAHandler()
 
+    # Worker processes for batch verification, created on first use
+    _pool: Optional[ProcessPoolExecutor] = None
+    _pool_workers: int = 0
+
+    # Successful verifications, so gossip duplicates skip the curve math
+    _verification_cache: VerificationCache = VerificationCache(100_000)
+
     @staticmethod
     def use_handler(handler: CryptoHandler) -> None:
         """
@@ -41,4 +75,216 @@ class CryptoFactory:
     @staticmethod
     def generate_keys() -> Tuple[Any, Any]:
         """Generate a fresh private/public key pair."""
-        return CryptoFactory.active_handler().generate_keys(
+        return CryptoFactory.active_handler().generate_keys()
+
+    @staticmethod
+    def get_crypto_handler() -> CryptoHandler:
+        """Alias of active_handler() used by account management."""
+        return CryptoFactory.active_handler()
+
+    @staticmethod
+    def view_public_key(public_key: Any) -> str:
+        """Serialize a public key into the active handler's text format."""
+        return CryptoFactory.active_handler().serialize_public_key(public_key)
+
+    @staticmethod
+    def sign_message(private_key: Any, message: bytes) -> bytes:
+        """Sign a message with the active handler."""
+        return CryptoFactory.active_handler().sign_message(private_key, message)
+
+    @staticmethod
+    def verify_signature(public_key: Any, message: bytes, signature: bytes) -> bool:
+        """Verify a signature with the active handler, answering repeats from the verification cache."""
+        handler = CryptoFactory.active_handler()
+        cache_key = CryptoFactory._cache_key(handler, public_key, message, signature)
+        if CryptoFactory._verification_cache.contains(cache_key):
+            return True
+        valid = handler.verify_signature(public_key, message, signature)
+        if valid:
+            CryptoFactory._verification_cache.add(cache_key)
+        return valid
+
+    @staticmethod
+    def verify_batch(items: Sequence[VerificationItem], fail_fast: bool = False,
+                     chunk_size: int = 2048, max_workers: Optional[int] = None) -> List[bool]:
+        """
+        Verify many (public key, message, signature) triples across a process pool.
+
+        Triples found in the verification cache are answered immediately. The rest
+        are shipped to workers in chunks of 'chunk_size'; key objects are
+        serialized first because they cannot be pickled. When no more than one
+        chunk is left it is verified in-process to skip the IPC round trip.
+
+        Args:
+            items: Triples to verify. Keys may be objects or serialized keys.
+            fail_fast: Stop scheduling work once any signature is invalid.
+                Items that were never checked are reported as False.
+            chunk_size: Number of triples per worker task.
+            max_workers: Process count (defaults to all cores).
+
+        Returns:
+            List[bool]: Validity of each item, in input order.
+        """
+        handler = CryptoFactory.active_handler()
+        cache = CryptoFactory._verification_cache
+        cache_keys = [CryptoFactory._cache_key(handler, *item) for item in items]
+        bitmap = [cache.contains(cache_key) for cache_key in cache_keys]
+
+        todo = [i for i, cached in enumerate(bitmap) if not cached]
+        if not todo:
+            return bitmap
+        if len(todo) <= chunk_size:
+            results = CryptoFactory._verify_in_process(handler, [items[i] for i in todo], fail_fast)
+        else:
+            wire_items = []
+            for i in todo:
+                key, message, signature = items[i]
+                wire_key = key if isinstance(key, (str, bytes)) else handler.serialize_public_key(key)
+                wire_items.append((wire_key, message, signature))
+            results = CryptoFactory._verify_in_pool(handler, wire_items, fail_fast, chunk_size, max_workers)
+
+        for i, valid in zip(todo, results):
+            if valid:
+                bitmap[i] = True
+                cache.add(cache_keys[i])
+        return bitmap
+
+    @staticmethod
+    def _cache_key(handler: CryptoHandler, public_key: Any, message: bytes, signature: bytes) -> bytes:
+        """
+        Cache key under the handler's full scheme (algorithm, curve and hash),
+        so swapping in a handler with other parameters never reuses a result.
+        Keys are identified by their point bytes, whatever form they came in.
+        """
+        return VerificationCache.make_key(CryptoFactory._cache_scheme(handler),
+                                          CryptoFactory._point_bytes(handler, public_key), message, signature)
+
+    @staticmethod
+    def _cache_scheme(handler: CryptoHandler) -> str:
+        parts = [type(handler).__name__]
+        curve = getattr(handler, "curve", None)
+        if curve is not None:
+            parts.append(curve.name)
+        hash_algorithm = getattr(handler, "hash_algorithm", None)
+        if hash_algorithm is not None:
+            parts.append(hash_algorithm.name)
+        return "/".join(parts)
+
+    @staticmethod
+    def _point_bytes(handler: CryptoHandler, public_key: Any) -> bytes:
+        """Compressed EC point or raw key bytes; serialized keys are parsed (through the handler's key cache) first."""
+        if isinstance(public_key, (str, bytes)):
+            try:
+                public_key = handler.deserialize_public_key(public_key)
+            except Exception:
+                # Unparsable keys never verify, so they never reach the cache
+                return public_key.encode("utf-8") if isinstance(public_key, str) else public_key
+        if isinstance(public_key, ec.EllipticCurvePublicKey):
+            return public_key.public_bytes(serialization.Encoding.X962, serialization.PublicFormat.CompressedPoint)
+        return public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+
+    @staticmethod
+    def _verify_in_process(handler: CryptoHandler, items: Sequence[VerificationItem], fail_fast: bool) -> List[bool]:
+        results: List[bool] = []
+        for public_key, message, signature in items:
+            try:
+                if isinstance(public_key, (str, bytes)):
+                    public_key = handler.deserialize_public_key(public_key)
+                valid = handler.verify_signature(public_key, message, signature)
+            except Exception:
+                valid = False
+            results.append(valid)
+            if fail_fast and not valid:
+                return results + [False] * (len(items) - len(results))
+        return results
+
+    @staticmethod
+    def _verify_in_pool(handler: CryptoHandler, wire_items: List[Tuple[Any, bytes, bytes]], fail_fast: bool,
+                        chunk_size: int, max_workers: Optional[int]) -> List[bool]:
+        pool = CryptoFactory._process_pool(max_workers)
+        futures = {
+            pool.submit(_verify_chunk, handler, wire_items[start:start + chunk_size]): start
+            for start in range(0, len(wire_items), chunk_size)
+        }
+
+        bitmap = [False] * len(wire_items)
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk_results = future.result()
+                start = futures[future]
+                bitmap[start:start + len(chunk_results)] = chunk_results
+                if fail_fast and not all(chunk_results):
+                    for other in pending:
+                        other.cancel()
+                    return bitmap
+        return bitmap
+
+    @staticmethod
+    def verification_cache_stats() -> Dict[str, float]:
+        """Hit/miss counters and occupancy of the signature verification cache."""
+        return CryptoFactory._verification_cache.stats()
+
+    @staticmethod
+    def configure_verification_cache(max_entries: int) -> None:
+        """Replace the verification cache with an empty one holding up to 'max_entries' results."""
+        CryptoFactory._verification_cache = VerificationCache(max_entries)
+
+    @staticmethod
+    def _process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+        workers = max_workers or os.cpu_count() or 1
+        if CryptoFactory._pool is None or CryptoFactory._pool_workers != workers:
+            CryptoFactory.shutdown_pool()
+            CryptoFactory._pool = ProcessPoolExecutor(max_workers=workers)
+            CryptoFactory._pool_workers = workers
+        return CryptoFactory._pool
+
+    @staticmethod
+    def shutdown_pool() -> None:
+        """Stop the batch verification worker processes."""
+        if CryptoFactory._pool is not None:
+            CryptoFactory._pool.shutdown(wait=True, cancel_futures=True)
+            CryptoFactory._pool = None
+
+    @staticmethod
+    def encrypt_message(public_key: Any, message: bytes) -> Tuple[bytes, bytes, bytes, bytes]:
+        """Encrypt a message for the holder of 'public_key'."""
+        return CryptoFactory.active_handler().symmetric_encrypt_message(public_key, message)
+
+    @staticmethod
+    def decrypt_message(private_key: Any, cipher_text: bytes, ephemeral_public_key_bytes: bytes, nonce: bytes, tag: bytes) -> bytes:
+        """Decrypt a message produced by encrypt_message."""
+        return CryptoFactory.active_handler().symmetric_decrypt_message(private_key, cipher_text, ephemeral_public_key_bytes, nonce, tag)
+
+
+if __name__ == "__main__":
+    import time
+
+    signers = [CryptoFactory.generate_keys() for _ in range(8)]
+    batch: List[VerificationItem] = []
+    for i in range(4000):
+        private_key, public_key = signers[i % len(signers)]
+        message = f"tx-{i}".encode()
+        batch.append((CryptoFactory.view_public_key(public_key), message, CryptoFactory.sign_message(private_key, message)))
+    batch[1234] = (batch[1234][0], b"tampered", batch[1234][2])
+
+    start = time.perf_counter()
+    handler = CryptoFactory.active_handler()
+    serial = [handler.verify_signature(handler.deserialize_public_key(k), m, s) for k, m, s in batch]
+    serial_time = time.perf_counter() - start
+
+    print(f"Fail-fast valid count: {sum(CryptoFactory.verify_batch(batch, fail_fast=True, chunk_size=250))}")
+    CryptoFactory.configure_verification_cache(100_000)
+
+    start = time.perf_counter()
+    bitmap = CryptoFactory.verify_batch(batch, chunk_size=250)
+    batch_time = time.perf_counter() - start
+
+    print(f"Serial: {serial_time:.2f}s, batch: {batch_time:.2f}s, same results: {serial == bitmap}")
+    print(f"Invalid items: {[i for i, ok in enumerate(bitmap) if not ok]}")
+
+    start = time.perf_counter()
+    CryptoFactory.verify_batch(batch, chunk_size=250)
+    print(f"Re-delivered batch: {time.perf_counter() - start:.3f}s, cache: {CryptoFactory.verification_cache_stats()}")
+    CryptoFactory.shutdown_pool()
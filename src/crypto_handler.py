@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Tuple, Any
+from typing import Optional, Tuple, Any
 
 class CryptoHandler(ABC):
     """
@@ -29,9 +29,21 @@ class CryptoHandler(ABC):
         pass
 
     @abstractmethod
-    def save_keys(self, private_key: Any, public_key: Any, file_name: str, directory: str = '.') -> str:
+    def deserialize_public_key(self, serialized: Any) -> Any:
         """
-        Persist both private and public keys to files. The private key is securely encrypted.
+        Rebuild a public key object from the output of serialize_public_key.
+
+        Returns:
+            Any: The public key object.
+        """
+        pass
+
+    @abstractmethod
+    def save_keys(self, private_key: Any, public_key: Any, file_name: str, directory: str = '.',
+                  passphrase: Optional[bytes] = None) -> str:
+        """
+        Persist both private and public keys to files. The private key is securely encrypted
+        with the passphrase (prompted for when not given).
 
         Returns:
             str: A confirmation message with the location of the saved keys.
@@ -39,9 +51,10 @@ class CryptoHandler(ABC):
         pass
 
     @abstractmethod
-    def load_private_key(self, filepath: str, salt_filepath: str) -> Any:
+    def load_private_key(self, filepath: str, salt_filepath: str, passphrase: Optional[bytes] = None) -> Any:
         """
         Retrieve a private key from a PEM file using a salt for decryption.
+        The passphrase is prompted for when not given.
 
         Returns:
             Any: The decrypted private key object.
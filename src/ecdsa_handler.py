@@ -1,21 +1,24 @@
 from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric.dh import DHPrivateKey
-from cryptography.hmat.primitives.asymmetric.dsa import DSAPrivateKey
+from cryptography.hazmat.primitives.asymmetric.dsa import DSAPrivateKey
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
 from cryptography.hazmat.primitives.asymmetric.ed448 import Ed448PrivateKey
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
 from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
 from cryptography.hazmat.primitives.asymmetric.x448 import X448PrivateKey
 from cryptography.hazmat.primitives.kdf.hkdf import HKDF
-from cryptography.hmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hmat.backends import default_backend
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.backends import default_backend
 
 import os
 import getpass
+from functools import lru_cache
 from crypto_handler import CryptoHandler
-from typing import Tuple
+from typing import Any, Dict, Optional, Tuple, Union
+
+PEM_PREFIX = b'-----BEGIN'
 
 def generate_salt(length: int = 16) -> bytes:
     """
@@ -31,12 +34,33 @@ class ECDSAHandler(CryptoHandler):
     ECDSA implementation of the ProtoLayer CryptoHandler base class.
     """
 
-    def __init__(self, curve: ec.EllipticCurve = ec.SECP521R1(), hash_algorithm=hashes.SHA512) -> None:
+    def __init__(self, curve: ec.EllipticCurve = ec.SECP521R1(), hash_algorithm=hashes.SHA512,
+                 point_format: str = 'pem', key_cache_size: int = 1024) -> None:
         """
         Initialize ECDSAHandler with the chosen elliptic curve and hash algorithm.
+
+        point_format selects how public keys are encoded for packets and ciphertext
+        envelopes: 'pem' (SubjectPublicKeyInfo) or 'compressed' (X9.62 compressed
+        point, 67 bytes on P-521 instead of ~268). Both formats are always accepted
+        when decoding. Parsed keys are kept in an LRU of 'key_cache_size' entries.
         """
+        if point_format not in ('pem', 'compressed'):
+            raise ValueError(f"Unsupported point format: {point_format}")
         self.curve: ec.EllipticCurve = curve
         self.hash_algorithm = hash_algorithm
+        self.point_format = point_format
+        self.key_cache_size = key_cache_size
+        self._parse_cached = lru_cache(maxsize=key_cache_size)(self._parse_public_key)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The key cache holds unpicklable key objects; worker processes rebuild their own
+        state = self.__dict__.copy()
+        state.pop('_parse_cached', None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._parse_cached = lru_cache(maxsize=self.key_cache_size)(self._parse_public_key)
 
     def generate_keys(self) -> Tuple[ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey]:
         """
@@ -46,26 +70,75 @@ class ECDSAHandler(CryptoHandler):
         public_key: ec.EllipticCurvePublicKey = private_key.public_key()
         return private_key, public_key
 
-    def serialize_public_key(self, public_key: ec.EllipticCurvePublicKey) -> str:
+    def encode_public_key(self, public_key: ec.EllipticCurvePublicKey) -> bytes:
         """
-        Convert the public key to PEM format.
+        Encode a public key in the configured point format.
 
         Returns:
-            str: PEM-formatted public key
+            bytes: PEM bytes or the compressed point
         """
+        if self.point_format == 'compressed':
+            return public_key.public_bytes(
+                encoding=serialization.Encoding.X962,
+                format=serialization.PublicFormat.CompressedPoint
+            )
         return public_key.public_bytes(
             encoding=serialization.Encoding.PEM,
             format=serialization.PublicFormat.SubjectPublicKeyInfo
-        ).decode('utf-8')
+        )
+
+    def serialize_public_key(self, public_key: ec.EllipticCurvePublicKey) -> str:
+        """
+        Convert the public key to text in the configured point format.
+
+        Returns:
+            str: PEM-formatted public key, or the compressed point in hex
+        """
+        encoded = self.encode_public_key(public_key)
+        return encoded.hex() if self.point_format == 'compressed' else encoded.decode('utf-8')
+
+    def decode_public_key(self, encoded: Union[str, bytes]) -> ec.EllipticCurvePublicKey:
+        """
+        Load a public key from PEM or compressed point form (bytes or hex text).
+        Results are cached by encoded bytes, so repeated keys are parsed only once.
+
+        Returns:
+            EllipticCurvePublicKey: Loaded public key
+        """
+        if isinstance(encoded, str):
+            encoded = encoded.encode('utf-8') if encoded.startswith(PEM_PREFIX.decode()) else bytes.fromhex(encoded)
+        return self._parse_cached(bytes(encoded))
+
+    def _parse_public_key(self, data: bytes) -> ec.EllipticCurvePublicKey:
+        if data.startswith(PEM_PREFIX):
+            return serialization.load_pem_public_key(data, backend=default_backend())  # type: ignore
+        return ec.EllipticCurvePublicKey.from_encoded_point(self.curve, data)
 
-    def save_keys(self, private_key: ec.EllipticCurvePrivateKey, public_key: ec.EllipticCurvePublicKey, file_name: str, directory: str = '.') -> str:
+    def key_cache_info(self) -> Dict[str, int]:
+        """Hit/miss counters of the parsed public key cache."""
+        info = self._parse_cached.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "entries": info.currsize, "max_entries": info.maxsize or 0}
+
+    def deserialize_public_key(self, serialized: Union[str, bytes]) -> ec.EllipticCurvePublicKey:
+        """
+        Load a public key from the output of serialize_public_key (PEM or compressed hex).
+
+        Returns:
+            EllipticCurvePublicKey: Loaded public key
         """
-        Saves the private and public keys to PEM files. Encrypts the private key using a passphrase.
+        return self.decode_public_key(serialized)
+
+    def save_keys(self, private_key: ec.EllipticCurvePrivateKey, public_key: ec.EllipticCurvePublicKey, file_name: str, directory: str = '.',
+                  passphrase: Optional[bytes] = None) -> str:
+        """
+        Saves the private and public keys to PEM files. Encrypts the private key using a passphrase,
+        which is prompted for when not given.
 
         Returns:
             str: Confirmation message
         """
-        passphrase: bytes = getpass.getpass(prompt="Enter passphrase for private key encryption: ").encode()
+        if passphrase is None:
+            passphrase = getpass.getpass(prompt="Enter passphrase for private key encryption: ").encode()
         salt: bytes = generate_salt()
 
         kdf = PBKDF2HMAC(
@@ -88,28 +161,29 @@ class ECDSAHandler(CryptoHandler):
             format=serialization.PublicFormat.SubjectPublicKeyInfo
         )
 
-        private_key_path: str = f'{directory}\\{file_name}_private_key.PEM'
+        private_key_path: str = os.path.join(directory, f'{file_name}_private_key.PEM')
         with open(private_key_path, 'wb') as private_key_file:
             private_key_file.write(encrypted_private_key)
 
-        public_key_path: str = f'{directory}\\{file_name}_public_key.PEM'
+        public_key_path: str = os.path.join(directory, f'{file_name}_public_key.PEM')
         with open(public_key_path, 'wb') as public_key_file:
             public_key_file.write(public_key_bytes)
 
-        salt_path = f'{directory}\\{file_name}_salt.bin'
+        salt_path = os.path.join(directory, f'{file_name}_salt.bin')
         with open(salt_path, 'wb') as salt_file:
             salt_file.write(salt)
 
         return f'{file_name} wallet keys saved successfully in {directory}'
 
-    def load_private_key(self, filepath: str, salt_filepath: str) -> ec.EllipticCurvePrivateKey:
+    def load_private_key(self, filepath: str, salt_filepath: str, passphrase: Optional[bytes] = None) -> ec.EllipticCurvePrivateKey:
         """
-        Load an encrypted private key from a PEM file.
+        Load an encrypted private key from a PEM file, prompting for the passphrase when not given.
 
         Returns:
             EllipticCurvePrivateKey: The loaded private key
         """
-        passphrase: bytes = getpass.getpass(prompt='Enter passphrase for private key: ').encode()
+        if passphrase is None:
+            passphrase = getpass.getpass(prompt='Enter passphrase for private key: ').encode()
 
         with open(salt_filepath, 'rb') as salt_file:
             salt = salt_file.read()
@@ -201,10 +275,7 @@ class ECDSAHandler(CryptoHandler):
         ).encryptor()
         ciphertext = encryptor.update(message) + encryptor.finalize()
 
-        return ciphertext, ephemeral_public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        ), nonce, encryptor.tag
+        return ciphertext, self.encode_public_key(ephemeral_public_key), nonce, encryptor.tag
 
     def symmetric_decrypt_message(self, private_key: ec.EllipticCurvePrivateKey, cipher_text: bytes, ephemeral_public_key_bytes: bytes, nonce: bytes, tag: bytes) -> bytes:
         """
@@ -213,7 +284,7 @@ class ECDSAHandler(CryptoHandler):
         Returns:
             bytes: Decrypted message
         """
-        ephemeral_public_key = serialization.load_pem_public_key(ephemeral_public_key_bytes, backend=default_backend())
+        ephemeral_public_key = self.decode_public_key(ephemeral_public_key_bytes)
         derived_key = self.derive_symmetric_key(private_key, ephemeral_public_key)
         decryptor = Cipher(algorithms.AES(derived_key), modes.GCM(nonce, tag), backend=default_backend()).decryptor()
         return decryptor.update(cipher_text) + decryptor.finalize()
@@ -228,4 +299,23 @@ class ECDSAHandler(CryptoHandler):
         ephemeral_private_key = ec.generate_private_key(public_key.curve, default_backend())
         ephemeral_public_key = ephemeral_private_key.public_key()
         shared_secret = ephemeral_private_key.exchange(ec.ECDH(), public_key)
-        derived_key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b
+        derived_key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b'handshake data', backend=default_backend()).derive(shared_secret)
+
+        nonce = os.urandom(12)
+        encryptor = Cipher(algorithms.AES(derived_key), modes.GCM(nonce), backend=default_backend()).encryptor()
+        ciphertext = encryptor.update(message) + encryptor.finalize()
+
+        return ciphertext, self.encode_public_key(ephemeral_public_key), nonce, encryptor.tag
+
+    def asymmetric_decrypt_message(self, private_key: ec.EllipticCurvePrivateKey, encrypted_message: bytes, ephemeral_public_key_bytes: bytes, nonce: bytes, tag: bytes) -> bytes:
+        """
+        Decrypt an asymmetrically encrypted message using the private key.
+
+        Returns:
+            bytes: Decrypted message
+        """
+        ephemeral_public_key = self.decode_public_key(ephemeral_public_key_bytes)
+        shared_secret = private_key.exchange(ec.ECDH(), ephemeral_public_key)  # type: ignore
+        derived_key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b'handshake data', backend=default_backend()).derive(shared_secret)
+        decryptor = Cipher(algorithms.AES(derived_key), modes.GCM(nonce, tag), backend=default_backend()).decryptor()
+        return decryptor.update(encrypted_message) + decryptor.finalize()
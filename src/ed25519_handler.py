@@ -0,0 +1,272 @@
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.backends import default_backend
+
+import os
+import getpass
+from crypto_handler import CryptoHandler
+from ecdsa_handler import generate_salt
+from typing import Optional, Tuple, Union
+
+RAW_KEY_SIZE = 32
+SIGNATURE_SIZE = 64
+
+PublicKeyLike = Union[Ed25519PublicKey, bytes, str]
+ExchangeKeyLike = Union[X25519PublicKey, bytes, str]
+
+
+def _raw(key: Union[bytes, str]) -> bytes:
+    """Accept raw 32-byte keys either as bytes or as hex text."""
+    data = bytes.fromhex(key) if isinstance(key, str) else bytes(key)
+    if len(data) != RAW_KEY_SIZE:
+        raise ValueError(f"Expected a {RAW_KEY_SIZE}-byte raw key, got {len(data)} bytes.")
+    return data
+
+
+class Ed25519Handler(CryptoHandler):
+    """
+    Ed25519 implementation of the ProtoLayer CryptoHandler base class.
+
+    Keys travel as 32 raw bytes (hex encoded where text is needed) instead of
+    PEM. Ed25519 keys can only sign, so the key-exchange and encryption methods
+    work with X25519 keys; generate_exchange_keys() creates that second pair.
+    """
+
+    # ----------------- Key Handling -----------------
+    def generate_keys(self) -> Tuple[Ed25519PrivateKey, Ed25519PublicKey]:
+        """
+        Create a new Ed25519 signing key pair.
+        """
+        private_key = Ed25519PrivateKey.generate()
+        return private_key, private_key.public_key()
+
+    def generate_exchange_keys(self) -> Tuple[X25519PrivateKey, X25519PublicKey]:
+        """
+        Create a new X25519 key pair for key exchange and encryption.
+        """
+        private_key = X25519PrivateKey.generate()
+        return private_key, private_key.public_key()
+
+    @staticmethod
+    def public_bytes(public_key: Union[Ed25519PublicKey, X25519PublicKey]) -> bytes:
+        """
+        Returns:
+            bytes: The 32-byte raw public key
+        """
+        return public_key.public_bytes(encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw)
+
+    @staticmethod
+    def load_public_bytes(public_key: PublicKeyLike) -> Ed25519PublicKey:
+        """
+        Turn a raw (bytes or hex) signing key into a key object. Key objects pass through.
+        """
+        if isinstance(public_key, Ed25519PublicKey):
+            return public_key
+        return Ed25519PublicKey.from_public_bytes(_raw(public_key))
+
+    @staticmethod
+    def load_exchange_bytes(public_key: ExchangeKeyLike) -> X25519PublicKey:
+        """
+        Turn a raw (bytes or hex) X25519 key into a key object. Key objects pass through.
+        """
+        if isinstance(public_key, X25519PublicKey):
+            return public_key
+        return X25519PublicKey.from_public_bytes(_raw(public_key))
+
+    def serialize_public_key(self, public_key: Union[Ed25519PublicKey, X25519PublicKey]) -> str:
+        """
+        Convert the public key to its raw hex representation.
+
+        Returns:
+            str: 64 hex characters
+        """
+        return self.public_bytes(public_key).hex()
+
+    def deserialize_public_key(self, serialized: PublicKeyLike) -> Ed25519PublicKey:
+        """
+        Load a signing key from its raw hex (or raw bytes) form.
+
+        Returns:
+            Ed25519PublicKey: Loaded public key
+        """
+        return self.load_public_bytes(serialized)
+
+    def save_keys(self, private_key: Ed25519PrivateKey, public_key: Ed25519PublicKey, file_name: str, directory: str = '.',
+                  passphrase: Optional[bytes] = None) -> str:
+        """
+        Saves the private key as passphrase encrypted PKCS8 and the public key as 32 raw bytes.
+        The passphrase is prompted for when not given.
+
+        Returns:
+            str: Confirmation message
+        """
+        if passphrase is None:
+            passphrase = getpass.getpass(prompt="Enter passphrase for private key encryption: ").encode()
+        salt: bytes = generate_salt()
+
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=salt,
+            iterations=100_000,
+            backend=default_backend()
+        )
+        key = kdf.derive(passphrase)
+
+        encrypted_private_key: bytes = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.BestAvailableEncryption(key)
+        )
+
+        with open(os.path.join(directory, f'{file_name}_private_key.PEM'), 'wb') as private_key_file:
+            private_key_file.write(encrypted_private_key)
+
+        with open(os.path.join(directory, f'{file_name}_public_key.bin'), 'wb') as public_key_file:
+            public_key_file.write(self.public_bytes(public_key))
+
+        with open(os.path.join(directory, f'{file_name}_salt.bin'), 'wb') as salt_file:
+            salt_file.write(salt)
+
+        return f'{file_name} wallet keys saved successfully in {directory}'
+
+    def load_private_key(self, filepath: str, salt_filepath: str, passphrase: Optional[bytes] = None) -> Ed25519PrivateKey:
+        """
+        Load an encrypted Ed25519 private key from a PEM file, prompting for the passphrase when not given.
+
+        Returns:
+            Ed25519PrivateKey: The loaded private key
+        """
+        if passphrase is None:
+            passphrase = getpass.getpass(prompt='Enter passphrase for private key: ').encode()
+
+        with open(salt_filepath, 'rb') as salt_file:
+            salt = salt_file.read()
+
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=salt,
+            iterations=100_000,
+            backend=default_backend()
+        )
+        key: bytes = kdf.derive(passphrase)
+
+        with open(filepath, 'rb') as key_file:
+            private_key = serialization.load_pem_private_key(key_file.read(), password=key, backend=default_backend())
+        if not isinstance(private_key, Ed25519PrivateKey):
+            raise ValueError(f"{filepath} does not contain an Ed25519 private key.")
+        return private_key
+
+    def load_public_key(self, filepath: str) -> Ed25519PublicKey:
+        """
+        Load a public key saved as 32 raw bytes (or 64 hex characters).
+
+        Returns:
+            Ed25519PublicKey: Loaded public key
+        """
+        with open(filepath, 'rb') as key_file:
+            data = key_file.read()
+        return self.load_public_bytes(data if len(data) == RAW_KEY_SIZE else data.decode().strip())
+
+    # ----------------- Signatures -----------------
+    def sign_message(self, private_key: Ed25519PrivateKey, message: bytes) -> bytes:
+        """
+        Sign a message using the private key.
+
+        Returns:
+            bytes: 64-byte signature
+        """
+        return private_key.sign(message)
+
+    def verify_signature(self, public_key: PublicKeyLike, message: bytes, signature: bytes) -> bool:
+        """
+        Verify a signature. The public key may be a key object, raw bytes or hex text.
+
+        Returns:
+            bool: True if signature is valid
+        """
+        try:
+            self.load_public_bytes(public_key).verify(signature, message)
+            return True
+        except Exception:
+            return False
+
+    # ----------------- Key Exchange / Encryption -----------------
+    def derive_symmetric_key(self, private_key: X25519PrivateKey, public_key: ExchangeKeyLike) -> bytes:
+        """
+        Generate a symmetric key from an X25519 shared secret.
+
+        Returns:
+            bytes: Derived symmetric key
+        """
+        shared_secret = private_key.exchange(self.load_exchange_bytes(public_key))
+        return HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=b'handshake data',
+            backend=default_backend()
+        ).derive(shared_secret)
+
+    def symmetric_encrypt_message(self, public_key: ExchangeKeyLike, message: bytes) -> Tuple[bytes, bytes, bytes, bytes]:
+        """
+        Encrypt for an X25519 recipient using an ephemeral X25519 key and AES-GCM.
+
+        Returns:
+            Tuple[bytes, bytes, bytes, bytes]: ciphertext, raw ephemeral public key, nonce, tag
+        """
+        ephemeral_private_key = X25519PrivateKey.generate()
+        derived_key = self.derive_symmetric_key(ephemeral_private_key, public_key)
+
+        nonce = os.urandom(12)
+        encryptor = Cipher(algorithms.AES(derived_key), modes.GCM(nonce), backend=default_backend()).encryptor()
+        ciphertext = encryptor.update(message) + encryptor.finalize()
+        return ciphertext, self.public_bytes(ephemeral_private_key.public_key()), nonce, encryptor.tag
+
+    def symmetric_decrypt_message(self, private_key: X25519PrivateKey, cipher_text: bytes, ephemeral_public_key_bytes: bytes, nonce: bytes, tag: bytes) -> bytes:
+        """
+        Decrypt a message produced by symmetric_encrypt_message.
+
+        Returns:
+            bytes: Decrypted message
+        """
+        derived_key = self.derive_symmetric_key(private_key, ephemeral_public_key_bytes)
+        decryptor = Cipher(algorithms.AES(derived_key), modes.GCM(nonce, tag), backend=default_backend()).decryptor()
+        return decryptor.update(cipher_text) + decryptor.finalize()
+
+    def asymmetric_encrypt_message(self, public_key: ExchangeKeyLike, message: bytes) -> Tuple[bytes, bytes, bytes, bytes]:
+        """
+        Encrypt a message for an X25519 recipient (ECIES style, same envelope as symmetric_encrypt_message).
+
+        Returns:
+            Tuple[bytes, bytes, bytes, bytes]: ciphertext, raw ephemeral public key, nonce, tag
+        """
+        return self.symmetric_encrypt_message(public_key, message)
+
+    def asymmetric_decrypt_message(self, private_key: X25519PrivateKey, encrypted_message: bytes, ephemeral_public_key_bytes: bytes, nonce: bytes, tag: bytes) -> bytes:
+        """
+        Decrypt a message produced by asymmetric_encrypt_message.
+
+        Returns:
+            bytes: Decrypted message
+        """
+        return self.symmetric_decrypt_message(private_key, encrypted_message, ephemeral_public_key_bytes, nonce, tag)
+
+
+if __name__ == "__main__":
+    handler = Ed25519Handler()
+    private_key, public_key = handler.generate_keys()
+    wire_key = handler.serialize_public_key(public_key)
+    print(f"Public key ({len(wire_key) // 2} bytes raw): {wire_key}")
+
+    signature = handler.sign_message(private_key, b"ProtoLayer")
+    print(f"Signature ({len(signature)} bytes) valid from hex key: {handler.verify_signature(wire_key, b'ProtoLayer', signature)}")
+
+    exchange_private, exchange_public = handler.generate_exchange_keys()
+    envelope = handler.symmetric_encrypt_message(handler.public_bytes(exchange_public), b"Hello over X25519")
+    print(f"Decrypted: {handler.symmetric_decrypt_message(exchange_private, *envelope)}")
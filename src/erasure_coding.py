@@ -0,0 +1,161 @@
+"""
+ReedSolomonCodec
+
+Systematic Reed-Solomon erasure coding over GF(256), vectorised with NumPy.
+A payload is split into k data shards and m parity shards; any k of the k+m
+shards are enough to rebuild the payload, so a 4+2 layout survives the loss of
+two partners at 1.5x the stored bytes instead of 3x for full replicas.
+
+The generator matrix is the k x k identity stacked on an m x k Cauchy matrix,
+which keeps every k-row subset invertible. Field multiplication is a lookup
+into a 256 x 256 table, so encoding a shard is one fancy-index plus XOR per
+coefficient and never loops over bytes in Python.
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+_PRIMITIVE_POLY = 0x11D
+
+
+def _build_tables():
+    exp = np.zeros(512, dtype=np.uint8)
+    log = np.zeros(256, dtype=np.int32)
+    x = 1
+    for i in range(255):
+        exp[i] = x
+        log[x] = i
+        x <<= 1
+        if x & 0x100:
+            x ^= _PRIMITIVE_POLY
+    exp[255:510] = exp[:255]
+
+    # Full multiplication table: MUL[a, b] == a * b in GF(256)
+    nonzero = np.arange(1, 256)
+    mul = np.zeros((256, 256), dtype=np.uint8)
+    mul[1:, 1:] = exp[(log[nonzero][:, None] + log[nonzero][None, :]) % 255]
+    return exp, log, mul
+
+
+GF_EXP, GF_LOG, GF_MUL = _build_tables()
+
+
+def gf_inverse(a: int) -> int:
+    if a == 0:
+        raise ZeroDivisionError("Zero has no inverse in GF(256).")
+    return int(GF_EXP[255 - GF_LOG[a]])
+
+
+def gf_invert_matrix(matrix: np.ndarray) -> np.ndarray:
+    """Gauss-Jordan inversion of a square matrix over GF(256)."""
+    n = matrix.shape[0]
+    work = np.concatenate([matrix.astype(np.uint8), np.eye(n, dtype=np.uint8)], axis=1)
+    for col in range(n):
+        pivot = next((r for r in range(col, n) if work[r, col]), None)
+        if pivot is None:
+            raise ValueError("Matrix is singular over GF(256).")
+        if pivot != col:
+            work[[col, pivot]] = work[[pivot, col]]
+        work[col] = GF_MUL[gf_inverse(int(work[col, col])), work[col]]
+        for row in range(n):
+            if row != col and work[row, col]:
+                work[row] ^= GF_MUL[int(work[row, col]), work[col]]
+    return work[:, n:]
+
+
+def gf_matmul(coefficients: np.ndarray, shards: np.ndarray) -> np.ndarray:
+    """Multiply an (r x k) coefficient matrix with (k x L) shard rows over GF(256)."""
+    out = np.zeros((coefficients.shape[0], shards.shape[1]), dtype=np.uint8)
+    for i, row in enumerate(coefficients):
+        for j, coef in enumerate(row):
+            if coef == 1:
+                out[i] ^= shards[j]
+            elif coef:
+                out[i] ^= GF_MUL[coef][shards[j]]
+    return out
+
+
+class ReedSolomonCodec:
+    def __init__(self, data_shards: int = 4, parity_shards: int = 2):
+        if data_shards < 1 or parity_shards < 0 or data_shards + parity_shards > 256:
+            raise ValueError("Require 1 <= k and k + m <= 256 shards.")
+        self.k = data_shards
+        self.m = parity_shards
+
+        # Cauchy rows 1 / (x_i ^ y_j) with x_i = k + i and y_j = j (all distinct)
+        cauchy = np.zeros((self.m, self.k), dtype=np.uint8)
+        for i in range(self.m):
+            for j in range(self.k):
+                cauchy[i, j] = gf_inverse((self.k + i) ^ j)
+        self.parity_matrix = cauchy
+        self.generator = np.concatenate([np.eye(self.k, dtype=np.uint8), cauchy], axis=0)
+
+    @property
+    def total_shards(self) -> int:
+        return self.k + self.m
+
+    def shard_length(self, payload_length: int) -> int:
+        return max(1, -(-payload_length // self.k))
+
+    def encode(self, payload: bytes) -> List[bytes]:
+        """
+        Split a payload into k data shards (zero padded) followed by m parity shards.
+
+        Returns:
+            List[bytes]: k + m shards of equal length
+        """
+        length = self.shard_length(len(payload))
+        data = np.zeros(self.k * length, dtype=np.uint8)
+        data[:len(payload)] = np.frombuffer(payload, dtype=np.uint8)
+        data = data.reshape(self.k, length)
+
+        parity = gf_matmul(self.parity_matrix, data)
+        return [row.tobytes() for row in data] + [row.tobytes() for row in parity]
+
+    def decode(self, shards: Sequence[Optional[bytes]], payload_length: int) -> bytes:
+        """
+        Rebuild the payload from k + m shard slots, where missing shards are None.
+        When all data shards are present they are simply concatenated.
+        """
+        if len(shards) != self.total_shards:
+            raise ValueError(f"Expected {self.total_shards} shard slots, got {len(shards)}.")
+
+        if all(shards[i] is not None for i in range(self.k)):
+            return b"".join(shards[:self.k])[:payload_length]  # type: ignore[arg-type]
+
+        present = [i for i, shard in enumerate(shards) if shard is not None]
+        if len(present) < self.k:
+            raise ValueError(f"Only {len(present)} of {self.k} required shards are available.")
+
+        rows = present[:self.k]
+        decode_matrix = gf_invert_matrix(self.generator[rows])
+        available = np.stack([np.frombuffer(shards[i], dtype=np.uint8) for i in rows])  # type: ignore[arg-type]
+
+        missing = [i for i in range(self.k) if shards[i] is None]
+        rebuilt = dict(zip(missing, gf_matmul(decode_matrix[missing], available)))
+        data = [shards[i] if shards[i] is not None else rebuilt[i].tobytes() for i in range(self.k)]
+        return b"".join(data)[:payload_length]  # type: ignore[arg-type]
+
+
+if __name__ == "__main__":
+    import os
+    import time
+
+    codec = ReedSolomonCodec(4, 2)
+    payload = os.urandom(16 * 1024 ** 2 + 7)
+
+    start = time.perf_counter()
+    shards = codec.encode(payload)
+    encode_time = time.perf_counter() - start
+    print(f"Encoded {len(payload)} bytes into {len(shards)} shards of {len(shards[0])} bytes "
+          f"({len(payload) / encode_time / 1024 ** 2:.1f} MiB/s)")
+
+    damaged: List[Optional[bytes]] = list(shards)
+    damaged[0] = None
+    damaged[3] = None
+    start = time.perf_counter()
+    restored = codec.decode(damaged, len(payload))
+    decode_time = time.perf_counter() - start
+    print(f"Degraded decode with 2 shards missing: {restored == payload} "
+          f"({len(payload) / decode_time / 1024 ** 2:.1f} MiB/s)")
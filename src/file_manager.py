@@ -1,72 +1,312 @@
-from typing import Dict, Optional, List
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Dict, Iterable, Iterator, Optional, List, Set, Tuple, Union
+from bisect import bisect_right
+import asyncio
+import hashlib
+import heapq
+import itertools
+import os
+import threading
 import time
 
+from chunk_store import ChunkStore, ContentDefinedChunker
+from erasure_coding import ReedSolomonCodec
+from sector_allocator import SectorAllocator
+from sector_manager import SectorManager
+from stream_encryption import DEFAULT_CHUNK_SIZE as ENCRYPTION_CHUNK_SIZE, decrypt_range, decrypt_stream, encrypt_stream, encrypted_size
+
+Chunk = Union[bytes, bytearray, memoryview]
+STREAM_CHUNK_SIZE = 1024 * 1024  # Default read size for streaming APIs
+CHUNK_PREFIX = "chunk:"  # sector_map key prefix for deduplicated chunks
+MUTATION_RETENTION = 10_000  # Mutations kept per SectorManager before older ones are folded into its checkpoint
+
+
 class FileManager:
-    def __init__(self):
+    def __init__(self, storage_dir: str = "sectors", sector_size: int = 0, deduplicate: bool = False):
+        self.storage_dir: str = storage_dir
+        if not os.path.exists(storage_dir):
+            os.makedirs(storage_dir)
+
+        self.allocator = SectorAllocator(sector_size)
         self.user_index: Dict[str, Dict] = {}  # Maps @user to file metadata
-        self.sector_map: Dict[str, Dict] = {}  # sector_id -> {file_id: content}
+        self.sector_map: Dict[str, Dict] = {}  # sector_id -> {file_id: offset}
         self.allocation_table: Dict[str, Dict] = {}  # file_id -> allocation info
+        self.sector_managers: Dict[str, SectorManager] = {}  # sector_id -> mutation tracker
+        self._expiry_heap: List[Tuple[float, str]] = []  # (expires_at, file_id), lazily invalidated
+        self._mutation_seq = 0
+        self.mutation_retention = MUTATION_RETENTION
+        self._staging_seq = itertools.count()
+        self.unavailable_sectors: Set[str] = set()  # Partner sectors that cannot currently serve reads
+        self._codecs: Dict[Tuple[int, int], ReedSolomonCodec] = {}
+        self.deduplicate = deduplicate  # Store files as content-defined chunk lists
+        self.chunk_store = ChunkStore()
 
-    def create_file(self, user: str, file_name: str, content: str, *,
-                    mutable: bool = True,
-                    storage_type: str = "slow",
-                    replication: int = 1,
-                    ttl: Optional[int] = None) -> str:
-        file_id = f"{user}/{file_name}"
-        sector_id = f"sector_{len(self.sector_map)+1}"
-        offset = 0
-        length = len(content)
+        self._handles: Dict[str, BinaryIO] = {}  # sector_id -> open sector file
+        self._lock = threading.RLock()
+        self._workers: List[threading.Thread] = []
+        self._stop_workers = threading.Event()
+
+    # ----------------- Sector Files -----------------
+    def sector_path(self, sector_id: str) -> str:
+        return os.path.join(self.storage_dir, f"{sector_id}.sector")
+
+    def _sector_handle(self, sector_id: str) -> BinaryIO:
+        handle = self._handles.get(sector_id)
+        if handle is None:
+            path = self.sector_path(sector_id)
+            handle = open(path, "r+b" if os.path.exists(path) else "w+b")
+            self._handles[sector_id] = handle
+        return handle
+
+    def _write_at(self, sector_id: str, offset: int, data: Chunk) -> None:
+        handle = self._sector_handle(sector_id)
+        handle.seek(offset)
+        handle.write(data)
+        handle.flush()
+
+    def _read_at(self, sector_id: str, offset: int, length: int) -> bytes:
+        handle = self._sector_handle(sector_id)
+        handle.seek(offset)
+        return handle.read(length)
+
+    def _reserve(self, file_id: str, length: int) -> Dict:
+        sector_id, offset, reserved = self.allocator.allocate(length)
+        self.sector_map.setdefault(sector_id, {})[file_id] = offset
+        return {"sector_id": sector_id, "offset": offset, "length": length, "reserved": reserved}
+
+    def _allocate(self, file_id: str, data: bytes) -> Dict:
+        loc = self._reserve(file_id, len(data))
+        try:
+            self._write_at(loc["sector_id"], loc["offset"], data)
+        except Exception:
+            self._release(file_id, loc)
+            raise
+        return loc
 
-        # Store metadata
+    def _release(self, file_id: str, loc: Dict) -> None:
+        self.allocator.free(loc["sector_id"], loc["offset"])
+        files = self.sector_map.get(loc["sector_id"], {})
+        if files.get(file_id) == loc["offset"]:  # A replacement may already own the entry
+            del files[file_id]
+
+    def _release_file(self, file_id: str, loc: Dict, shards: Optional[Dict[str, Dict]] = None) -> List[Tuple[str, str]]:
+        """
+        Free every extent backing a file (one extent, or one per erasure coded shard).
+        Shard locations come from 'shards' when given (see _detach), otherwise they
+        are popped from the allocation table.
+
+        Returns:
+            List[Tuple[str, str]]: (sector_id, stored_id) pairs that were released
+        """
+        if "chunks" in loc:
+            return self._drop_chunks(loc["chunks"])
+        if "erasure" not in loc:
+            self._release(file_id, loc)
+            return [(loc["sector_id"], file_id)]
+
+        released = []
+        for shard_id in loc["erasure"]["shards"]:
+            shard_loc = shards[shard_id] if shards is not None else self.allocation_table.pop(shard_id)
+            self._release(shard_id, shard_loc)
+            released.append((shard_loc["sector_id"], shard_id))
+        return released
+
+    def _detach(self, file_id: str) -> Optional[Tuple[Dict, Dict[str, Dict]]]:
+        """
+        Take an existing file's allocation (and shard entries) out of the table
+        while its replacement is stored. Hand the result to _reattach if storing
+        fails, or to _release_detached once the replacement is in place.
+        """
+        loc = self.allocation_table.pop(file_id, None)
+        if loc is None:
+            return None
+        shard_ids = loc["erasure"]["shards"] if "erasure" in loc else []
+        return loc, {shard_id: self.allocation_table.pop(shard_id) for shard_id in shard_ids}
+
+    def _reattach(self, file_id: str, detached: Optional[Tuple[Dict, Dict[str, Dict]]]) -> None:
+        if detached is None:
+            return
+        loc, shards = detached
+        self.allocation_table[file_id] = loc
+        extents = dict(shards) if "erasure" in loc else ({} if "chunks" in loc else {file_id: loc})
+        for stored_id, extent in extents.items():
+            self.allocation_table[stored_id] = extent
+            self.sector_map.setdefault(extent["sector_id"], {})[stored_id] = extent["offset"]
+
+    def _release_detached(self, file_id: str, detached: Optional[Tuple[Dict, Dict[str, Dict]]], user: str) -> None:
+        """Free the extents of a file version that has been replaced."""
+        if detached is None:
+            return
+        loc, shards = detached
+        for sector_id, stored_id in self._release_file(file_id, loc, shards):
+            self._record_mutation(sector_id, "delete", [stored_id], user)
+
+    def _register(self, user: str, file_name: str, *, mutable: bool, storage_type: str,
+                  replication: int, ttl: Optional[int]) -> str:
+        file_id = f"{user}/{file_name}"
+        created_at = time.time()
+        expires_at = created_at + ttl if ttl is not None else None
         self.user_index.setdefault(user, {})[file_name] = {
             "file_id": file_id,
             "mutable": mutable,
             "storage_type": storage_type,
             "replication": replication,
             "ttl": ttl,
-            "created_at": time.time()
+            "created_at": created_at,
+            "expires_at": expires_at
         }
+        if expires_at is not None:
+            heapq.heappush(self._expiry_heap, (expires_at, file_id))
+        return file_id
 
-        # Store allocation info
-        self.allocation_table[file_id] = {
-            "sector_id": sector_id,
-            "offset": offset,
-            "length": length,
-            "replicas": [sector_id]*replication
-        }
+    # ----------------- Sector Mutations -----------------
+    def _record_mutation(self, sector_id: str, action: str, file_ids: List[str], user_pubkey: str) -> None:
+        """Mirror a placement change into the sector's SectorManager so its Merkle root tracks disk state."""
+        manager = self.sector_managers.get(sector_id)
+        if manager is None:
+            manager = self.sector_managers[sector_id] = SectorManager(sector_id)
+        self._mutation_seq += 1
+        manager.apply_mutation({
+            "job_id": f"{sector_id}-mut-{self._mutation_seq}",
+            "timestamp": int(time.time()),
+            "user_pubkey": user_pubkey,
+            "action": action,
+            "affected": file_ids
+        })
+
+    def checkpoint_mutations(self) -> int:
+        """
+        Keep each SectorManager's log bounded: once a sector holds more than
+        'mutation_retention' mutations, everything older is folded into its
+        checkpoint state. Run from the expiry and compaction workers.
+
+        Returns:
+            int: Number of mutations cleared
+        """
+        cleared = 0
+        with self._lock:
+            for manager in self.sector_managers.values():
+                excess = len(manager.mutations) - self.mutation_retention
+                if excess > 0:
+                    cleared += manager.fold_mutations(manager.mutations[excess - 1]["timestamp"])
+        return cleared
+
+    def _record_relocation(self, file_id: str, old_sector: str, new_sector: str, user: str) -> None:
+        if old_sector == new_sector:
+            self._record_mutation(new_sector, "update", [file_id], user)
+        else:
+            self._record_mutation(old_sector, "delete", [file_id], user)
+            self._record_mutation(new_sector, "write", [file_id], user)
 
-        # Store actual content
-        self.sector_map.setdefault(sector_id, {})[file_id] = content
+    # ----------------- File API -----------------
+    def create_file(self, user: str, file_name: str, content: str, *,
+                    mutable: bool = True,
+                    storage_type: str = "slow",
+                    replication: int = 1,
+                    ttl: Optional[int] = None,
+                    erasure: Optional[Tuple[int, int]] = None) -> str:
+        """
+        Store a new file. With erasure=(k, m) the content is Reed-Solomon coded
+        into k data and m parity shards on distinct sectors instead of being
+        replicated 'replication' times.
+
+        Space is allocated before the file is registered, so a failed allocation
+        leaves no metadata behind. Re-creating an existing name replaces the file
+        and frees its previous extents.
+        """
+        data = content.encode("utf-8")
+        file_id = f"{user}/{file_name}"
+
+        with self._lock:
+            previous = self._detach(file_id)
+            try:
+                if erasure is not None:
+                    loc = self._store_shards(file_id, data, erasure, user)
+                elif self.deduplicate:
+                    loc = self._store_chunked([data], user)
+                else:
+                    # Place content in a sector and store allocation info
+                    loc = self._allocate(file_id, data)
+                    loc["replicas"] = [loc["sector_id"]] * replication
+            except Exception:
+                self._reattach(file_id, previous)
+                raise
+
+            self.allocation_table[file_id] = loc
+            self._release_detached(file_id, previous, user)
+            self._register(user, file_name, mutable=mutable, storage_type=storage_type,
+                           replication=replication, ttl=ttl)
+            if erasure is not None:
+                self.user_index[user][file_name]["erasure"] = erasure
+            elif not self.deduplicate:
+                self._record_mutation(loc["sector_id"], "write", [file_id], user)
         return file_id
 
     def read_file(self, file_id: str) -> Optional[str]:
-        loc = self.allocation_table.get(file_id)
-        if not loc:
-            return None
-        return self.sector_map.get(loc["sector_id"], {}).get(file_id)
+        with self._lock:
+            loc = self.allocation_table.get(file_id)
+            if not loc:
+                return None
+            if "erasure" in loc:
+                return self._read_erasure(loc, 0, loc["length"], verify=True).decode("utf-8")
+            if "chunks" in loc:
+                return self._read_chunked(loc, 0, loc["length"]).decode("utf-8")
+            return self._read_at(loc["sector_id"], loc["offset"], loc["length"]).decode("utf-8")
 
     def update_file(self, user: str, file_name: str, new_content: str) -> bool:
         file_id = f"{user}/{file_name}"
-        meta = self.user_index.get(user, {}).get(file_name)
-        if not meta or not meta["mutable"]:
-            return False
-        loc = self.allocation_table.get(file_id)
-        if not loc:
-            return False
-        loc["length"] = len(new_content)
-        self.sector_map[loc["sector_id"]][file_id] = new_content
+        data = new_content.encode("utf-8")
+        with self._lock:
+            meta = self.user_index.get(user, {}).get(file_name)
+            if not meta or not meta["mutable"]:
+                return False
+            loc = self.allocation_table.get(file_id)
+            if not loc:
+                return False
+
+            if "erasure" in loc:
+                # The new shards reuse the old shard ids, so the old version is detached while they are stored
+                previous = self._detach(file_id)
+                try:
+                    new_loc = self._store_shards(file_id, data, meta["erasure"], user)
+                except Exception:
+                    self._reattach(file_id, previous)
+                    raise
+                self.allocation_table[file_id] = new_loc
+                self._release_detached(file_id, previous, user)
+            elif "chunks" in loc:
+                # Store the new version first so unchanged chunks are only re-referenced
+                self.allocation_table[file_id] = self._store_chunked([data], user)
+                for sector_id, stored_id in self._release_file(file_id, loc):
+                    self._record_mutation(sector_id, "delete", [stored_id], user)
+            elif len(data) <= loc["reserved"]:
+                # Fits in the existing extent, overwrite in place
+                self._write_at(loc["sector_id"], loc["offset"], data)
+                loc["length"] = len(data)
+                self._record_mutation(loc["sector_id"], "update", [file_id], user)
+            else:
+                # Write the new extent before freeing the old one, so a failure leaves the file intact
+                try:
+                    new_loc = self._allocate(file_id, data)
+                except Exception:
+                    self.sector_map.setdefault(loc["sector_id"], {})[file_id] = loc["offset"]
+                    raise
+                new_loc["replicas"] = [new_loc["sector_id"]] * len(loc["replicas"])
+                self.allocation_table[file_id] = new_loc
+                self._release(file_id, loc)
+                self._record_relocation(file_id, loc["sector_id"], new_loc["sector_id"], user)
         return True
 
     def delete_file(self, user: str, file_name: str) -> bool:
         file_id = f"{user}/{file_name}"
-        meta = self.user_index.get(user, {}).get(file_name)
-        if not meta or not meta["mutable"]:
-            return False
-        loc = self.allocation_table.get(file_id)
-        if loc:
-            self.sector_map[loc["sector_id"]].pop(file_id, None)
-            self.allocation_table.pop(file_id, None)
-        self.user_index[user].pop(file_name, None)
+        with self._lock:
+            meta = self.user_index.get(user, {}).get(file_name)
+            if not meta or not meta["mutable"]:
+                return False
+            loc = self.allocation_table.pop(file_id, None)
+            if loc:
+                for sector_id, stored_id in self._release_file(file_id, loc):
+                    self._record_mutation(sector_id, "delete", [stored_id], user)
+            self.user_index[user].pop(file_name, None)
         return True
 
     def resolve_allocation(self, file_id: str) -> Optional[Dict]:
@@ -75,6 +315,499 @@ class FileManager:
     def list_files(self, user: str) -> List[str]:
         return list(self.user_index.get(user, {}).keys())
 
+    # ----------------- Erasure Coding -----------------
+    def _codec(self, erasure: Tuple[int, int]) -> ReedSolomonCodec:
+        codec = self._codecs.get(tuple(erasure))
+        if codec is None:
+            codec = self._codecs[tuple(erasure)] = ReedSolomonCodec(*erasure)
+        return codec
+
+    def _store_shards(self, file_id: str, data: bytes, erasure: Tuple[int, int], user: str) -> Dict:
+        """Encode data and place every shard on a different sector."""
+        codec = self._codec(erasure)
+        shard_ids: List[str] = []
+        used_sectors: Set[str] = set()
+
+        for index, shard in enumerate(codec.encode(data)):
+            shard_id = f"{file_id}#shard{index}"
+            try:
+                sector_id, offset, reserved = self.allocator.allocate(len(shard), exclude=used_sectors)
+            except Exception:
+                for stored_id in shard_ids:  # Undo the shards placed so far
+                    for sector, released_id in self._release_file(stored_id, self.allocation_table.pop(stored_id)):
+                        self._record_mutation(sector, "delete", [released_id], user)
+                raise
+            used_sectors.add(sector_id)
+            self._write_at(sector_id, offset, shard)
+            self.sector_map.setdefault(sector_id, {})[shard_id] = offset
+            self.allocation_table[shard_id] = {
+                "sector_id": sector_id,
+                "offset": offset,
+                "length": len(shard),
+                "reserved": reserved,
+                "checksum": hashlib.sha256(shard).hexdigest()
+            }
+            self._record_mutation(sector_id, "write", [shard_id], user)
+            shard_ids.append(shard_id)
+
+        return {
+            "length": len(data),
+            "replicas": [self.allocation_table[sid]["sector_id"] for sid in shard_ids],
+            "erasure": {"data_shards": codec.k, "parity_shards": codec.m, "shards": shard_ids}
+        }
+
+    def _read_shard(self, shard_id: str, start: int = 0, length: Optional[int] = None,
+                    verify: bool = False) -> Optional[bytes]:
+        """Read (part of) a shard, or None if its sector is unavailable or the data is damaged."""
+        loc = self.allocation_table[shard_id]
+        if loc["sector_id"] in self.unavailable_sectors:
+            return None
+        length = loc["length"] - start if length is None else length
+        try:
+            data = self._read_at(loc["sector_id"], loc["offset"] + start, length)
+        except OSError:
+            return None
+        if len(data) != length:
+            return None
+        if verify and hashlib.sha256(data).hexdigest() != loc["checksum"]:
+            return None
+        return data
+
+    def _read_erasure(self, loc: Dict, offset: int, length: int, verify: bool = False) -> bytes:
+        """
+        Read a byte range of an erasure coded file. The range is served straight
+        from the data shards when they are all reachable; otherwise every shard is
+        fetched and the payload is rebuilt from any k of them (degraded read).
+        """
+        ec = loc["erasure"]
+        shard_ids = ec["shards"]
+        shard_length = self.allocation_table[shard_ids[0]]["length"]
+        end = offset + length
+
+        pieces: List[bytes] = []
+        position = offset
+        while position < end:
+            index, start = divmod(position, shard_length)
+            n = min(shard_length - start, end - position)
+            whole = verify and start == 0 and n == shard_length
+            piece = self._read_shard(shard_ids[index], start, n, verify=whole)
+            if piece is None:
+                break
+            pieces.append(piece)
+            position += n
+        else:
+            return b"".join(pieces)
+
+        shards = [self._read_shard(shard_id, verify=True) for shard_id in shard_ids]
+        codec = self._codec((ec["data_shards"], ec["parity_shards"]))
+        return codec.decode(shards, loc["length"])[offset:end]
+
+    def mark_sector_unavailable(self, sector_id: str, unavailable: bool = True) -> None:
+        """Flag a partner sector as offline (or back online) for shard reads."""
+        if unavailable:
+            self.unavailable_sectors.add(sector_id)
+        else:
+            self.unavailable_sectors.discard(sector_id)
+
+    # ----------------- Deduplication -----------------
+    def _put_chunk(self, chunk: Chunk, user: str) -> str:
+        """Reference a chunk by content hash, writing it to a sector only if it is new."""
+        digest = ChunkStore.digest(chunk)
+        with self._lock:
+            if self.chunk_store.retain(digest):
+                return digest
+            stored_id = CHUNK_PREFIX + digest
+            sector_id, offset, reserved = self.allocator.allocate(len(chunk))
+            self._write_at(sector_id, offset, chunk)
+            self.sector_map.setdefault(sector_id, {})[stored_id] = offset
+            self.chunk_store.add(digest, {"sector_id": sector_id, "offset": offset,
+                                          "length": len(chunk), "reserved": reserved})
+            self._record_mutation(sector_id, "write", [stored_id], user)
+        return digest
+
+    def _put_chunks(self, pieces: List[bytes], user: str, layout: Dict) -> None:
+        for piece in pieces:
+            layout["chunks"].append(self._put_chunk(piece, user))
+            layout["length"] += len(piece)
+            layout["chunk_ends"].append(layout["length"])
+
+    def _drop_chunks(self, digests: List[str]) -> List[Tuple[str, str]]:
+        """Drop one reference per digest and free chunks nobody refers to anymore."""
+        released = []
+        with self._lock:
+            for digest in digests:
+                freed = self.chunk_store.release(digest)
+                if freed:
+                    self._release(CHUNK_PREFIX + digest, freed)
+                    released.append((freed["sector_id"], CHUNK_PREFIX + digest))
+        return released
+
+    def _discard_layout(self, layout: Dict, user: str) -> None:
+        with self._lock:
+            for sector_id, stored_id in self._drop_chunks(layout["chunks"]):
+                self._record_mutation(sector_id, "delete", [stored_id], user)
+
+    def _finish_layout(self, layout: Dict, user: str, expected_size: Optional[int]) -> Dict:
+        if expected_size is not None and layout["length"] != expected_size:
+            self._discard_layout(layout, user)
+            raise ValueError(f"Stream ended after {layout['length']} of {expected_size} bytes.")
+        layout["replicas"] = sorted({self.chunk_store.chunks[d]["sector_id"] for d in layout["chunks"]})
+        return layout
+
+    def _store_chunked(self, blocks: Iterable[Chunk], user: str, expected_size: Optional[int] = None) -> Dict:
+        """
+        Cut a stream of blocks into content-defined chunks and store each unique one once.
+
+        Returns:
+            Dict: Allocation entry listing chunk digests and their cumulative end offsets
+        """
+        chunker = ContentDefinedChunker()
+        layout: Dict = {"length": 0, "chunks": [], "chunk_ends": []}
+        try:
+            for block in blocks:
+                self._put_chunks(chunker.feed(block), user, layout)
+            self._put_chunks(chunker.flush(), user, layout)
+        except Exception:
+            self._discard_layout(layout, user)
+            raise
+        return self._finish_layout(layout, user, expected_size)
+
+    def _read_chunked(self, loc: Dict, offset: int, length: int) -> bytes:
+        ends = loc["chunk_ends"]
+        index = bisect_right(ends, offset)
+        position, end = offset, offset + length
+        pieces: List[bytes] = []
+        while position < end:
+            chunk = self.chunk_store.chunks[loc["chunks"][index]]
+            start = position - (ends[index - 1] if index else 0)
+            n = min(ends[index] - position, end - position)
+            pieces.append(self._read_at(chunk["sector_id"], chunk["offset"] + start, n))
+            position += n
+            index += 1
+        return b"".join(pieces)
+
+    # ----------------- Streaming API -----------------
+    def _write_chunks(self, file_id: str, chunks: Iterable[Chunk], size: int) -> None:
+        """
+        Write chunks straight into the file's reserved extent. Chunks are handed to
+        the sector file as-is; the offset is re-resolved for every chunk so a
+        concurrent compaction cannot leave a write pointing at a stale location.
+        """
+        written = 0
+        for chunk in chunks:
+            if written + len(chunk) > size:
+                raise ValueError(f"Stream for {file_id} exceeds declared size of {size} bytes.")
+            self._write_chunks_at(file_id, written, chunk)
+            written += len(chunk)
+        if written != size:
+            raise ValueError(f"Stream for {file_id} ended after {written} of {size} bytes.")
+
+    def _staging_id(self, file_id: str) -> str:
+        return f"{file_id}#staging{next(self._staging_seq)}"
+
+    def _promote_staging(self, staging_id: str, file_id: str) -> Dict:
+        """Move a fully written staging extent under the file's own id."""
+        loc = self.allocation_table.pop(staging_id)
+        files = self.sector_map[loc["sector_id"]]
+        files.pop(staging_id)
+        files[file_id] = loc["offset"]
+        return loc
+
+    def create_file_stream(self, user: str, file_name: str, chunks: Iterable[Chunk], size: int, *,
+                           mutable: bool = True,
+                           storage_type: str = "slow",
+                           replication: int = 1,
+                           ttl: Optional[int] = None) -> str:
+        """
+        Create a file from an iterable of byte chunks. The total 'size' must be known
+        up front so the extent can be reserved before any data is written.
+
+        Without deduplication a file is a single extent, so 'size' may not exceed
+        the sector size (ValueError); with deduplicate=True the stream is split
+        into chunks and has no such limit. The file is registered only after all
+        of its data is stored. Re-creating an existing name replaces the file,
+        and readers keep seeing the old content until the stream completes.
+        """
+        file_id = f"{user}/{file_name}"
+        if self.deduplicate:
+            loc = self._store_chunked(chunks, user, expected_size=size)
+        else:
+            if size > self.allocator.sector_size:
+                raise ValueError(f"Stream of {size} bytes exceeds the sector size of {self.allocator.sector_size} "
+                                 f"bytes; enable deduplicate to store it as chunks.")
+            staging_id = self._staging_id(file_id)
+            with self._lock:
+                self.allocation_table[staging_id] = self._reserve(staging_id, size)
+            try:
+                self._write_chunks(staging_id, chunks, size)
+            except Exception:
+                with self._lock:
+                    self._release(staging_id, self.allocation_table.pop(staging_id))
+                raise
+
+        with self._lock:
+            previous = self._detach(file_id)
+            if not self.deduplicate:
+                loc = self._promote_staging(staging_id, file_id)
+                loc["replicas"] = [loc["sector_id"]] * replication
+            self.allocation_table[file_id] = loc
+            self._release_detached(file_id, previous, user)
+            self._register(user, file_name, mutable=mutable, storage_type=storage_type,
+                           replication=replication, ttl=ttl)
+            if not self.deduplicate:
+                self._record_mutation(loc["sector_id"], "write", [file_id], user)
+        return file_id
+
+    def update_file_stream(self, user: str, file_name: str, chunks: Iterable[Chunk], size: int) -> bool:
+        """
+        Replace a mutable file's content from an iterable of byte chunks.
+        The new content is written into a fresh extent, so readers keep seeing the
+        old content until the stream completes successfully.
+        """
+        file_id = f"{user}/{file_name}"
+        staging_id = self._staging_id(file_id)
+        with self._lock:
+            meta = self.user_index.get(user, {}).get(file_name)
+            if not meta or not meta["mutable"] or file_id not in self.allocation_table:
+                return False
+            if "erasure" in self.allocation_table[file_id]:
+                return False  # Erasure coded files are re-encoded through update_file
+            chunked = "chunks" in self.allocation_table[file_id]
+            if not chunked:
+                self.allocation_table[staging_id] = self._reserve(staging_id, size)
+
+        if chunked:
+            new_loc = self._store_chunked(chunks, user, expected_size=size)
+            with self._lock:
+                old = self.allocation_table[file_id]
+                self.allocation_table[file_id] = new_loc
+                for sector_id, stored_id in self._release_file(file_id, old):
+                    self._record_mutation(sector_id, "delete", [stored_id], user)
+            return True
+
+        try:
+            self._write_chunks(staging_id, chunks, size)
+        except Exception:
+            with self._lock:
+                self._release(staging_id, self.allocation_table.pop(staging_id))
+            raise
+
+        with self._lock:
+            old = self.allocation_table[file_id]
+            new = self._promote_staging(staging_id, file_id)
+            new["replicas"] = [new["sector_id"]] * len(old["replicas"])
+            self._release(file_id, old)
+            self.allocation_table[file_id] = new
+            self._record_relocation(file_id, old["sector_id"], new["sector_id"], user)
+        return True
+
+    def _resolve_range(self, file_id: str, offset: int, length: Optional[int]) -> int:
+        loc = self.allocation_table.get(file_id)
+        if not loc:
+            raise KeyError(f"Unknown file: {file_id}")
+        if offset < 0 or offset > loc["length"]:
+            raise ValueError(f"Offset {offset} outside of {file_id} ({loc['length']} bytes).")
+        available = loc["length"] - offset
+        return available if length is None else min(length, available)
+
+    def read_file_range(self, file_id: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        """Read 'length' bytes of a file starting at 'offset' (to the end when length is None)."""
+        with self._lock:
+            length = self._resolve_range(file_id, offset, length)
+            loc = self.allocation_table[file_id]
+            if "erasure" in loc:
+                return self._read_erasure(loc, offset, length)
+            if "chunks" in loc:
+                return self._read_chunked(loc, offset, length)
+            return self._read_at(loc["sector_id"], loc["offset"] + offset, length)
+
+    def iter_file_chunks(self, file_id: str, offset: int = 0, length: Optional[int] = None,
+                         chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield a byte range of a file in chunks of at most 'chunk_size' bytes."""
+        with self._lock:
+            remaining = self._resolve_range(file_id, offset, length)
+        position = offset
+        while remaining > 0:
+            n = min(chunk_size, remaining)
+            chunk = self.read_file_range(file_id, position, n)
+            if not chunk:
+                break
+            yield chunk
+            position += len(chunk)
+            remaining -= len(chunk)
+
+    async def create_file_stream_async(self, user: str, file_name: str, chunks: AsyncIterable[Chunk], size: int, *,
+                                       mutable: bool = True,
+                                       storage_type: str = "slow",
+                                       replication: int = 1,
+                                       ttl: Optional[int] = None) -> str:
+        """
+        Async variant of create_file_stream. The whole store, including chunking
+        and sector writes, runs in a worker thread; chunks are pulled from the
+        async iterable on the event loop one at a time.
+        """
+        loop = asyncio.get_running_loop()
+        source = chunks.__aiter__()
+
+        def pull() -> Iterator[Chunk]:
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(source.__anext__(), loop).result()
+                except StopAsyncIteration:
+                    return
+
+        return await asyncio.to_thread(self.create_file_stream, user, file_name, pull(), size, mutable=mutable,
+                                       storage_type=storage_type, replication=replication, ttl=ttl)
+
+    def _write_chunks_at(self, file_id: str, position: int, chunk: Chunk) -> None:
+        with self._lock:
+            loc = self.allocation_table[file_id]
+            self._write_at(loc["sector_id"], loc["offset"] + position, chunk)
+
+    async def aiter_file_chunks(self, file_id: str, offset: int = 0, length: Optional[int] = None,
+                                chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Async variant of iter_file_chunks; sector reads run in a worker thread."""
+        with self._lock:
+            remaining = self._resolve_range(file_id, offset, length)
+        position = offset
+        while remaining > 0:
+            chunk = await asyncio.to_thread(self.read_file_range, file_id, position, min(chunk_size, remaining))
+            if not chunk:
+                break
+            yield chunk
+            position += len(chunk)
+            remaining -= len(chunk)
+
+    # ----------------- Encrypted Streams -----------------
+    def create_encrypted_file_stream(self, user: str, file_name: str, chunks: Iterable[Chunk], size: int, key: bytes, *,
+                                     chunk_size: int = ENCRYPTION_CHUNK_SIZE, **options) -> str:
+        """
+        Store a plaintext stream of 'size' bytes in the chunked AEAD format
+        (see stream_encryption). Only one chunk is held in memory at a time.
+        """
+        return self.create_file_stream(user, file_name, encrypt_stream(key, chunks, chunk_size),
+                                       encrypted_size(size, chunk_size), **options)
+
+    def read_encrypted_range(self, file_id: str, key: bytes, offset: int = 0, length: Optional[int] = None) -> bytes:
+        """Decrypt a plaintext byte range of an encrypted file, reading only the chunks that cover it."""
+        with self._lock:
+            total = self._resolve_range(file_id, 0, None)
+        return decrypt_range(key, lambda position, n: self.read_file_range(file_id, position, n), total,
+                             offset, -1 if length is None else length)
+
+    def iter_decrypted_chunks(self, file_id: str, key: bytes) -> Iterator[bytes]:
+        """Yield the plaintext of an encrypted file one chunk at a time."""
+        return decrypt_stream(key, self.iter_file_chunks(file_id))
+
+    # ----------------- TTL Expiry -----------------
+    def next_expiry(self) -> Optional[float]:
+        """Timestamp of the earliest scheduled expiry (may belong to an already removed file)."""
+        return self._expiry_heap[0][0] if self._expiry_heap else None
+
+    def expire_files(self, now: Optional[float] = None, batch_size: int = 10_000) -> List[str]:
+        """
+        Remove files whose TTL has elapsed, up to 'batch_size' per call.
+        Only due heap entries are visited; entries for files that were deleted or
+        recreated since scheduling are discarded on the way. Released extents are
+        reported to each SectorManager as one delete mutation per sector.
+
+        Returns:
+            List[str]: IDs of the expired files
+        """
+        now = time.time() if now is None else now
+        expired: List[str] = []
+        per_sector: Dict[str, List[str]] = {}
+
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now and len(expired) < batch_size:
+                expires_at, file_id = heapq.heappop(self._expiry_heap)
+                user, file_name = file_id.split("/", 1)
+                meta = self.user_index.get(user, {}).get(file_name)
+                if not meta or meta["expires_at"] != expires_at:
+                    continue  # Stale entry
+
+                loc = self.allocation_table.pop(file_id, None)
+                if loc:
+                    for sector_id, stored_id in self._release_file(file_id, loc):
+                        per_sector.setdefault(sector_id, []).append(stored_id)
+                self.user_index[user].pop(file_name, None)
+                expired.append(file_id)
+
+            for sector_id, file_ids in per_sector.items():
+                self._record_mutation(sector_id, "delete", file_ids, "ttl-expiry")
+        return expired
+
+    def start_expiry_scheduler(self, interval: float = 1.0, batch_size: int = 10_000) -> None:
+        """Periodically reclaim expired files in the background."""
+        def expire() -> None:
+            self.expire_files(batch_size=batch_size)
+            self.checkpoint_mutations()
+
+        self._start_worker("ttl-expiry", interval, expire)
+
+    # ----------------- Compaction -----------------
+    def compact_sector(self, sector_id: str) -> int:
+        """
+        Pack all files of a sector towards its start so free space becomes one extent.
+
+        Returns:
+            int: Number of files that were relocated
+        """
+        with self._lock:
+            def move(src: int, dst: int, length: int, step: int = 4 * 1024 ** 2) -> None:
+                # Copy front to back; dst < src so unread source bytes are never overwritten
+                for pos in range(0, length, step):
+                    n = min(step, length - pos)
+                    self._write_at(sector_id, dst + pos, self._read_at(sector_id, src + pos, n))
+
+            relocated = self.allocator.compact(sector_id, move)
+            files = self.sector_map.get(sector_id, {})
+            for stored_id, offset in list(files.items()):
+                if offset in relocated:
+                    files[stored_id] = relocated[offset]
+                    if stored_id.startswith(CHUNK_PREFIX):
+                        self.chunk_store.chunks[stored_id[len(CHUNK_PREFIX):]]["offset"] = relocated[offset]
+                    else:
+                        self.allocation_table[stored_id]["offset"] = relocated[offset]
+            return len(relocated)
+
+    def start_background_compaction(self, interval: float = 30.0, threshold: float = 0.5) -> None:
+        """Periodically compact sectors whose free space fragmentation exceeds 'threshold'."""
+        def compact_fragmented() -> None:
+            with self._lock:
+                fragmented = [sector_id for sector_id in self.allocator.sectors()
+                              if self.allocator.fragmentation(sector_id) > threshold]
+            for sector_id in fragmented:
+                self.compact_sector(sector_id)
+            self.checkpoint_mutations()
+
+        self._start_worker("sector-compactor", interval, compact_fragmented)
+
+    # ----------------- Background Workers -----------------
+    def _start_worker(self, name: str, interval: float, task) -> None:
+        if any(worker.name == name for worker in self._workers):
+            return
+
+        def run() -> None:
+            while not self._stop_workers.wait(interval):
+                task()
+
+        worker = threading.Thread(target=run, name=name, daemon=True)
+        self._workers.append(worker)
+        worker.start()
+
+    def close(self) -> None:
+        """Stop background workers and close all sector files."""
+        self._stop_workers.set()
+        for worker in self._workers:
+            worker.join()
+        self._workers.clear()
+        self._stop_workers.clear()
+        with self._lock:
+            for handle in self._handles.values():
+                handle.close()
+            self._handles.clear()
+
 
 if __name__ == "__main__":
     fm = FileManager()
@@ -93,6 +826,47 @@ if __name__ == "__main__":
     # Resolve allocation
     print(f"Allocation Info: {fm.resolve_allocation(file_id)}")
 
+    # Fragment the sector, then compact it
+    fm.create_file("@Chris", "big.txt", "B" * 10_000)
+    fm.create_file("@Chris", "tail.txt", "tail data")
+    fm.delete_file("@Chris", "big.txt")
+    print(f"Relocated During Compaction: {fm.compact_sector(fm.resolve_allocation(file_id)['sector_id'])}")
+    print(f"Tail After Compaction: {fm.read_file('@Chris/tail.txt')} @ {fm.resolve_allocation('@Chris/tail.txt')}")
+
+    # Stream a larger binary file in and read back a range of it
+    payload = os.urandom(3 * STREAM_CHUNK_SIZE + 123)
+    chunks = (memoryview(payload)[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(payload), STREAM_CHUNK_SIZE))
+    blob_id = fm.create_file_stream("@Chris", "blob.bin", chunks, size=len(payload))
+    streamed = b"".join(fm.iter_file_chunks(blob_id, offset=1000, length=2 * STREAM_CHUNK_SIZE))
+    print(f"Streamed Range Matches: {streamed == payload[1000:1000 + 2 * STREAM_CHUNK_SIZE]}")
+
+    # Short-lived file expires and is reflected in the sector's Merkle root
+    temp_id = fm.create_file("@Chris", "temp.txt", "gone soon", ttl=1)
+    temp_sector = fm.resolve_allocation(temp_id)["sector_id"]
+    print(f"Root With Temp File: {fm.sector_managers[temp_sector].calculate_merkle_root()}")
+    print(f"Expired: {fm.expire_files(now=time.time() + 2)}")
+    print(f"Root After Expiry:   {fm.sector_managers[temp_sector].calculate_merkle_root()}")
+
+    # Erasure coded file survives two unavailable partner sectors
+    ec_id = fm.create_file("@Chris", "archive.txt", "Durable content " * 1000, erasure=(4, 2))
+    lost = fm.resolve_allocation(ec_id)["replicas"][:2]
+    for sector in lost:
+        fm.mark_sector_unavailable(sector)
+    print(f"Degraded Read OK: {fm.read_file(ec_id) == 'Durable content ' * 1000} (offline: {lost})")
+    for sector in lost:
+        fm.mark_sector_unavailable(sector, False)
+
+    # Deduplicated storage only pays for chunks it has not seen before
+    dedup_fm = FileManager(os.path.join(fm.storage_dir, "dedup"), deduplicate=True)
+    shared = os.urandom(2 * STREAM_CHUNK_SIZE)
+    dedup_fm.create_file_stream("@Alice", "dataset.bin", [shared], size=len(shared))
+    dedup_fm.create_file_stream("@Bob", "copy.bin", [shared], size=len(shared))
+    edited = shared[:500_000] + b"patched" + shared[500_000:]
+    dedup_fm.create_file_stream("@Bob", "edited.bin", [edited], size=len(edited))
+    print(f"Dedup Stats: {dedup_fm.chunk_store.stats()}")
+    dedup_fm.close()
+
     # Delete file
     fm.delete_file("@Chris", "my_file.txt")
     print(f"Remaining Files: {fm.list_files('@Chris')}")
+    fm.close()
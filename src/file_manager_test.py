@@ -0,0 +1,97 @@
+"""
+Assertion tests for FileManager and its sector allocator.
+
+    python -m pytest src/file_manager_test.py
+"""
+
+import pytest
+
+from file_manager import FileManager
+from sector_allocator import SectorAllocator
+
+SECTOR_SIZE = 16 * 1024
+
+
+@pytest.fixture
+def fm(tmp_path):
+    return FileManager(str(tmp_path), sector_size=SECTOR_SIZE)
+
+
+# ----------------- Allocator -----------------
+def test_allocator_best_fit_and_merge():
+    allocator = SectorAllocator(SECTOR_SIZE)
+    sector, first, size = allocator.allocate(100)
+    assert (first, size) == (0, 4096)
+    _, second, _ = allocator.allocate(5000)
+    _, third, _ = allocator.allocate(100)
+    assert (second, third) == (4096, 12288)
+
+    allocator.free(sector, first)
+    allocator.free(sector, second)  # Merges with the freed extent before it
+    assert allocator.free_extents[sector] == [(0, 12288)]
+    assert allocator.allocate(4000)[:2] == (sector, 0)
+
+
+def test_allocator_rejects_oversized_request():
+    with pytest.raises(ValueError):
+        SectorAllocator(SECTOR_SIZE).allocate(SECTOR_SIZE + 1)
+
+
+# ----------------- Relocation -----------------
+def test_update_relocates_when_content_grows(fm):
+    file_id = fm.create_file("@u", "f", "a" * 10)
+    fm.create_file("@u", "g", "b" * 10)
+    assert fm.update_file("@u", "f", "c" * 5000)
+    assert fm.read_file(file_id) == "c" * 5000
+    assert fm.read_file("@u/g") == "b" * 10
+
+
+def test_failed_relocation_keeps_the_old_extent(fm):
+    file_id = fm.create_file("@u", "f", "original")
+    loc = dict(fm.resolve_allocation(file_id))
+    with pytest.raises(ValueError):
+        fm.update_file("@u", "f", "x" * (SECTOR_SIZE + 1))
+
+    assert fm.resolve_allocation(file_id) == loc
+    assert fm.sector_map[loc["sector_id"]][file_id] == loc["offset"]
+    other = fm.create_file("@u", "g", "other file")
+    assert fm.resolve_allocation(other)["offset"] != loc["offset"]
+    assert fm.read_file(file_id) == "original"
+
+    fm.delete_file("@u", "f")
+    assert fm.read_file(other) == "other file"
+
+
+# ----------------- Erasure Coding -----------------
+def test_erasure_file_survives_lost_sectors(fm):
+    content = "erasure coded " * 200
+    file_id = fm.create_file("@u", "e", content, erasure=(4, 2))
+    for sector in fm.resolve_allocation(file_id)["replicas"][:2]:
+        fm.mark_sector_unavailable(sector)
+    assert fm.read_file(file_id) == content
+
+
+@pytest.mark.parametrize("fail_at", [1, 3])
+def test_failed_erasure_update_keeps_the_old_shards(fm, monkeypatch, fail_at):
+    file_id = fm.create_file("@u", "e", "old version " * 100, erasure=(2, 2))
+    shards = {shard_id: dict(fm.allocation_table[shard_id])
+              for shard_id in fm.resolve_allocation(file_id)["erasure"]["shards"]}
+
+    allocate = fm.allocator.allocate
+    calls = []
+
+    def failing_allocate(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == fail_at:
+            raise ValueError("no space")
+        return allocate(*args, **kwargs)
+
+    monkeypatch.setattr(fm.allocator, "allocate", failing_allocate)
+    with pytest.raises(ValueError):
+        fm.update_file("@u", "e", "new version " * 100)
+    monkeypatch.undo()
+
+    assert {shard_id: fm.allocation_table[shard_id] for shard_id in shards} == shards
+    assert fm.read_file(file_id) == "old version " * 100
+    fm.create_file("@u", "g", "z" * 3000)
+    assert fm.read_file(file_id) == "old version " * 100
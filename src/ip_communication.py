@@ -1,9 +1,10 @@
 import socket
 import asyncio
 from logging import Logger
-from typing import Optional
+from typing import AsyncIterator, Optional
 from abstract_communication import AbstractCommunication
 from logger_util import setup_logger
+from stream_encryption import DEFAULT_CHUNK_SIZE, HEADER_SIZE, TAG_SIZE, Source, StreamDecryptor, encrypt_stream
 
 logger: Logger = setup_logger('IPCommunication', 'ip_communication.log')
 
@@ -78,6 +79,60 @@ class IPCommunication(AbstractCommunication):
         else:
             raise ConnectionError("No active connection to receive the message.")
 
+    async def _receive_exact(self, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            piece = await asyncio.get_event_loop().sock_recv(self.socket, size - len(data))  # type: ignore
+            if not piece:
+                raise ConnectionError(f"Connection closed after {len(data)} of {size} bytes.")
+            data += piece
+        return bytes(data)
+
+    async def send_encrypted_stream(self, key: bytes, source: Source, recipient: bytearray,
+                                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        """
+        Send a large payload as a chunked AEAD stream. Every sealed chunk goes out
+        as its own length-prefixed frame, so neither side buffers the whole payload.
+        """
+        if not self.socket:
+            raise ConnectionError("No active connection to send the message.")
+        loop = asyncio.get_event_loop()
+        for frame in encrypt_stream(key, source, chunk_size):
+            await loop.sock_sendall(self.socket, len(frame).to_bytes(4, 'big') + frame)
+        await loop.sock_sendall(self.socket, b'\x00\x00\x00\x00')  # End of stream
+        logger.info(f'Sent encrypted stream to {recipient}')
+
+    async def receive_encrypted_stream(self, key: bytes,
+                                       max_chunk_size: int = 16 * DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """
+        Receive a stream sent by send_encrypted_stream, yielding plaintext chunk by chunk.
+        Frame lengths are checked before any frame is read, so a peer cannot make us
+        buffer more than one sealed chunk of at most 'max_chunk_size' bytes.
+        """
+        if not self.socket:
+            raise ConnectionError("No active connection to receive the message.")
+        if int.from_bytes(await self._receive_exact(4), 'big') != HEADER_SIZE:
+            raise ValueError("Encrypted stream did not start with a header frame.")
+        decryptor = StreamDecryptor(key, await self._receive_exact(HEADER_SIZE))
+        if decryptor.chunk_size > max_chunk_size:
+            raise ValueError(f"Encrypted stream chunk size {decryptor.chunk_size} exceeds {max_chunk_size} bytes.")
+
+        async def receive_sealed(length: int) -> bytes:
+            if length > decryptor.chunk_size + TAG_SIZE:
+                raise ValueError(f"Encrypted stream frame of {length} bytes exceeds the chunk size.")
+            return await self._receive_exact(length)
+
+        index = 0
+        sealed = await receive_sealed(int.from_bytes(await self._receive_exact(4), 'big'))
+        while True:
+            length = int.from_bytes(await self._receive_exact(4), 'big')
+            if length == 0:
+                yield decryptor.decrypt_chunk(index, sealed, final=True)
+                return
+            yield decryptor.decrypt_chunk(index, sealed, final=False)
+            sealed = await receive_sealed(length)
+            index += 1
+
     async def disconnect(self) -> None:
         try:
             if self.listener_task:
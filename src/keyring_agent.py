@@ -0,0 +1,211 @@
+"""
+KeyringAgent
+
+Keeps unlocked account keys in memory for the lifetime of a process. Loading a
+private key costs a passphrase prompt plus 100,000 PBKDF2 iterations; with the
+agent each account pays that once, and every later signature is a dictionary
+lookup plus the signing operation itself.
+
+Keys can be used in-process (agent.sign) or served to other local processes
+over multiprocessing.connection (a Unix socket or Windows named pipe). The IPC
+channel is authenticated with a shared 'authkey', and private keys never leave
+the agent process; clients only get signatures and public keys back.
+"""
+
+import os
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from crypto_factory import CryptoFactory
+from crypto_handler import CryptoHandler
+
+
+class KeyringAgent:
+    def __init__(self, handler: Optional[CryptoHandler] = None):
+        self.handler: CryptoHandler = handler or CryptoFactory.active_handler()
+        self._keys: Dict[str, Tuple[Any, Any]] = {}  # account -> (private key, public key)
+        self._lock = threading.Lock()
+        self._listener: Optional[Listener] = None
+        self._server_thread: Optional[threading.Thread] = None
+
+    # ----------------- Unlocking -----------------
+    def unlock(self, account: str, private_key_path: str, salt_path: str, passphrase: Optional[bytes] = None) -> None:
+        """
+        Decrypt an account key and keep it in memory. Accounts that are already
+        unlocked are left alone, so callers can unlock unconditionally.
+        """
+        with self._lock:
+            if account in self._keys:
+                return
+        private_key = self.handler.load_private_key(private_key_path, salt_path, passphrase)
+        with self._lock:
+            self._keys.setdefault(account, (private_key, private_key.public_key()))
+
+    def add_key(self, account: str, private_key: Any) -> None:
+        """Hand an already decrypted key (e.g. a freshly generated one) to the agent."""
+        with self._lock:
+            self._keys[account] = (private_key, private_key.public_key())
+
+    def is_unlocked(self, account: str) -> bool:
+        with self._lock:
+            return account in self._keys
+
+    def unlocked_accounts(self) -> List[str]:
+        with self._lock:
+            return list(self._keys)
+
+    def lock(self, account: str) -> None:
+        """Forget an account's decrypted key."""
+        with self._lock:
+            self._keys.pop(account, None)
+
+    def lock_all(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+    # ----------------- Signing -----------------
+    def _private_key(self, account: str) -> Any:
+        with self._lock:
+            entry = self._keys.get(account)
+        if entry is None:
+            raise KeyError(f"Account {account} is locked.")
+        return entry[0]
+
+    def public_key(self, account: str) -> str:
+        """Serialized public key of an unlocked account."""
+        with self._lock:
+            entry = self._keys.get(account)
+        if entry is None:
+            raise KeyError(f"Account {account} is locked.")
+        return self.handler.serialize_public_key(entry[1])
+
+    def sign(self, account: str, message: bytes) -> bytes:
+        return self.handler.sign_message(self._private_key(account), message)
+
+    def sign_many(self, account: str, messages: Iterable[bytes]) -> List[bytes]:
+        private_key = self._private_key(account)
+        return [self.handler.sign_message(private_key, message) for message in messages]
+
+    # ----------------- Local IPC -----------------
+    def serve(self, address: str, authkey: bytes) -> None:
+        """
+        Serve sign requests to local processes in a background thread.
+        'address' is a socket path (or r'\\\\.\\pipe\\name' on Windows).
+        """
+        if self._listener is not None:
+            raise RuntimeError("Keyring agent is already serving.")
+        if os.name == "posix" and os.path.exists(address):
+            os.unlink(address)  # Stale socket from a previous run
+        self._listener = Listener(address, authkey=authkey)
+        if os.name == "posix":
+            os.chmod(address, 0o600)
+        self._server_thread = threading.Thread(target=self._accept_loop, name="keyring-agent", daemon=True)
+        self._server_thread.start()
+
+    def stop(self) -> None:
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            address = listener.address
+            listener.close()
+            if self._server_thread is not None:
+                self._server_thread.join(timeout=1)
+            if os.name == "posix" and isinstance(address, str) and os.path.exists(address):
+                os.unlink(address)
+
+    def _accept_loop(self) -> None:
+        while self._listener is not None:
+            try:
+                connection = self._listener.accept()
+            except Exception:
+                if self._listener is None:
+                    return  # stop() closed the listener
+                continue  # Failed authentication or aborted client
+            threading.Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+
+    def _serve_connection(self, connection: Connection) -> None:
+        with connection:
+            while True:
+                try:
+                    request = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    connection.send(("ok", self._handle(request)))
+                except Exception as error:
+                    connection.send(("error", str(error)))
+
+    def _handle(self, request: Tuple) -> Any:
+        command, *args = request
+        if command == "sign":
+            return self.sign(*args)
+        if command == "sign_many":
+            return self.sign_many(*args)
+        if command == "public_key":
+            return self.public_key(*args)
+        if command == "accounts":
+            return self.unlocked_accounts()
+        raise ValueError(f"Unknown keyring command: {command}")
+
+
+class KeyringClient:
+    """Talks to a KeyringAgent served on a local address."""
+
+    def __init__(self, address: str, authkey: bytes):
+        self._connection = Client(address, authkey=authkey)
+        self._lock = threading.Lock()
+
+    def _call(self, *request: Any) -> Any:
+        with self._lock:
+            self._connection.send(request)
+            status, result = self._connection.recv()
+        if status != "ok":
+            raise KeyError(result)
+        return result
+
+    def sign(self, account: str, message: bytes) -> bytes:
+        return self._call("sign", account, message)
+
+    def sign_many(self, account: str, messages: List[bytes]) -> List[bytes]:
+        return self._call("sign_many", account, messages)
+
+    def public_key(self, account: str) -> str:
+        return self._call("public_key", account)
+
+    def accounts(self) -> List[str]:
+        return self._call("accounts")
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    directory = tempfile.mkdtemp()
+    handler = CryptoFactory.active_handler()
+    private_key, public_key = handler.generate_keys()
+    handler.save_keys(private_key, public_key, "validator", directory, passphrase=b"demo passphrase")
+    key_path = os.path.join(directory, "validator_private_key.PEM")
+    salt_path = os.path.join(directory, "validator_salt.bin")
+
+    start = time.perf_counter()
+    for _ in range(3):
+        handler.load_private_key(key_path, salt_path, b"demo passphrase")
+    print(f"Loading from disk: {(time.perf_counter() - start) / 3 * 1000:.1f} ms per key")
+
+    agent = KeyringAgent()
+    agent.unlock("validator", key_path, salt_path, b"demo passphrase")
+    start = time.perf_counter()
+    signatures = agent.sign_many("validator", [b"tx-%d" % i for i in range(500)])
+    print(f"Agent signing: {(time.perf_counter() - start) / 500 * 1000:.2f} ms per signature")
+
+    address = os.path.join(directory, "keyring.sock")
+    authkey = os.urandom(32)
+    agent.serve(address, authkey)
+    client = KeyringClient(address, authkey)
+    signature = client.sign("validator", b"over IPC")
+    print(f"IPC signature valid: {CryptoFactory.verify_signature(public_key, b'over IPC', signature)}")
+    client.close()
+    agent.stop()
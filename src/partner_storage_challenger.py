@@ -1,6 +1,11 @@
+import os
 import random
 import hashlib
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Union, BinaryIO, Optional
+
+# A sector can be handed over as in-memory content or as an open binary file
+SectorSource = Union[str, bytes, bytearray, memoryview, BinaryIO]
 
 class PartnerStorageChallenger:
     """
@@ -9,10 +14,12 @@ class PartnerStorageChallenger:
     and escalates mismatches to a validator.
     """
 
-    def __init__(self, sector_size: int = 4 * 1024 ** 3):
+    def __init__(self, sector_size: int = 4 * 1024 ** 3, max_workers: Optional[int] = None):
         self.sector_size = sector_size
         self.challenge_log = []      # All issued challenges
         self.escalation_log = []     # Escalation records for failures
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self._pool: Optional[ThreadPoolExecutor] = None  # Created on first batch
 
     def issue_challenge(self, sector_id: str, partners: List[str], seed: int) -> dict:
         """
@@ -41,6 +48,131 @@ class PartnerStorageChallenger:
         self.challenge_log.append(challenge)
         return challenge
 
+    def issue_batch_challenge(self, sector_id: str, partners: List[str], seed: int,
+                              samples: int = 16, slice_length: int = 64 * 1024) -> dict:
+        """
+        Issues a multi-offset challenge for a sector using a deterministic seed.
+        Targets are sorted by offset so responders can read the sector sequentially.
+        The first target is mirrored into target_offset/target_length so the
+        challenge can be passed to escalate_to_validator unchanged.
+        """
+        if len(partners) < 2:
+            raise ValueError("At least two distinct partners required.")
+        if samples < 1:
+            raise ValueError("At least one sample per sector required.")
+
+        # Seed per sector so every partner derives the same offsets independently
+        rng = random.Random(f"{seed}-{sector_id}")
+        upper = max(0, self.sector_size - slice_length)
+        offsets = sorted(rng.randint(0, upper) for _ in range(samples))
+
+        challenger = rng.choice(partners)
+        responders = [p for p in partners if p != challenger]
+
+        challenge = {
+            "challenge_id": f"batch-{seed}-{sector_id}",
+            "sector_id": sector_id,
+            "issued_by": challenger,
+            "targets": [(offset, slice_length) for offset in offsets],
+            "target_offset": offsets[0],
+            "target_length": slice_length,
+            "expected_responses": responders
+        }
+
+        self.challenge_log.append(challenge)
+        return challenge
+
+    def issue_challenges_for_sectors(self, sector_ids: List[str], partners: List[str], seed: int,
+                                     samples: int = 16, slice_length: int = 64 * 1024) -> List[dict]:
+        """Issues one batch challenge per sector, all derived from the same epoch seed."""
+        return [
+            self.issue_batch_challenge(sector_id, partners, seed, samples, slice_length)
+            for sector_id in sector_ids
+        ]
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="challenge-hash")
+        return self._pool
+
+    def close(self) -> None:
+        """Shuts down the hashing thread pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    @staticmethod
+    def _read_slices(source: SectorSource, targets: List[Tuple[int, int]]) -> List[Union[bytes, memoryview]]:
+        """
+        Reads challenge slices in offset order. In-memory bytes are sliced through
+        a memoryview (no copy); file objects are read with forward seeks only.
+        """
+        ordered = sorted(targets)
+        if isinstance(source, str):
+            return [source[o:o + n].encode() for o, n in ordered]
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            view = memoryview(source)
+            return [view[o:o + n] for o, n in ordered]
+
+        slices = []
+        for offset, length in ordered:
+            source.seek(offset)
+            slices.append(source.read(length))
+        return slices
+
+    @staticmethod
+    def _digest_slice(data: Union[bytes, memoryview]) -> bytes:
+        # hashlib drops the GIL for buffers larger than 2 KiB, so this scales across threads
+        return hashlib.sha256(data).digest()
+
+    def compute_batch_response(self, source: SectorSource, challenge: dict) -> str:
+        """
+        Hashes every targeted slice of a sector on the thread pool and folds the
+        slice digests (in offset order) into one response hash.
+        """
+        slices = self._read_slices(source, challenge["targets"])
+        digests = self._executor().map(self._digest_slice, slices)
+        folded = hashlib.sha256()
+        for digest in digests:
+            folded.update(digest)
+        return folded.hexdigest()
+
+    def verify_batch(self, challenges: List[dict],
+                     partner_sources: Dict[str, Dict[str, SectorSource]]) -> List[Dict]:
+        """
+        Computes every responder's answer for every challenge and compares them.
+        partner_sources maps sector_id -> {partner_id: sector source}.
+
+        Returns one record per challenge holding the challenge, the per-partner
+        responses (as accepted by compare_responses) and the comparison result
+        (as accepted by escalate_to_validator). A challenged partner without a
+        source did not respond: the challenge is a mismatch and the partner is
+        suspected faulty.
+        """
+        verdicts = []
+        for challenge in challenges:
+            sources = partner_sources.get(challenge["sector_id"], {})
+            responses = {
+                partner: self.compute_batch_response(sources[partner], challenge)
+                for partner in challenge["expected_responses"]
+                if partner in sources
+            }
+            result = self.compare_responses(responses)
+            missing = [partner for partner in challenge["expected_responses"] if partner not in sources]
+            if missing:
+                result = {
+                    "status": "mismatch",
+                    "groups": result.get("groups", {result.get("matching_hash"): result.get("responders")}),
+                    "suspected_faulty": result.get("suspected_faulty", []) + missing,
+                    "missing": missing
+                }
+            verdicts.append({
+                "challenge": challenge,
+                "responses": responses,
+                "result": result
+            })
+        return verdicts
+
     def simulate_partner_response(self, partner_id: str, offset: int, length: int, sector_content: str, corrupt: bool = False) -> str:
         """
         Simulates a partner hashing a segment of the sector.
@@ -130,3 +262,22 @@ if __name__ == "__main__":
     print("\n--- Escalation Log ---")
     for e in psc.escalation_log:
         print(e)
+
+    # Batch audit over several smaller sectors
+    batch_psc = PartnerStorageChallenger(sector_size=8 * 1024 ** 2)
+    sector_bytes = os.urandom(batch_psc.sector_size)
+    tampered = bytearray(sector_bytes)
+    tampered[::4096] = b"\x00" * len(tampered[::4096])
+
+    sector_ids = [f"sector_B{i}" for i in range(4)]
+    batch = batch_psc.issue_challenges_for_sectors(sector_ids, partners, seed, samples=32)
+    sources = {sid: {p: sector_bytes for p in partners} for sid in sector_ids}
+    sources["sector_B2"]["C"] = bytes(tampered)
+    del sources["sector_B3"]["A"]  # A never answers for B3
+
+    print("\n--- Batch Verdicts ---")
+    for verdict in batch_psc.verify_batch(batch, sources):
+        print(verdict["challenge"]["challenge_id"], verdict["result"]["status"])
+        if verdict["result"]["status"] == "mismatch":
+            batch_psc.escalate_to_validator(verdict["challenge"], verdict["result"])
+    batch_psc.close()
@@ -0,0 +1,163 @@
+"""
+SectorAllocator
+
+Packs variable sized files into fixed size sectors. Free space in every sector
+is tracked as a list of (offset, length) extents ordered by offset, and all free
+extents are additionally indexed by size so best-fit placement is a single
+bisect instead of a scan over every sector.
+
+The allocator only does bookkeeping; moving bytes on disk during compaction is
+delegated to a callback supplied by the owner (see FileManager).
+"""
+
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sector_manager import SectorManager
+
+Extent = Tuple[int, int]  # (offset, length)
+
+
+class SectorAllocator:
+    def __init__(self, sector_size: int = 0, alignment: int = 4096):
+        self.sector_size = sector_size or SectorManager.get_configured_sector_size()
+        self.alignment = alignment
+        self.free_extents: Dict[str, List[Extent]] = {}      # sector_id -> free extents sorted by offset
+        self.used_extents: Dict[str, Dict[int, int]] = {}    # sector_id -> {offset: length}
+        self._by_size: List[Tuple[int, str, int]] = []       # (length, sector_id, offset) for best-fit
+
+    # ----------------- Sizing -----------------
+    def reserved_size(self, length: int) -> int:
+        """Round a request up to the allocation unit (at least one unit)."""
+        units = max(1, -(-length // self.alignment))
+        return units * self.alignment
+
+    # ----------------- Sector Lifecycle -----------------
+    def add_sector(self) -> str:
+        """Open a new, empty sector and return its id."""
+        sector_id = f"sector_{len(self.free_extents) + 1}"
+        self.free_extents[sector_id] = []
+        self.used_extents[sector_id] = {}
+        self._add_free(sector_id, 0, self.sector_size)
+        return sector_id
+
+    def sectors(self) -> List[str]:
+        return list(self.free_extents.keys())
+
+    # ----------------- Allocation -----------------
+    def allocate(self, length: int, exclude: Optional[Set[str]] = None) -> Tuple[str, int, int]:
+        """
+        Reserve space for 'length' bytes using best-fit placement.
+        Sectors listed in 'exclude' are skipped, which lets callers spread
+        related extents (e.g. erasure coded shards) over distinct sectors.
+
+        Returns:
+            Tuple[str, int, int]: sector_id, offset and reserved size
+        """
+        size = self.reserved_size(length)
+        if size > self.sector_size:
+            raise ValueError(f"Allocation of {length} bytes exceeds sector size {self.sector_size}.")
+
+        idx = bisect_left(self._by_size, (size, "", -1))
+        if exclude:
+            while idx < len(self._by_size) and self._by_size[idx][1] in exclude:
+                idx += 1
+        if idx == len(self._by_size):
+            new_sector = self.add_sector()
+            idx = bisect_left(self._by_size, (self.sector_size, new_sector, 0))
+
+        extent_len, sector_id, offset = self._by_size[idx]
+        self._remove_free(sector_id, offset, extent_len)
+        if extent_len > size:
+            self._add_free(sector_id, offset + size, extent_len - size)
+
+        self.used_extents[sector_id][offset] = size
+        return sector_id, offset, size
+
+    def free(self, sector_id: str, offset: int) -> None:
+        """Release a previously allocated extent, merging it with free neighbours."""
+        size = self.used_extents[sector_id].pop(offset)
+        extents = self.free_extents[sector_id]
+        idx = bisect_left(extents, (offset, 0))
+
+        # Merge with the following extent
+        if idx < len(extents) and extents[idx][0] == offset + size:
+            next_off, next_len = extents[idx]
+            self._remove_free(sector_id, next_off, next_len)
+            size += next_len
+
+        # Merge with the preceding extent
+        if idx > 0:
+            prev_off, prev_len = extents[idx - 1]
+            if prev_off + prev_len == offset:
+                self._remove_free(sector_id, prev_off, prev_len)
+                offset, size = prev_off, prev_len + size
+
+        self._add_free(sector_id, offset, size)
+
+    # ----------------- Statistics -----------------
+    def free_bytes(self, sector_id: str) -> int:
+        return sum(length for _, length in self.free_extents[sector_id])
+
+    def fragmentation(self, sector_id: str) -> float:
+        """0.0 when all free space is one extent, approaching 1.0 when it is scattered."""
+        extents = self.free_extents[sector_id]
+        total = sum(length for _, length in extents)
+        if not total:
+            return 0.0
+        return 1.0 - max(length for _, length in extents) / total
+
+    # ----------------- Compaction -----------------
+    def compact(self, sector_id: str, move: Callable[[int, int, int], None]) -> Dict[int, int]:
+        """
+        Slide every used extent of a sector towards offset 0.
+        move(src_offset, dst_offset, length) is called in ascending offset order,
+        so destination ranges never overlap data that has not been moved yet.
+
+        Returns:
+            Dict[int, int]: old offset -> new offset for every relocated extent
+        """
+        relocated: Dict[int, int] = {}
+        cursor = 0
+        used = self.used_extents[sector_id]
+        for offset in sorted(used):
+            size = used[offset]
+            if offset != cursor:
+                move(offset, cursor, size)
+                relocated[offset] = cursor
+            cursor += size
+
+        self.used_extents[sector_id] = {relocated.get(o, o): s for o, s in used.items()}
+        for offset, length in list(self.free_extents[sector_id]):
+            self._remove_free(sector_id, offset, length)
+        if cursor < self.sector_size:
+            self._add_free(sector_id, cursor, self.sector_size - cursor)
+        return relocated
+
+    # ----------------- Internal Index Maintenance -----------------
+    def _add_free(self, sector_id: str, offset: int, length: int) -> None:
+        insort(self.free_extents[sector_id], (offset, length))
+        insort(self._by_size, (length, sector_id, offset))
+
+    def _remove_free(self, sector_id: str, offset: int, length: int) -> None:
+        extents = self.free_extents[sector_id]
+        extents.pop(bisect_left(extents, (offset, length)))
+        self._by_size.pop(bisect_left(self._by_size, (length, sector_id, offset)))
+
+
+if __name__ == "__main__":
+    allocator = SectorAllocator(sector_size=64 * 1024)
+
+    a = allocator.allocate(10_000)
+    b = allocator.allocate(5_000)
+    c = allocator.allocate(20_000)
+    print("Allocated:", a, b, c)
+
+    allocator.free(a[0], a[1])
+    print("Free extents after freeing A:", allocator.free_extents[a[0]])
+    print("Best-fit for 3000 bytes:", allocator.allocate(3_000))
+    print("Fragmentation:", round(allocator.fragmentation(a[0]), 3))
+
+    moves = allocator.compact(a[0], lambda src, dst, n: print(f"  move {n} bytes {src} -> {dst}"))
+    print("Relocations:", moves)
+    print("Free extents after compaction:", allocator.free_extents[a[0]])
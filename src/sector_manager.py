@@ -20,10 +20,13 @@ class SectorManager:
         self.version = version
         self.files: Dict[str, str] = {}  # file_id -> mock content
         self.mutations: List[Dict] = []  # chronological mutations
+        self.checkpoint_state: Dict[str, str] = {}  # state folded from cleared mutations
+        self.checkpoint_time: Optional[int] = None
         self.sector_size_limit = self.get_configured_sector_size()
         self.last_confirmed_root: Optional[str] = None
 
-    def get_configured_sector_size(self) -> int:
+    @staticmethod
+    def get_configured_sector_size() -> int:
         """Placeholder for sector size, replace with run rules config later."""
         return 4 * 1024 ** 3  # 4 GB
 
@@ -47,8 +50,12 @@ class SectorManager:
         self.mutations.append(job)
 
     def get_state_at(self, timestamp: int) -> Dict[str, str]:
-        """Reconstruct sector state at a given timestamp by replaying mutations."""
-        state: Dict[str, str] = {}
+        """
+        Reconstruct sector state at a given timestamp by replaying mutations
+        on top of the last checkpoint. Times before the checkpoint resolve to
+        the checkpoint state.
+        """
+        state: Dict[str, str] = dict(self.checkpoint_state)
         for job in sorted(self.mutations, key=lambda x: x["timestamp"]):
             if job["timestamp"] > timestamp:
                 break
@@ -71,13 +78,28 @@ class SectorManager:
         return hashlib.sha256(flat.encode()).hexdigest()
 
     # ----------------- Checkpointing -----------------
+    def fold_mutations(self, up_to: int) -> int:
+        """
+        Fold all mutations up to 'up_to' into the checkpoint state and clear
+        them, so the log only holds what happened since.
+
+        Returns:
+            int: Number of mutations cleared
+        """
+        self.checkpoint_state = self.get_state_at(up_to)
+        self.checkpoint_time = up_to if self.checkpoint_time is None else max(self.checkpoint_time, up_to)
+        kept = [m for m in self.mutations if m["timestamp"] > up_to]
+        cleared = len(self.mutations) - len(kept)
+        self.mutations = kept
+        return cleared
+
     def commit_checkpoint(self, root_hash: str, confirmed_time: int) -> None:
         """
         Confirm that all mutations up to 'confirmed_time' are permanent.
         Clears older mutations to reduce memory footprint.
         """
         self.last_confirmed_root = root_hash
-        self.mutations = [m for m in self.mutations if m["timestamp"] > confirmed_time]
+        self.fold_mutations(confirmed_time)
 
 
 # ----------------- Example Usage -----------------
@@ -119,3 +141,4 @@ if __name__ == "__main__":
     pprint.pprint(sm.mutations)
 
     print(f"\nMerkle Root (Post-Commit): {sm.calculate_merkle_root()}")
+    print(f"Snapshot @ {ts_challenge} still reconstructs: {sm.get_state_at(ts_challenge) == snapshot}")
@@ -0,0 +1,357 @@
+"""
+SessionKeyManager
+
+Per-peer session keys for ECDSAHandler. The ECDSAHandler encrypt methods run a
+fresh ephemeral ECDH + HKDF for every message; validators that talk to the same
+quorum peers thousands of times would pay one scalar multiplication per
+message. Here each peer pair runs one authenticated key exchange and then
+encrypts with cached AES-GCM keys and counter nonces until the session is
+rekeyed after 'max_messages' messages or 'max_age' seconds.
+
+Handshake (both ephemeral keys are signed with the long-term ECDSA keys):
+    initiator -> responder: offer = ephemeral key | nonce | timestamp | signature
+    responder -> initiator: reply = ephemeral key | signature over both keys and the nonce
+The responder rejects offers older than HANDSHAKE_MAX_SKEW seconds and offers
+whose nonce it has already seen, so a captured offer cannot be replayed. A
+new responder session only replaces an established one after the initiator's
+first frame under it decrypts, which proves the initiator holds its keys.
+HKDF over the shared secret yields one key per direction, so both sides can
+count nonces from zero without ever reusing a (key, nonce) pair. After a rekey
+the replaced session only decrypts frames still in flight: it is retired by
+the first frame authenticated under the new session, or after REKEY_GRACE
+seconds at the latest.
+
+Frames: session id (8 bytes) | counter (8 bytes) | AES-GCM ciphertext + tag.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.backends import default_backend
+
+from ecdsa_handler import ECDSAHandler
+
+SESSION_ID_SIZE = 8
+COUNTER_SIZE = 8
+REPLAY_WINDOW = 64  # Out-of-order counters accepted behind the highest one seen
+OFFER_NONCE_SIZE = 16
+HANDSHAKE_MAX_SKEW = 60.0  # Seconds an offer's timestamp may differ from the local clock
+REKEY_GRACE = 30.0  # Seconds a replaced session may still decrypt in-flight frames
+
+
+def _pack(*fields: bytes) -> bytes:
+    return b"".join(len(field).to_bytes(2, "big") + field for field in fields)
+
+
+def _unpack(data: bytes, count: int) -> Tuple[bytes, ...]:
+    fields = []
+    pos = 0
+    for _ in range(count):
+        if pos + 2 > len(data):
+            raise ValueError("Truncated handshake message.")
+        length = int.from_bytes(data[pos:pos + 2], "big")
+        fields.append(data[pos + 2:pos + 2 + length])
+        pos += 2 + length
+    if pos != len(data):
+        raise ValueError("Malformed handshake message.")
+    return tuple(fields)
+
+
+class PeerSession:
+    def __init__(self, session_id: bytes, send_key: bytes, receive_key: bytes):
+        self.session_id = session_id
+        self.send_cipher = AESGCM(send_key)
+        self.receive_cipher = AESGCM(receive_key)
+        self.created_at = time.monotonic()
+        self.sent = 0
+        self.highest_received = -1
+        self.received_window = 0  # Bit i set: counter highest_received - i was seen
+
+    def accept_counter(self, counter: int) -> bool:
+        """Sliding window replay check; records the counter when it is new."""
+        if counter > self.highest_received:
+            shift = counter - self.highest_received
+            self.received_window = ((self.received_window << shift) | 1) & ((1 << REPLAY_WINDOW) - 1)
+            self.highest_received = counter
+            return True
+        offset = self.highest_received - counter
+        if offset >= REPLAY_WINDOW or self.received_window >> offset & 1:
+            return False
+        self.received_window |= 1 << offset
+        return True
+
+
+class SessionKeyManager:
+    def __init__(self, handler: ECDSAHandler, local_id: str, private_key: ec.EllipticCurvePrivateKey,
+                 max_messages: int = 1_000_000, max_age: float = 3600.0, rekey_grace: float = REKEY_GRACE):
+        """
+        local_id and private_key are this node's identity; every handshake message is
+        signed with private_key and checked against the peer's long-term public key.
+        rekey_grace bounds how long a replaced session still decrypts frames.
+        """
+        self.handler = handler
+        self.local_id = local_id
+        self.private_key = private_key
+        self.max_messages = max_messages
+        self.max_age = max_age
+        self.rekey_grace = rekey_grace
+
+        self._pending: Dict[str, Tuple[ec.EllipticCurvePrivateKey, bytes]] = {}  # peer -> (ephemeral, offer nonce)
+        self._sessions: Dict[str, PeerSession] = {}
+        self._previous: Dict[str, Tuple[PeerSession, float]] = {}  # (replaced session, retire time) for frames in flight
+        self._unconfirmed: Dict[str, PeerSession] = {}  # Accepted rekeys waiting for the initiator's first frame
+        self._seen_offers: Dict[bytes, float] = {}  # Offer nonce -> time it can be forgotten
+        self._lock = threading.Lock()
+
+    # ----------------- Handshake -----------------
+    def create_handshake(self, peer_id: str) -> bytes:
+        """
+        Start (or restart, to rekey) a session with a peer.
+
+        Returns:
+            bytes: Offer to send to the peer
+        """
+        ephemeral = ec.generate_private_key(self.handler.curve, default_backend())
+        ephemeral_bytes = self._point(ephemeral.public_key())
+        nonce = os.urandom(OFFER_NONCE_SIZE)
+        timestamp = int(time.time()).to_bytes(8, "big")
+        with self._lock:
+            self._pending[peer_id] = (ephemeral, nonce)
+        transcript = self._transcript(b"offer", self.local_id, peer_id, ephemeral_bytes + nonce + timestamp)
+        return _pack(ephemeral_bytes, nonce, timestamp, self.handler.sign_message(self.private_key, transcript))
+
+    def accept_handshake(self, peer_id: str, peer_public_key: Any, offer: bytes) -> bytes:
+        """
+        Verify a peer's offer, set up the session and return the reply for the peer.
+        Stale or already seen offers raise ValueError. A session that replaces an
+        established one is only used once the peer has sent a frame under it.
+        """
+        peer_ephemeral_bytes, nonce, timestamp, signature = _unpack(offer, 4)
+        if len(nonce) != OFFER_NONCE_SIZE or len(timestamp) != 8:
+            raise ValueError(f"Malformed handshake offer from {peer_id}.")
+        transcript = self._transcript(b"offer", peer_id, self.local_id, peer_ephemeral_bytes + nonce + timestamp)
+        if not self._verify(peer_public_key, transcript, signature):
+            raise ValueError(f"Handshake offer from {peer_id} has an invalid signature.")
+        now = time.time()
+        if abs(now - int.from_bytes(timestamp, "big")) > HANDSHAKE_MAX_SKEW:
+            raise ValueError(f"Handshake offer from {peer_id} is stale.")
+        with self._lock:
+            self._seen_offers = {seen: until for seen, until in self._seen_offers.items() if until > now}
+            if nonce in self._seen_offers:
+                raise ValueError(f"Replayed handshake offer from {peer_id}.")
+            self._seen_offers[nonce] = now + 2 * HANDSHAKE_MAX_SKEW
+
+        ephemeral = ec.generate_private_key(self.handler.curve, default_backend())
+        ephemeral_bytes = self._point(ephemeral.public_key())
+        transcript = self._transcript(b"reply", self.local_id, peer_id, peer_ephemeral_bytes + ephemeral_bytes + nonce)
+        reply = _pack(ephemeral_bytes, self.handler.sign_message(self.private_key, transcript))
+
+        initiator_key, responder_key, session_id = self._derive(ephemeral, peer_ephemeral_bytes, transcript)
+        session = PeerSession(session_id, send_key=responder_key, receive_key=initiator_key)
+        with self._lock:
+            if peer_id in self._sessions:
+                self._unconfirmed[peer_id] = session
+                return reply
+        self._install(peer_id, session)
+        return reply
+
+    def complete_handshake(self, peer_id: str, peer_public_key: Any, reply: bytes) -> None:
+        """
+        Verify the peer's reply to our offer and establish the session.
+        """
+        with self._lock:
+            pending = self._pending.get(peer_id)
+        if pending is None:
+            raise ValueError(f"No handshake in progress with {peer_id}.")
+        ephemeral, nonce = pending
+
+        peer_ephemeral_bytes, signature = _unpack(reply, 2)
+        transcript = self._transcript(b"reply", peer_id, self.local_id,
+                                      self._point(ephemeral.public_key()) + peer_ephemeral_bytes + nonce)
+        if not self._verify(peer_public_key, transcript, signature):
+            raise ValueError(f"Handshake reply from {peer_id} has an invalid signature.")
+
+        initiator_key, responder_key, session_id = self._derive(ephemeral, peer_ephemeral_bytes, transcript)
+        with self._lock:
+            self._pending.pop(peer_id, None)
+        self._install(peer_id, PeerSession(session_id, send_key=initiator_key, receive_key=responder_key))
+
+    # ----------------- Encryption -----------------
+    def encrypt(self, peer_id: str, message: bytes, associated_data: bytes = b"") -> bytes:
+        """
+        Encrypt a message for a peer with the current session key.
+        Raises ValueError when there is no session or it must be rekeyed first.
+        """
+        with self._lock:
+            session = self._sessions.get(peer_id)
+            if session is None:
+                raise ValueError(f"No session with {peer_id}; run a handshake first.")
+            if self._expired(session):
+                raise ValueError(f"Session with {peer_id} has expired; run a new handshake.")
+            counter = session.sent
+            session.sent += 1
+
+        header = session.session_id + counter.to_bytes(COUNTER_SIZE, "big")
+        return header + session.send_cipher.encrypt(self._nonce(counter), message, header + associated_data)
+
+    def decrypt(self, peer_id: str, frame: bytes, associated_data: bytes = b"") -> bytes:
+        """
+        Decrypt a frame from a peer. Replayed or forged frames raise ValueError.
+        """
+        header_size = SESSION_ID_SIZE + COUNTER_SIZE
+        if len(frame) < header_size + 16:
+            raise ValueError("Frame is too short.")
+        session_id = frame[:SESSION_ID_SIZE]
+        counter = int.from_bytes(frame[SESSION_ID_SIZE:header_size], "big")
+
+        with self._lock:
+            previous = self._previous.get(peer_id)
+            if previous is not None and time.monotonic() >= previous[1]:
+                del self._previous[peer_id]
+                previous = None
+            candidates = (self._sessions.get(peer_id), previous and previous[0], self._unconfirmed.get(peer_id))
+            session = next((s for s in candidates if s is not None and s.session_id == session_id), None)
+        if session is None:
+            raise ValueError(f"Unknown session for {peer_id}.")
+
+        try:
+            plaintext = session.receive_cipher.decrypt(self._nonce(counter), frame[header_size:], frame[:header_size] + associated_data)
+        except Exception:
+            raise ValueError(f"Frame from {peer_id} failed authentication.")
+        with self._lock:
+            if not session.accept_counter(counter):
+                raise ValueError(f"Replayed frame from {peer_id}.")
+            confirmed = self._unconfirmed.get(peer_id) is session
+            if confirmed:
+                del self._unconfirmed[peer_id]
+            elif self._sessions.get(peer_id) is session:
+                self._previous.pop(peer_id, None)  # The peer has switched keys; retire the old session
+        if confirmed:
+            self._install(peer_id, session)
+            with self._lock:
+                self._previous.pop(peer_id, None)  # The confirming frame already used the new session
+        return plaintext
+
+    # ----------------- Session state -----------------
+    def has_session(self, peer_id: str) -> bool:
+        with self._lock:
+            return peer_id in self._sessions
+
+    def needs_rekey(self, peer_id: str) -> bool:
+        """True when there is no usable session with the peer."""
+        with self._lock:
+            session = self._sessions.get(peer_id)
+            return session is None or self._expired(session)
+
+    def drop_session(self, peer_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(peer_id, None)
+            self._previous.pop(peer_id, None)
+            self._unconfirmed.pop(peer_id, None)
+            self._pending.pop(peer_id, None)
+
+    def session_info(self, peer_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            session = self._sessions.get(peer_id)
+            if session is None:
+                return None
+            return {
+                "session_id": session.session_id.hex(),
+                "sent": session.sent,
+                "highest_received": session.highest_received,
+                "age": time.monotonic() - session.created_at
+            }
+
+    # ----------------- Helpers -----------------
+    def _expired(self, session: PeerSession) -> bool:
+        return session.sent >= self.max_messages or time.monotonic() - session.created_at >= self.max_age
+
+    def _install(self, peer_id: str, session: PeerSession) -> None:
+        with self._lock:
+            current = self._sessions.get(peer_id)
+            if current is not None:
+                self._previous[peer_id] = (current, time.monotonic() + self.rekey_grace)
+            self._sessions[peer_id] = session
+
+    def _derive(self, ephemeral: ec.EllipticCurvePrivateKey, peer_ephemeral_bytes: bytes, transcript: bytes) -> Tuple[bytes, bytes, bytes]:
+        peer_ephemeral = ec.EllipticCurvePublicKey.from_encoded_point(self.handler.curve, peer_ephemeral_bytes)
+        shared_secret = ephemeral.exchange(ec.ECDH(), peer_ephemeral)
+        transcript_hash = hashlib.sha256(transcript).digest()
+        keys = HKDF(algorithm=hashes.SHA256(), length=64, salt=transcript_hash, info=b'session keys', backend=default_backend()).derive(shared_secret)
+        return keys[:32], keys[32:], transcript_hash[:SESSION_ID_SIZE]
+
+    def _verify(self, peer_public_key: Any, data: bytes, signature: bytes) -> bool:
+        if not isinstance(peer_public_key, ec.EllipticCurvePublicKey):
+            try:
+                peer_public_key = self.handler.deserialize_public_key(peer_public_key)
+            except Exception:
+                return False
+        return self.handler.verify_signature(peer_public_key, data, signature)
+
+    @staticmethod
+    def _transcript(label: bytes, initiator: str, responder: str, keys: bytes) -> bytes:
+        return _pack(b"ProtoLayer session", label, initiator.encode(), responder.encode(), keys)
+
+    @staticmethod
+    def _point(public_key: ec.EllipticCurvePublicKey) -> bytes:
+        return public_key.public_bytes(encoding=serialization.Encoding.X962, format=serialization.PublicFormat.CompressedPoint)
+
+    @staticmethod
+    def _nonce(counter: int) -> bytes:
+        return counter.to_bytes(12, "big")
+
+
+if __name__ == "__main__":
+    handler = ECDSAHandler()
+    alice_private, alice_public = handler.generate_keys()
+    bob_private, bob_public = handler.generate_keys()
+    count = 10_000
+    alice = SessionKeyManager(handler, "alice", alice_private, max_messages=count)
+    bob = SessionKeyManager(handler, "bob", bob_private)
+
+    reply = bob.accept_handshake("alice", alice_public, alice.create_handshake("bob"))
+    alice.complete_handshake("bob", bob_public, reply)
+
+    start = time.perf_counter()
+    for i in range(count):
+        frame = alice.encrypt("bob", b"vote %d" % i)
+        bob.decrypt("alice", frame)
+    session_rate = count / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(200):
+        envelope = handler.symmetric_encrypt_message(bob_public, b"vote %d" % i)
+        handler.symmetric_decrypt_message(bob_private, *envelope)
+    ecdh_rate = 200 / (time.perf_counter() - start)
+
+    print(f"Session round trips/s: {session_rate:.0f}, per-message ECDH round trips/s: {ecdh_rate:.0f}")
+    try:
+        bob.decrypt("alice", frame)
+    except ValueError as error:
+        print(f"Replay rejected: {error}")
+    print(f"Alice must rekey after {count} messages: {alice.needs_rekey('bob')}")
+    offer = alice.create_handshake("bob")
+    reply = bob.accept_handshake("alice", alice_public, offer)
+    alice.complete_handshake("bob", bob_public, reply)
+    try:
+        bob.accept_handshake("alice", alice_public, offer)
+    except ValueError as error:
+        print(f"Replayed offer rejected: {error}")
+    old_session = bob.session_info("alice")["session_id"]
+    in_flight = [bob.encrypt("alice", b"in flight %d" % i) for i in range(2)]  # Bob still uses the old session
+    print(f"After rekey: {bob.decrypt('alice', alice.encrypt('bob', b'fresh session'))}, "
+          f"bob switched once confirmed: {bob.session_info('alice')['session_id'] != old_session}")
+    print(f"Frame in flight during the rekey: {alice.decrypt('bob', in_flight[0])}")
+    alice.decrypt("bob", bob.encrypt("alice", b"first frame under the new session"))
+    try:
+        alice.decrypt("bob", in_flight[1])
+        print("Old session still accepted after the switch (BUG)")
+    except ValueError as error:
+        print(f"Old session retired: {error}")
@@ -0,0 +1,246 @@
+"""
+Chunked AEAD streams
+
+ECDSAHandler.symmetric_encrypt_message seals a whole message with one AES-GCM
+call, so the full plaintext and ciphertext have to sit in memory together.
+This format splits the plaintext into fixed-size chunks that are sealed
+independently, which keeps memory constant for streams of any length and lets
+a reader decrypt any chunk range without touching the rest.
+
+Layout:
+    header: MAGIC (4) | version (1) | chunk size (4) | nonce prefix (7)
+    chunks: AES-GCM(chunk) + 16-byte tag, every chunk but the last is full size
+
+The nonce of chunk i is prefix | i (4 bytes) | final flag (1 byte) and the
+header is authenticated with every chunk, so reordering, dropping, truncating
+or extending a stream all fail authentication (the STREAM construction).
+"""
+
+import os
+from typing import BinaryIO, Callable, Iterable, Iterator, Tuple, Union
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+MAGIC = b"PLSE"
+VERSION = 1
+HEADER_SIZE = 16
+TAG_SIZE = 16
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAX_CHUNKS = 2 ** 32
+
+Source = Union[Iterable[bytes], BinaryIO]
+
+
+def generate_stream_key() -> bytes:
+    return AESGCM.generate_key(bit_length=256)
+
+
+def chunk_count(plaintext_size: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Number of sealed chunks for a plaintext; an empty stream still has one (empty) final chunk."""
+    return max(1, -(-plaintext_size // chunk_size))
+
+
+def encrypted_size(plaintext_size: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    return HEADER_SIZE + plaintext_size + TAG_SIZE * chunk_count(plaintext_size, chunk_size)
+
+
+def plaintext_size(total_size: int, chunk_size: int) -> int:
+    """Inverse of encrypted_size."""
+    body = total_size - HEADER_SIZE
+    chunks = max(1, -(-body // (chunk_size + TAG_SIZE)))
+    size = body - TAG_SIZE * chunks
+    if size < 0:
+        raise ValueError(f"{total_size} bytes is not a valid encrypted stream size.")
+    return size
+
+
+def parse_header(header: bytes) -> Tuple[int, bytes]:
+    """
+    Returns:
+        Tuple[int, bytes]: chunk size and nonce prefix
+    """
+    if len(header) != HEADER_SIZE or header[:4] != MAGIC:
+        raise ValueError("Not an encrypted stream header.")
+    if header[4] != VERSION:
+        raise ValueError(f"Unsupported encrypted stream version {header[4]}.")
+    chunk_size = int.from_bytes(header[5:9], "big")
+    if chunk_size == 0:
+        raise ValueError("Encrypted stream header has a zero chunk size.")
+    return chunk_size, header[9:16]
+
+
+def _blocks(source: Source, size: int) -> Iterator[Tuple[bytes, bool]]:
+    """
+    Re-cut an iterable of byte strings or a binary file object into 'size' byte
+    blocks, flagging the last one. One block of look-ahead is kept so the final
+    flag is known before the block is handed out.
+    """
+    if hasattr(source, "read"):
+        reader: BinaryIO = source  # type: ignore[assignment]
+        source = iter(lambda: reader.read(size), b"")
+
+    pending = bytearray()
+    ready = None
+    for piece in source:
+        pending += piece
+        while len(pending) > size:
+            if ready is not None:
+                yield ready, False
+            ready = bytes(pending[:size])
+            del pending[:size]
+    if pending or ready is None:
+        if ready is not None:
+            yield ready, False
+        yield bytes(pending), True
+    else:
+        yield ready, True
+
+
+class StreamEncryptor:
+    def __init__(self, key: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if not 0 < chunk_size < 2 ** 32:
+            raise ValueError("Chunk size must be between 1 byte and 4 GiB.")
+        self.chunk_size = chunk_size
+        self.header = MAGIC + bytes([VERSION]) + chunk_size.to_bytes(4, "big") + os.urandom(7)
+        self._cipher = AESGCM(key)
+
+    def encrypt_chunk(self, index: int, plaintext: bytes, final: bool) -> bytes:
+        return self._cipher.encrypt(_nonce(self.header[9:], index, final), plaintext, self.header)
+
+
+class StreamDecryptor:
+    def __init__(self, key: bytes, header: bytes):
+        self.header = bytes(header)
+        self.chunk_size, self._prefix = parse_header(self.header)
+        self._cipher = AESGCM(key)
+
+    def decrypt_chunk(self, index: int, ciphertext: bytes, final: bool) -> bytes:
+        try:
+            return self._cipher.decrypt(_nonce(self._prefix, index, final), ciphertext, self.header)
+        except InvalidTag:
+            raise ValueError(f"Chunk {index} of the encrypted stream failed authentication.")
+
+
+def _nonce(prefix: bytes, index: int, final: bool) -> bytes:
+    if index >= MAX_CHUNKS:
+        raise ValueError("Encrypted stream has too many chunks.")
+    return prefix + index.to_bytes(4, "big") + (b"\x01" if final else b"\x00")
+
+
+def encrypt_stream(key: bytes, source: Source, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Encrypt an iterable of byte strings or a binary file object.
+    Yields the header followed by one sealed chunk at a time.
+    """
+    encryptor = StreamEncryptor(key, chunk_size)
+    yield encryptor.header
+    for index, (block, final) in enumerate(_blocks(source, chunk_size)):
+        yield encryptor.encrypt_chunk(index, block, final)
+
+
+def decrypt_stream(key: bytes, source: Source) -> Iterator[bytes]:
+    """
+    Decrypt the output of encrypt_stream, given as an iterable of byte strings
+    (cut anywhere) or a binary file object. Yields one plaintext chunk at a time.
+    """
+    if hasattr(source, "read"):
+        reader: BinaryIO = source  # type: ignore[assignment]
+        source = iter(lambda: reader.read(DEFAULT_CHUNK_SIZE + TAG_SIZE), b"")
+    pieces = iter(source)
+
+    header = bytearray()
+    for piece in pieces:
+        header += piece
+        if len(header) >= HEADER_SIZE:
+            break
+    decryptor = StreamDecryptor(key, header[:HEADER_SIZE])
+
+    def body() -> Iterator[bytes]:
+        if len(header) > HEADER_SIZE:
+            yield bytes(header[HEADER_SIZE:])
+        yield from pieces
+
+    for index, (sealed, final) in enumerate(_blocks(body(), decryptor.chunk_size + TAG_SIZE)):
+        yield decryptor.decrypt_chunk(index, sealed, final)
+
+
+def decrypt_range(key: bytes, read: Callable[[int, int], bytes], total_size: int,
+                  offset: int = 0, length: int = -1) -> bytes:
+    """
+    Decrypt plaintext bytes [offset, offset + length) of a stored stream, reading
+    only the header and the chunks that cover the range.
+
+    'read(position, n)' returns n bytes of the encrypted stream at 'position' and
+    'total_size' is the encrypted stream's length (needed to spot the final chunk).
+    """
+    decryptor = StreamDecryptor(key, read(0, HEADER_SIZE))
+    size = decryptor.chunk_size
+    plain_total = plaintext_size(total_size, size)
+    if offset < 0 or offset > plain_total:
+        raise ValueError(f"Offset {offset} outside of {plain_total} plaintext bytes.")
+    end = plain_total if length < 0 else min(plain_total, offset + length)
+    if end == offset:
+        return b""
+
+    last_index = chunk_count(plain_total, size) - 1
+    first, last = offset // size, (end - 1) // size
+    sealed_size = size + TAG_SIZE
+    sealed = read(HEADER_SIZE + first * sealed_size, min((last - first + 1) * sealed_size,
+                                                         total_size - HEADER_SIZE - first * sealed_size))
+    plaintext = b"".join(
+        decryptor.decrypt_chunk(index, sealed[pos:pos + sealed_size], index == last_index)
+        for index, pos in zip(range(first, last + 1), range(0, len(sealed), sealed_size))
+    )
+    start = offset - first * size
+    return plaintext[start:start + end - offset]
+
+
+def encrypt_file(key: bytes, source: BinaryIO, destination: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Encrypt one binary file object into another. Returns the encrypted size."""
+    written = 0
+    for piece in encrypt_stream(key, source, chunk_size):
+        destination.write(piece)
+        written += len(piece)
+    return written
+
+
+def decrypt_file(key: bytes, source: BinaryIO, destination: BinaryIO) -> int:
+    """Decrypt one binary file object into another. Returns the plaintext size."""
+    written = 0
+    for piece in decrypt_stream(key, source):
+        destination.write(piece)
+        written += len(piece)
+    return written
+
+
+if __name__ == "__main__":
+    import io
+    import time
+    import tracemalloc
+
+    key = generate_stream_key()
+    payload = os.urandom(64 * 1024 ** 2 + 123)
+
+    source = io.BytesIO(payload)
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(os.devnull, "wb") as sink:
+        written = encrypt_file(key, source, sink)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Encrypted {len(payload) // 1024 ** 2} MiB at {len(payload) / elapsed / 1024 ** 2:.0f} MiB/s, "
+          f"peak extra memory {peak / 1024:.0f} KiB, size matches: {written == encrypted_size(len(payload))}")
+
+    blob = b"".join(encrypt_stream(key, [payload]))
+    decrypted = io.BytesIO()
+    decrypt_file(key, io.BytesIO(blob), decrypted)
+    print(f"Round trip: {decrypted.getvalue() == payload}")
+
+    window = decrypt_range(key, lambda pos, n: blob[pos:pos + n], len(blob), 10_000_000, 200_000)
+    print(f"Random access range: {window == payload[10_000_000:10_200_000]}")
+    try:
+        b"".join(decrypt_stream(key, [blob[:-TAG_SIZE - 1000]]))
+    except ValueError as error:
+        print(f"Truncation detected: {error}")
@@ -0,0 +1,80 @@
+"""
+VerificationCache
+
+Bounded LRU set of signatures that already verified successfully. Gossip
+delivers the same transactions and finalization proofs from several peers;
+with the cache in front of CryptoFactory only the first copy pays for the
+elliptic-curve verification and the rest cost one SHA-256 and a dict lookup.
+
+Only successful verifications are recorded, so a failed check is always
+retried and a forged signature can never be answered from the cache.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Union
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+class VerificationCache:
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(scheme: str, public_key: Union[str, BytesLike], message: BytesLike, signature: BytesLike) -> bytes:
+        """
+        Digest of (scheme, public key, message, signature). 'scheme' must name
+        everything that changes what a signature means (algorithm, curve,
+        hash). Every field is length prefixed so different splits of the same
+        bytes cannot collide.
+        """
+        key_bytes = public_key.encode("utf-8") if isinstance(public_key, str) else bytes(public_key)
+        digest = hashlib.sha256()
+        for part in (scheme.encode("utf-8"), key_bytes, message, signature):
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+        return digest.digest()
+
+    def contains(self, key: bytes) -> bool:
+        """Check for a verified entry, counting the hit or miss and refreshing its recency."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, key: bytes) -> None:
+        """Record a successful verification, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = None
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)